@@ -17,6 +17,11 @@ from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 import warnings
 from datetime import datetime
 import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from comun.transformacion_features import preparar_features
 
 warnings.filterwarnings('ignore')
 
@@ -177,28 +182,11 @@ print("\n" + "="*80)
 print("6. FEATURE ENGINEERING")
 print("="*80)
 
-df_engineered = df_clean.copy()
-
-# Variables cíclicas para mes
-print(f"\n🔧 Creando variables cíclicas para mes_carga...")
-df_engineered['mes_sin'] = np.sin(2 * np.pi * df_engineered['mes_carga'] / 12)
-df_engineered['mes_cos'] = np.cos(2 * np.pi * df_engineered['mes_carga'] / 12)
-print(f"   ✓ Creadas: mes_sin, mes_cos")
-
-# Ratio alimento/densidad
-print(f"\n🔧 Creando ratio alimento por densidad...")
-df_engineered['alimento_por_densidad'] = (
-    df_engineered['kilos_recibidos_percapita'] / df_engineered['densidad_pollos_m2']
-)
+# Mismo feature engineering que en producción (comun.transformacion_features)
+print(f"\n🔧 Creando features derivadas...")
+df_engineered = preparar_features(df_clean, conservar=df_clean.columns)
+print(f"   ✓ Cíclicas para mes_carga: mes_sin, mes_cos")
 print(f"   ✓ alimento_por_densidad = kilos_recibidos / densidad")
-
-# Categoría de densidad
-print(f"\n🔧 Categorizando densidad...")
-df_engineered['densidad_categoria'] = pd.cut(
-    df_engineered['densidad_pollos_m2'],
-    bins=[0, 13, 15, 20, 50],
-    labels=['Baja', 'Media', 'Alta', 'Muy_Alta']
-)
 print(f"   ✓ densidad_categoria (Baja/Media/Alta/Muy_Alta)")
 
 print(f"\n✓ Total features después de engineering: {len(df_engineered.columns) - 1}")
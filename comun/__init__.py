@@ -0,0 +1,3 @@
+"""
+Módulos compartidos del Sistema de Modelación F35
+"""
@@ -0,0 +1,125 @@
+"""
+BENCHMARK DE ARRANQUE DEL PREDICTOR
+===================================
+
+Mide el arranque en frío de produccion/produccionXX/predictor.py: un proceso
+nuevo que importa el módulo, crea PredictorGanancia y llama validar_input.
+Corre con python -X importtime para listar los paquetes más caros de importar
+y avisar si PyCaret entró en la ruta de arranque.
+
+Uso:
+    python -m comun.benchmark_arranque [produccion03] [--limite 1.0] [--historial archivo.csv]
+
+Termina con código 1 si la mediana supera el límite (en segundos), así puede
+correr antes de publicar una versión. Con --historial agrega una fila por
+ejecución para seguir la evolución en el tiempo.
+"""
+
+import argparse
+import csv
+from datetime import datetime
+import os
+from pathlib import Path
+import statistics
+import subprocess
+import sys
+import time
+
+
+RAIZ = Path(__file__).resolve().parents[1]
+LIMITE_SEGUNDOS = 1.0
+
+# Arranque en frío: importar, crear el predictor y validar un caso
+_CODIGO_ARRANQUE = """
+from predictor import PredictorGanancia
+p = PredictorGanancia()
+ok, mensaje = p.validar_input({'mes_carga': 6, 'sexo': 'MACHO', 'kilos_recibidos_percapita': 3.5, 'tipoConstruccion': 'Black Out', 'densidad_pollos_m2': 14.5})
+assert ok, mensaje
+"""
+
+
+def _leer_importtime(stderr):
+    """
+    Tiempo propio de import sumado por paquete raíz (pandas, numpy, comun, ...)
+
+    Returns:
+        dict paquete -> microsegundos, y set con todos los módulos importados
+    """
+    por_paquete = {}
+    todos = set()
+    for linea in stderr.splitlines():
+        if not linea.startswith('import time:') or 'cumulative' in linea:
+            continue
+        propio, _, nombre = linea[len('import time:'):].split('|')
+        modulo = nombre.strip()
+        todos.add(modulo)
+        paquete = modulo.split('.')[0]
+        por_paquete[paquete] = por_paquete.get(paquete, 0) + int(propio)
+    return por_paquete, todos
+
+
+def medir_arranque(directorio, repeticiones=5):
+    """
+    Medir el arranque en frío del predictor de un directorio de producción
+
+    Args:
+        directorio: Carpeta con predictor.py
+        repeticiones: Procesos a lanzar (se informa la mediana)
+
+    Returns:
+        dict con segundos (lista), imports (último perfil) y pycaret (bool)
+    """
+    segundos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        salida = subprocess.run([sys.executable, '-X', 'importtime', '-c', _CODIGO_ARRANQUE], cwd=directorio, capture_output=True, text=True)
+        segundos.append(time.perf_counter() - inicio)
+        if salida.returncode != 0:
+            raise RuntimeError(f"El arranque falló en {directorio}:\n{salida.stderr[-2000:]}")
+    imports, todos = _leer_importtime(salida.stderr)
+    return {
+        'segundos': segundos,
+        'imports': imports,
+        'pycaret': any(m == 'pycaret' or m.startswith('pycaret.') for m in todos),
+    }
+
+
+def _guardar_historial(ruta, produccion, mediana, pycaret):
+    nuevo = not os.path.exists(ruta)
+    with open(ruta, 'a', newline='') as archivo:
+        escritor = csv.writer(archivo)
+        if nuevo:
+            escritor.writerow(['fecha', 'produccion', 'python', 'mediana_segundos', 'pycaret_importado'])
+        escritor.writerow([datetime.now().isoformat(timespec='seconds'), produccion, sys.version.split()[0], f'{mediana:.3f}', pycaret])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Arranque en frío de PredictorGanancia (import + validar_input)')
+    parser.add_argument('produccion', nargs='?', default='produccion03', help='Carpeta dentro de produccion/')
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--limite', type=float, default=LIMITE_SEGUNDOS, help='Mediana máxima aceptada en segundos')
+    parser.add_argument('--top', type=int, default=10, help='Paquetes más caros a mostrar')
+    parser.add_argument('--historial', help='CSV al que agregar el resultado')
+    args = parser.parse_args()
+
+    resultado = medir_arranque(RAIZ / 'produccion' / args.produccion, args.repeticiones)
+    mediana = statistics.median(resultado['segundos'])
+
+    print(f"\n⏱️  Arranque en frío {args.produccion}: mediana {mediana:.3f}s "
+          f"(mín {min(resultado['segundos']):.3f}s, máx {max(resultado['segundos']):.3f}s, {args.repeticiones} procesos)")
+    print(f"\n   {'paquete':<30} {'import ms':>13}")
+    for modulo, micro in sorted(resultado['imports'].items(), key=lambda x: -x[1])[:args.top]:
+        print(f"   {modulo:<30} {micro / 1000:>13.1f}")
+    if resultado['pycaret']:
+        print("\n⚠️  pycaret se importó durante el arranque")
+
+    if args.historial:
+        _guardar_historial(args.historial, args.produccion, mediana, resultado['pycaret'])
+
+    estado = '✅' if mediana <= args.limite else '❌'
+    print(f"\n{estado} Límite {args.limite:.2f}s")
+    return 0 if mediana <= args.limite else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
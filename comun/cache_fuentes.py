@@ -0,0 +1,91 @@
+"""
+CACHE DE FUENTES PARSEADAS
+==========================
+
+Cache direccionado por contenido para las exportaciones SAP (tablas HTML con
+extensión .xls) y los workbooks que leen la ingesta y los compilados. Cada
+archivo parseado se guarda como Parquet con nombre igual al sha256 de sus
+bytes más los parámetros de lectura, de modo que una segunda lectura del mismo
+contenido es una lectura columnar sin volver a pasar por lxml u openpyxl.
+
+El cache es de mejor esfuerzo: si pyarrow no está instalado o el frame no se
+puede representar en Parquet, se devuelve el resultado parseado sin guardarlo.
+"""
+
+from pathlib import Path
+import importlib.util
+import hashlib
+import os
+
+import pandas as pd
+
+
+CACHE_DIR = Path(os.environ.get('F35_CACHE_FUENTES', Path(__file__).resolve().parent.parent / 'ejecucion_vigente' / 'data' / 'cache_fuentes'))
+PARQUET_DISPONIBLE = importlib.util.find_spec('pyarrow') is not None
+
+
+def hash_archivo(ruta, tamano_bloque=1 << 20):
+    """Calcular el sha256 del contenido de un archivo"""
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(tamano_bloque), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def _clave_cache(sha256, nombre_lector, kwargs):
+    """Clave del cache: contenido del archivo + lector + parámetros de lectura"""
+    firma = f"{sha256}|{nombre_lector}|{sorted(kwargs.items())!r}"
+    return hashlib.sha256(firma.encode('utf-8')).hexdigest()
+
+
+def leer_con_cache(ruta, lector, nombre_lector, sha256=None, cache_dir=None, **kwargs):
+    """
+    Leer un archivo pasando por el cache columnar
+
+    Args:
+        ruta: Archivo fuente
+        lector: Función (ruta, **kwargs) -> DataFrame
+        nombre_lector: Identificador estable del lector (forma parte de la clave)
+        sha256: Hash del archivo si ya se conoce (p.ej. desde el manifiesto)
+        cache_dir: Carpeta del cache (por defecto CACHE_DIR)
+        **kwargs: Parámetros de lectura
+
+    Returns:
+        DataFrame parseado
+    """
+    if not PARQUET_DISPONIBLE:
+        return lector(ruta, **kwargs)
+
+    cache_dir = Path(cache_dir) if cache_dir is not None else CACHE_DIR
+    clave = _clave_cache(sha256 or hash_archivo(ruta), nombre_lector, kwargs)
+    archivo_cache = cache_dir / clave[:2] / f'{clave}.parquet'
+    if archivo_cache.exists():
+        return pd.read_parquet(archivo_cache)
+
+    df = lector(ruta, **kwargs)
+    if all(isinstance(c, str) for c in df.columns):
+        archivo_tmp = archivo_cache.with_name(f'{clave}.{os.getpid()}.tmp')
+        try:
+            archivo_cache.parent.mkdir(parents=True, exist_ok=True)
+            df.to_parquet(archivo_tmp)
+            os.replace(archivo_tmp, archivo_cache)
+        except Exception:
+            # Tipos mixtos u otros casos no representables: se sirve sin cache
+            if archivo_tmp.exists():
+                archivo_tmp.unlink()
+    return df
+
+
+def _leer_primera_tabla_html(ruta, **kwargs):
+    return pd.read_html(ruta, **kwargs)[0]
+
+
+def leer_html_cacheado(ruta, sha256=None, **kwargs):
+    """Primera tabla de una exportación HTML (.xls de SAP), con cache"""
+    return leer_con_cache(ruta, _leer_primera_tabla_html, 'read_html[0]', sha256=sha256, **kwargs)
+
+
+def leer_excel_cacheado(ruta, sha256=None, **kwargs):
+    """Workbook Excel leído con pd.read_excel, con cache"""
+    return leer_con_cache(ruta, pd.read_excel, 'read_excel', sha256=sha256, **kwargs)
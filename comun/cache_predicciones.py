@@ -0,0 +1,131 @@
+"""
+CACHE DE PREDICCIONES
+=====================
+
+Memoización de predicciones de ganancia por fila. En una corrida de vigentes
+todos los pabellones de una crianza comparten mes_carga y
+kilos_recibidos_percapita, y muchos también densidad, sexo y tipo de
+construcción, así que el mismo caso se puntúa varias veces.
+
+CachePredicciones.predecir:
+
+1. Agrupa las filas idénticas (groupby().ngroup()) y puntúa cada caso una vez
+2. Busca cada caso en un LRU acotado con clave (huella del modelo, variables)
+3. Solo los casos nuevos van al modelo; el resultado se devuelve en el orden
+   original de las filas
+
+La huella del modelo en la clave permite compartir un mismo cache entre
+predictores de modelos distintos sin mezclar resultados.
+"""
+
+from collections import OrderedDict
+import threading
+
+import numpy as np
+
+
+CAPACIDAD_POR_DEFECTO = 100_000
+
+
+class CachePredicciones:
+    """
+    LRU acotado de predicciones por caso
+
+    Attributes:
+        aciertos: Casos distintos resueltos desde el cache
+        fallos: Casos distintos que hubo que puntuar
+        duplicados: Filas repetidas dentro de un mismo lote (no se puntúan de nuevo)
+    """
+
+    def __init__(self, capacidad=CAPACIDAD_POR_DEFECTO):
+        self.capacidad = capacidad
+        self._valores = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.duplicados = 0
+
+    def __len__(self):
+        return len(self._valores)
+
+    def estadisticas(self):
+        """Contadores del cache como dict"""
+        consultas = self.aciertos + self.fallos
+        return {
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'duplicados': self.duplicados,
+            'tasa_aciertos': self.aciertos / consultas if consultas else 0.0,
+            'tamano': len(self._valores),
+            'capacidad': self.capacidad,
+        }
+
+    def limpiar(self):
+        """Vaciar el cache y reiniciar los contadores"""
+        with self._lock:
+            self._valores.clear()
+            self.aciertos = self.fallos = self.duplicados = 0
+
+    def predecir(self, datos, columnas, huella, funcion_prediccion):
+        """
+        Predicciones por fila reutilizando casos ya puntuados
+
+        Args:
+            datos: DataFrame con las columnas del modelo
+            columnas: Variables que identifican un caso
+            huella: Identificador del modelo (p.ej. sha256 del .pkl)
+            funcion_prediccion: callable(DataFrame) -> array, para los casos nuevos
+
+        Returns:
+            np.ndarray con una predicción por fila de datos, en el mismo orden
+        """
+        resultado = np.empty(len(datos))
+        if len(datos) == 0:
+            return resultado
+
+        # Filas con nulos no se memorizan (NaN no sirve como clave)
+        nulos = datos[columnas].isna().any(axis=1).to_numpy()
+        if nulos.any():
+            resultado[nulos] = funcion_prediccion(datos[nulos])
+            if nulos.all():
+                return resultado
+            validos = datos[~nulos]
+        else:
+            validos = datos
+
+        grupo = validos.groupby(columnas, sort=False).ngroup().to_numpy()
+        _, primeras = np.unique(grupo, return_index=True)
+        unicos = validos.iloc[primeras]
+        claves = [(huella,) + fila for fila in zip(*(unicos[c].tolist() for c in columnas))]
+
+        valores = np.empty(len(claves))
+        faltantes = []
+        with self._lock:
+            for i, clave in enumerate(claves):
+                valor = self._valores.get(clave)
+                if valor is None:
+                    faltantes.append(i)
+                else:
+                    self._valores.move_to_end(clave)
+                    valores[i] = valor
+            self.aciertos += len(claves) - len(faltantes)
+            self.fallos += len(faltantes)
+            self.duplicados += len(validos) - len(claves)
+
+        if faltantes:
+            valores[faltantes] = funcion_prediccion(unicos.iloc[faltantes])
+            with self._lock:
+                for i in faltantes:
+                    self._valores[claves[i]] = float(valores[i])
+                while len(self._valores) > self.capacidad:
+                    self._valores.popitem(last=False)
+
+        if nulos.any():
+            resultado[~nulos] = valores[grupo]
+        else:
+            resultado = valores[grupo]
+        return resultado
+
+
+# Cache compartido por los predictores del proceso
+CACHE_PREDICCIONES = CachePredicciones()
@@ -0,0 +1,356 @@
+"""
+GRILLA DE PREDICCIÓN
+====================
+
+Tabla precalculada de ganancia para el espacio de entrada de los modelos de
+producción:
+
+    mes_carga (12) x sexo (2) x tipoConstruccion (3) x kilos (K) x densidad (M)
+
+Los ejes categóricos se indexan directo y los numéricos se interpolan
+bilinealmente. Como densidad_categoria cambia en 13, 15 y 20 pollos/m2 (pd.cut
+cerrado a la derecha), el eje de densidad se arma por tramos: cada tramo tiene
+sus propios nodos y su borde izquierdo se evalúa justo por encima del corte,
+así la interpolación nunca mezcla dos categorías.
+
+La grilla se construye con el modelo real y se valida contra él en puntos al
+azar; si el error máximo supera la cota se refina la resolución. Se guarda
+junto al modelo como <modelo>_grilla.npz con la huella del .pkl, de modo que
+un modelo reentrenado invalida la grilla.
+
+Uso:
+    python -m comun.grilla_prediccion <ruta_modelo_sin_pkl> [--paso-kilos 0.1] [--paso-densidad 0.25] [--error-max 0.05] [--rango-densidad 9 50]
+    python -m comun.grilla_prediccion --verificar-tramos
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from comun.scorer_compilado import huella_modelo
+from comun.transformacion_features import CORTES_DENSIDAD  # cortes de densidad_categoria
+
+
+MESES = np.arange(1, 13)
+SEXOS = ['HEMBRA', 'MACHO']
+TIPOS_CONSTRUCCION = ['Tradicional', 'Black Out', 'Transversal']
+RANGO_KILOS = (1.0, 6.0)
+RANGO_DENSIDAD = (9.0, 50.0)
+
+# Desplazamiento para evaluar el borde izquierdo de un tramo dentro del tramo
+_EPSILON_CORTE = 1e-9
+
+
+def ruta_grilla(modelo_path):
+    """Archivo de la grilla precalculada de un modelo (ruta sin .pkl)"""
+    return Path(f'{modelo_path}_grilla.npz')
+
+
+def _nodos_uniformes(inicio, fin, paso):
+    """Nodos equiespaciados que cubren [inicio, fin] con paso a lo más 'paso'"""
+    n = max(2, int(np.ceil(round((fin - inicio) / paso, 9))) + 1)
+    return np.linspace(inicio, fin, n)
+
+
+def _cortes_internos(rango, cortes):
+    """Cortes estrictamente dentro del rango: los bordes entre tramos"""
+    return [c for c in cortes if rango[0] < c < rango[1]]
+
+
+def _tramos_densidad(rango, cortes):
+    """Límites (inicio, fin) de cada tramo de densidad dentro del rango"""
+    bordes = [rango[0]] + _cortes_internos(rango, cortes) + [rango[1]]
+    return list(zip(bordes[:-1], bordes[1:]))
+
+
+class GrillaPrediccion:
+    """
+    Predicciones precalculadas con interpolación bilineal en kilos y densidad
+
+    Attributes:
+        valores: np.ndarray (mes, sexo, tipo, kilos, densidad)
+        densidades: Nodos de densidad de todos los tramos concatenados (los
+            cortes aparecen dos veces, uno por tramo)
+        tramos: np.ndarray (n_tramos, 2) con el primer y último índice de cada tramo
+        cortes: Bordes entre tramos (n_tramos - 1), solo los que caen dentro del rango
+    """
+
+    def __init__(self, kilos, densidades, tramos, cortes, valores, huella=None, error_max=None, error_medido=None):
+        self.kilos = np.asarray(kilos, dtype=float)
+        self.densidades = np.asarray(densidades, dtype=float)
+        self.tramos = np.asarray(tramos, dtype=np.int64)
+        self.cortes = np.asarray(cortes, dtype=float)
+        if len(self.cortes) != len(self.tramos) - 1:
+            raise ValueError(f"Se esperaban {len(self.tramos) - 1} cortes entre {len(self.tramos)} tramos, hay {len(self.cortes)}")
+        self.valores = np.asarray(valores, dtype=float)
+        self.huella = huella
+        self.error_max = error_max
+        self.error_medido = error_medido
+        self._sexos = pd.Index(SEXOS)
+        self._tipos = pd.Index(TIPOS_CONSTRUCCION)
+
+    @property
+    def rango_kilos(self):
+        return self.kilos[0], self.kilos[-1]
+
+    @property
+    def rango_densidad(self):
+        return self.densidades[0], self.densidades[-1]
+
+    def predecir(self, datos):
+        """
+        Ganancia interpolada para cada fila
+
+        Args:
+            datos: DataFrame con las cinco variables base del modelo
+
+        Returns:
+            np.ndarray con NaN en las filas fuera de la grilla (mes no entero,
+            categoría desconocida o numérica fuera de rango), que deben ir al modelo
+        """
+        mes = datos['mes_carga'].to_numpy(dtype=float)
+        kilos = datos['kilos_recibidos_percapita'].to_numpy(dtype=float)
+        densidad = datos['densidad_pollos_m2'].to_numpy(dtype=float)
+        i_sexo = self._sexos.get_indexer(datos['sexo'])
+        i_tipo = self._tipos.get_indexer(datos['tipoConstruccion'])
+
+        k_min, k_max = self.rango_kilos
+        d_min, d_max = self.rango_densidad
+        dentro = (
+            (mes == np.round(mes)) & (mes >= 1) & (mes <= 12)
+            & (i_sexo >= 0) & (i_tipo >= 0)
+            & (kilos >= k_min) & (kilos <= k_max)
+            & (densidad >= d_min) & (densidad <= d_max)
+        )
+        resultado = np.full(len(mes), np.nan)
+        if not dentro.any():
+            return resultado
+
+        mes, kilos, densidad = mes[dentro], kilos[dentro], densidad[dentro]
+        i_mes = mes.astype(np.int64) - 1
+        i_sexo, i_tipo = i_sexo[dentro], i_tipo[dentro]
+
+        # Kilos: nodos uniformes
+        paso_kilos = self.kilos[1] - self.kilos[0]
+        i_k = np.clip(((kilos - k_min) // paso_kilos).astype(np.int64), 0, len(self.kilos) - 2)
+        f_k = (kilos - self.kilos[i_k]) / paso_kilos
+
+        # Densidad: tramo cerrado a la derecha como pd.cut, nodos uniformes dentro del tramo
+        tramo = np.searchsorted(self.cortes, densidad, side='left')
+        primero, ultimo = self.tramos[tramo, 0], self.tramos[tramo, 1]
+        paso_tramo = (self.densidades[ultimo] - self.densidades[primero]) / (ultimo - primero)
+        i_d = primero + np.clip(((densidad - self.densidades[primero]) // paso_tramo).astype(np.int64), 0, ultimo - primero - 1)
+        f_d = (densidad - self.densidades[i_d]) / (self.densidades[i_d + 1] - self.densidades[i_d])
+
+        # Índices planos de las cuatro esquinas de la celda
+        n_kilos, n_densidad = self.valores.shape[3:]
+        plano = self.valores.reshape(-1)
+        base = ((i_mes * self.valores.shape[1] + i_sexo) * self.valores.shape[2] + i_tipo) * n_kilos * n_densidad
+        esquina = base + i_k * n_densidad + i_d
+        resultado[dentro] = (
+            (1 - f_k) * (1 - f_d) * plano[esquina]
+            + f_k * (1 - f_d) * plano[esquina + n_densidad]
+            + (1 - f_k) * f_d * plano[esquina + 1]
+            + f_k * f_d * plano[esquina + n_densidad + 1]
+        )
+        return resultado
+
+    def guardar(self, ruta):
+        np.savez_compressed(
+            ruta, kilos=self.kilos, densidades=self.densidades, tramos=self.tramos, cortes=self.cortes,
+            valores=self.valores, huella=np.array(self.huella or ''),
+            error_max=np.array(np.nan if self.error_max is None else self.error_max),
+            error_medido=np.array(np.nan if self.error_medido is None else self.error_medido),
+        )
+
+    @staticmethod
+    def cargar(ruta):
+        with np.load(ruta) as archivo:
+            return GrillaPrediccion(
+                archivo['kilos'], archivo['densidades'], archivo['tramos'], archivo['cortes'], archivo['valores'],
+                huella=str(archivo['huella']) or None,
+                error_max=float(archivo['error_max']), error_medido=float(archivo['error_medido']),
+            )
+
+
+def _casos_grilla(kilos, densidades_evaluacion):
+    """DataFrame con todas las combinaciones en el orden de GrillaPrediccion.valores"""
+    ejes = np.meshgrid(MESES, np.arange(len(SEXOS)), np.arange(len(TIPOS_CONSTRUCCION)), kilos, densidades_evaluacion, indexing='ij')
+    return pd.DataFrame({
+        'mes_carga': ejes[0].ravel(),
+        'sexo': np.array(SEXOS)[ejes[1].ravel()],
+        'kilos_recibidos_percapita': ejes[3].ravel(),
+        'tipoConstruccion': np.array(TIPOS_CONSTRUCCION)[ejes[2].ravel()],
+        'densidad_pollos_m2': ejes[4].ravel(),
+    })
+
+
+def _casos_validacion(n, rango_kilos, rango_densidad, semilla=0):
+    """Casos al azar dentro de la grilla para medir el error de interpolación"""
+    rng = np.random.default_rng(semilla)
+    return pd.DataFrame({
+        'mes_carga': rng.integers(1, 13, n),
+        'sexo': rng.choice(SEXOS, n),
+        'kilos_recibidos_percapita': rng.uniform(*rango_kilos, n),
+        'tipoConstruccion': rng.choice(TIPOS_CONSTRUCCION, n),
+        'densidad_pollos_m2': rng.uniform(*rango_densidad, n),
+    })
+
+
+def _predecir_por_bloques(funcion_prediccion, casos, tamano_bloque=100_000):
+    """Evaluar el modelo por bloques para acotar la memoria en grillas finas"""
+    return np.concatenate([
+        np.asarray(funcion_prediccion(casos.iloc[i:i + tamano_bloque]), dtype=float)
+        for i in range(0, len(casos), tamano_bloque)
+    ])
+
+
+def construir_grilla(funcion_prediccion, paso_kilos=0.1, paso_densidad=0.25, error_max=0.05,
+                     refinamientos=2, rango_kilos=RANGO_KILOS, rango_densidad=RANGO_DENSIDAD,
+                     cortes=CORTES_DENSIDAD, n_validacion=20_000, huella=None):
+    """
+    Construir y validar la grilla con el modelo real
+
+    Args:
+        funcion_prediccion: callable(DataFrame con las cinco variables base) -> array de ganancias
+        paso_kilos, paso_densidad: Resolución inicial de los ejes numéricos
+        error_max: Cota del error absoluto máximo (gramos) contra el modelo
+        refinamientos: Veces que se puede reducir el paso a la mitad para cumplir la cota
+        n_validacion: Casos al azar usados para medir el error
+
+    Returns:
+        GrillaPrediccion
+
+    Raises:
+        ValueError: si después de los refinamientos el error sigue sobre la cota
+    """
+    validacion = _casos_validacion(n_validacion, rango_kilos, rango_densidad)
+    esperado = _predecir_por_bloques(funcion_prediccion, validacion)
+
+    for intento in range(refinamientos + 1):
+        kilos = _nodos_uniformes(*rango_kilos, paso_kilos)
+        densidades, evaluacion, tramos = [], [], []
+        for nro, (inicio, fin) in enumerate(_tramos_densidad(rango_densidad, cortes)):
+            nodos = _nodos_uniformes(inicio, fin, paso_densidad)
+            tramos.append((len(densidades), len(densidades) + len(nodos) - 1))
+            densidades.extend(nodos)
+            # El borde izquierdo de los tramos después del primero pertenece al tramo anterior en pd.cut
+            nodos_evaluacion = nodos.copy()
+            if nro > 0:
+                nodos_evaluacion[0] += _EPSILON_CORTE
+            evaluacion.extend(nodos_evaluacion)
+
+        casos = _casos_grilla(kilos, np.array(evaluacion))
+        forma = (len(MESES), len(SEXOS), len(TIPOS_CONSTRUCCION), len(kilos), len(densidades))
+        valores = _predecir_por_bloques(funcion_prediccion, casos).reshape(forma)
+
+        grilla = GrillaPrediccion(kilos, densidades, tramos, _cortes_internos(rango_densidad, cortes), valores, huella=huella, error_max=error_max)
+        error = float(np.max(np.abs(grilla.predecir(validacion) - esperado)))
+        grilla.error_medido = error
+        print(f"   • Grilla {len(kilos)}x{len(densidades)} nodos numéricos ({valores.size:,} valores): error máximo {error:.4f}")
+        if error <= error_max:
+            return grilla
+        paso_kilos, paso_densidad = paso_kilos / 2, paso_densidad / 2
+
+    raise ValueError(f"La grilla no alcanza la cota de error {error_max} (error {error:.4f} con la resolución más fina); "
+                     f"subir --error-max o partir con pasos menores")
+
+
+def cargar_grilla(modelo_path, verificar_huella=True):
+    """
+    Grilla del modelo si existe y corresponde a la versión actual del modelo
+
+    Returns:
+        GrillaPrediccion o None
+    """
+    ruta = ruta_grilla(modelo_path)
+    if not ruta.exists():
+        return None
+    grilla = GrillaPrediccion.cargar(ruta)
+    if verificar_huella and grilla.huella != huella_modelo(modelo_path):
+        print(f"⚠️  {ruta.name} fue construida con otra versión del modelo; se ignora")
+        return None
+    return grilla
+
+
+def _prediccion_por_tramos(df):
+    """Función lineal por tramo con saltos en los cortes de densidad_categoria: la grilla la reproduce exacta"""
+    from comun.transformacion_features import preparar_features
+
+    features = preparar_features(df)
+    return (
+        features['mes_carga'].to_numpy(dtype=float)
+        + (features['sexo'] == 'MACHO').to_numpy() * 2.0
+        + pd.Index(TIPOS_CONSTRUCCION).get_indexer(features['tipoConstruccion']) * 0.5
+        + 3.0 * features['kilos_recibidos_percapita'].to_numpy(dtype=float)
+        + 0.2 * features['densidad_pollos_m2'].to_numpy(dtype=float)
+        + 5.0 * features['densidad_categoria'].cat.codes.to_numpy()
+    )
+
+
+def verificar_tramos(rangos=((9.0, 50.0), (14.0, 50.0), (9.0, 14.5), (16.0, 19.0), (5.0, 50.0))):
+    """
+    Construir grillas con rangos de densidad que dejan cortes fuera y comprobar
+    que la interpolación respeta los tramos de densidad_categoria
+
+    Returns:
+        True si en todos los rangos la grilla reproduce _prediccion_por_tramos
+
+    Raises:
+        ValueError: si algún rango no alcanza la cota de error
+    """
+    for rango in rangos:
+        grilla = construir_grilla(_prediccion_por_tramos, paso_densidad=0.5, error_max=1e-6, refinamientos=0,
+                                  rango_densidad=rango, n_validacion=5_000)
+        print(f"   ✓ Densidad {rango}: {len(grilla.tramos)} tramos, cortes {[float(c) for c in grilla.cortes]}")
+    return True
+
+
+def _funcion_prediccion_modelo(modelo_path):
+    """Predicción con el scorer compilado si existe, si no con PyCaret"""
+    from comun.registro_modelos import cargar_modelo
+    from comun.scorer_compilado import ScorerGanancia
+    from comun.transformacion_features import preparar_features
+
+    modelo = cargar_modelo(modelo_path)
+    if isinstance(modelo, ScorerGanancia):
+        return lambda df: modelo.predecir(preparar_features(df))
+
+    from pycaret.regression import predict_model
+    return lambda df: predict_model(modelo, data=preparar_features(df), verbose=False)['prediction_label'].to_numpy(dtype=float)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from comun.grilla_prediccion import construir_grilla, ruta_grilla, verificar_tramos, _funcion_prediccion_modelo
+
+    parser = argparse.ArgumentParser(description='Precalcular la grilla de predicción de un modelo')
+    parser.add_argument('modelo_path', nargs='?', help='Ruta del modelo sin .pkl (p.ej. analisis/modelo03/modelo_limpio_final)')
+    parser.add_argument('--paso-kilos', type=float, default=0.1)
+    parser.add_argument('--paso-densidad', type=float, default=0.25)
+    parser.add_argument('--error-max', type=float, default=0.05, help='Error absoluto máximo aceptado en gramos')
+    parser.add_argument('--refinamientos', type=int, default=2)
+    parser.add_argument('--rango-densidad', type=float, nargs=2, default=RANGO_DENSIDAD, metavar=('MIN', 'MAX'))
+    parser.add_argument('--verificar-tramos', action='store_true',
+                        help='Comprobar los tramos de densidad con una función sintética y varios rangos (sin modelo)')
+    args = parser.parse_args()
+
+    if args.verificar_tramos:
+        print("🔍 Verificando tramos de densidad con rangos no estándar...")
+        verificar_tramos()
+        print("✅ Tramos OK")
+        raise SystemExit(0)
+    if args.modelo_path is None:
+        parser.error('se requiere modelo_path (o --verificar-tramos)')
+
+    print(f"🧮 Construyendo grilla para {args.modelo_path}...")
+    grilla = construir_grilla(
+        _funcion_prediccion_modelo(args.modelo_path), paso_kilos=args.paso_kilos, paso_densidad=args.paso_densidad,
+        error_max=args.error_max, refinamientos=args.refinamientos, rango_densidad=tuple(args.rango_densidad),
+        huella=huella_modelo(args.modelo_path),
+    )
+    destino = ruta_grilla(args.modelo_path)
+    grilla.guardar(destino)
+    print(f"✓ Grilla guardada: {destino} (error máximo {grilla.error_medido:.4f} ≤ {args.error_max})")
@@ -0,0 +1,214 @@
+"""
+MAESTROS DE PABELLONES Y SECTORES
+=================================
+
+Acceso a las tablas maestras de ta_ags_pollos con un engine por URL reutilizado
+(pool de conexiones) y consultas que piden solo las columnas necesarias.
+
+Cada tabla consultada se guarda en un snapshot SQLite local junto con la fecha
+de descarga y el máximo updated_at visto. Mientras el snapshot esté dentro del
+TTL se lee sin tocar la base; al vencer se consulta solo MAX(updated_at) y la
+tabla se vuelve a descargar únicamente si cambió. Si la base no responde (o se
+pide modo offline) se usa el snapshot existente.
+
+La URL SQLAlchemy de la base (con sus credenciales) no vive en el repositorio:
+se toma de F35_MAESTROS_URL o, si no está definida, de la primera línea de
+ejecucion_vigente/data/maestros_url.txt (local, fuera de git). Para pruebas
+sirve sqlite:///maestros_prueba.db. La ubicación del snapshot se cambia con
+F35_MAESTROS_SNAPSHOT.
+"""
+
+from datetime import datetime, timedelta
+from pathlib import Path
+import sqlite3
+import os
+
+import pandas as pd
+import sqlalchemy
+
+
+ARCHIVO_URL_MAESTROS = Path(__file__).resolve().parent.parent / 'ejecucion_vigente' / 'data' / 'maestros_url.txt'
+SNAPSHOT_PATH = Path(os.environ.get('F35_MAESTROS_SNAPSHOT', Path(__file__).resolve().parent.parent / 'ejecucion_vigente' / 'data' / 'maestros.sqlite'))
+TTL_SNAPSHOT = timedelta(hours=24)
+COLUMNA_ACTUALIZACION = 'updated_at'
+
+COLUMNAS_MAESTROS = {
+    'maestrospabellones': ['nombreSector', 'numero', 'tipoConstruccion', 'areaUtil', 'sistemaVentilacion'],
+    'maestrossectorescrianza': ['nombre', 'zonaGeografica'],
+}
+
+_ENGINES = {}
+_MEMORIA = {}
+
+
+def url_maestros():
+    """
+    URL de la base de maestros: F35_MAESTROS_URL o ARCHIVO_URL_MAESTROS
+
+    Raises:
+        RuntimeError: si no hay ninguna de las dos
+    """
+    url = os.environ.get('F35_MAESTROS_URL')
+    if not url and ARCHIVO_URL_MAESTROS.exists():
+        url = next(iter(ARCHIVO_URL_MAESTROS.read_text(encoding='utf-8').split()), None)
+    if not url:
+        raise RuntimeError(
+            "❌ Falta la URL de la base de maestros: definir F35_MAESTROS_URL "
+            "(p.ej. mysql+pymysql://<usuario>:<clave>@<servidor>/ta_ags_pollos) "
+            f"o escribirla en {ARCHIVO_URL_MAESTROS} (no se versiona). "
+            "Con F35_MAESTROS_OFFLINE=1 se usa solo el snapshot local."
+        )
+    return url
+
+
+def obtener_engine(url=None):
+    """Engine con pool de conexiones, uno por URL y por proceso"""
+    url = url or url_maestros()
+    if url not in _ENGINES:
+        connect_args = {'ssl': {'ssl': True}} if url.startswith('mysql') else {}
+        _ENGINES[url] = sqlalchemy.create_engine(url, connect_args=connect_args, pool_pre_ping=True, pool_recycle=3600)
+    return _ENGINES[url]
+
+
+def cerrar_engines():
+    """Liberar los pools abiertos"""
+    for engine in _ENGINES.values():
+        engine.dispose()
+    _ENGINES.clear()
+
+
+def _consulta_columnas(tabla, columnas):
+    """SELECT de las columnas indicadas con identificadores citados según el dialecto"""
+    return sqlalchemy.select(*[sqlalchemy.column(c) for c in columnas]).select_from(sqlalchemy.table(tabla))
+
+
+def _max_actualizacion(engine, tabla):
+    """MAX(updated_at) de la tabla como texto, o None si la tabla no tiene esa columna"""
+    consulta = sqlalchemy.select(sqlalchemy.func.max(sqlalchemy.column(COLUMNA_ACTUALIZACION))).select_from(sqlalchemy.table(tabla))
+    try:
+        with engine.connect() as conexion:
+            valor = conexion.execute(consulta).scalar()
+    except sqlalchemy.exc.ProgrammingError:
+        return None
+    except sqlalchemy.exc.OperationalError as e:
+        # SQLite informa la columna inexistente como OperationalError
+        if 'no such column' in str(e):
+            return None
+        raise
+    return None if valor is None else str(valor)
+
+
+def _leer_meta(conexion, tabla):
+    conexion.execute('CREATE TABLE IF NOT EXISTS _snapshot_meta (tabla TEXT PRIMARY KEY, columnas TEXT, descargado_en TEXT, max_actualizacion TEXT)')
+    fila = conexion.execute('SELECT columnas, descargado_en, max_actualizacion FROM _snapshot_meta WHERE tabla = ?', (tabla,)).fetchone()
+    if fila is None:
+        return None
+    return {'columnas': fila[0].split(','), 'descargado_en': datetime.fromisoformat(fila[1]), 'max_actualizacion': fila[2]}
+
+
+def _guardar_meta(conexion, tabla, columnas, max_actualizacion):
+    conexion.execute('INSERT OR REPLACE INTO _snapshot_meta VALUES (?, ?, ?, ?)', (tabla, ','.join(columnas), datetime.now().isoformat(), max_actualizacion))
+
+
+def leer_maestro(tabla, columnas=None, ttl=TTL_SNAPSHOT, url=None, snapshot_path=None, offline=None):
+    """
+    Leer una tabla maestra pasando por el snapshot local
+
+    Args:
+        tabla: Nombre de la tabla en ta_ags_pollos
+        columnas: Columnas a leer (por defecto COLUMNAS_MAESTROS[tabla])
+        ttl: Antigüedad máxima del snapshot antes de revisar la base
+        url: URL SQLAlchemy de la base (por defecto url_maestros())
+        snapshot_path: Archivo SQLite del snapshot (por defecto SNAPSHOT_PATH)
+        offline: No consultar la base; por defecto F35_MAESTROS_OFFLINE=1
+
+    Returns:
+        DataFrame con las columnas pedidas
+    """
+    columnas = list(columnas or COLUMNAS_MAESTROS[tabla])
+    snapshot_path = Path(snapshot_path or SNAPSHOT_PATH)
+    if offline is None:
+        offline = os.environ.get('F35_MAESTROS_OFFLINE') == '1'
+
+    clave = (str(snapshot_path), tabla, tuple(columnas))
+    if clave in _MEMORIA:
+        return _MEMORIA[clave].copy()
+
+    snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+    with sqlite3.connect(snapshot_path) as conexion:
+        meta = _leer_meta(conexion, tabla)
+        cubre_columnas = meta is not None and set(columnas) <= set(meta['columnas'])
+        vigente = cubre_columnas and datetime.now() - meta['descargado_en'] <= ttl
+
+        if not vigente and not offline:
+            try:
+                engine = obtener_engine(url)
+                max_actualizacion = _max_actualizacion(engine, tabla)
+                if cubre_columnas and max_actualizacion is not None and max_actualizacion == meta['max_actualizacion']:
+                    # Sin cambios en la base: solo se renueva la fecha del snapshot
+                    _guardar_meta(conexion, tabla, meta['columnas'], max_actualizacion)
+                else:
+                    columnas_snapshot = list(dict.fromkeys((meta['columnas'] if meta else []) + columnas))
+                    df_tabla = pd.read_sql(_consulta_columnas(tabla, columnas_snapshot), engine)
+                    df_tabla.to_sql(tabla, conexion, if_exists='replace', index=False)
+                    _guardar_meta(conexion, tabla, columnas_snapshot, max_actualizacion)
+                cubre_columnas = True
+            except sqlalchemy.exc.SQLAlchemyError as e:
+                if not cubre_columnas:
+                    raise
+                print(f"Base de maestros no disponible ({type(e).__name__}), se usa el snapshot del {meta['descargado_en']:%Y-%m-%d %H:%M}")
+
+        if not cubre_columnas:
+            raise FileNotFoundError(f"No hay snapshot de {tabla} con las columnas {columnas} en {snapshot_path}")
+
+        lista_columnas = ', '.join(f'"{c}"' for c in columnas)
+        df = pd.read_sql(f'SELECT {lista_columnas} FROM "{tabla}"', conexion)
+
+    _MEMORIA[clave] = df
+    return df.copy()
+
+
+def verificar(directorio=None):
+    """
+    Verificación contra una base SQLite de prueba: TTL, refresco por
+    updated_at, proyección de columnas y modo offline
+
+    Uso: python -m comun.maestros
+    """
+    import tempfile
+
+    directorio = Path(directorio or tempfile.mkdtemp())
+    url = f"sqlite:///{directorio / 'ta_ags_pollos.db'}"
+    snapshot = directorio / 'snapshot.sqlite'
+    engine = obtener_engine(url)
+    with engine.begin() as conexion:
+        conexion.exec_driver_sql('CREATE TABLE maestrospabellones (nombreSector TEXT, numero INTEGER, tipoConstruccion TEXT, areaUtil REAL, sistemaVentilacion TEXT, observaciones TEXT, updated_at TEXT)')
+        conexion.exec_driver_sql("INSERT INTO maestrospabellones VALUES ('La Mina', 1, 'Black Out', 1200.5, 'Túnel', 'x', '2025-01-01'), ('La Mina', 2, NULL, 980.0, 'Lateral', 'y', '2025-01-01')")
+
+    df = leer_maestro('maestrospabellones', url=url, snapshot_path=snapshot)
+    assert list(df.columns) == COLUMNAS_MAESTROS['maestrospabellones'] and len(df) == 2
+
+    # Dentro del TTL no se consulta la base
+    _MEMORIA.clear()
+    with engine.begin() as conexion:
+        conexion.exec_driver_sql("UPDATE maestrospabellones SET areaUtil = 1000.0, updated_at = '2025-02-01' WHERE numero = 2")
+    assert leer_maestro('maestrospabellones', url=url, snapshot_path=snapshot)['areaUtil'].tolist() == [1200.5, 980.0]
+
+    # Con el TTL vencido y updated_at distinto se vuelve a descargar
+    _MEMORIA.clear()
+    assert leer_maestro('maestrospabellones', ttl=timedelta(0), url=url, snapshot_path=snapshot)['areaUtil'].tolist() == [1200.5, 1000.0]
+
+    # Sin la base disponible se sirve el snapshot
+    _MEMORIA.clear()
+    url_caida = f"sqlite:///{directorio / 'no_existe' / 'db.db'}"
+    assert len(leer_maestro('maestrospabellones', ttl=timedelta(0), url=url_caida, snapshot_path=snapshot)) == 2
+    _MEMORIA.clear()
+    assert len(leer_maestro('maestrospabellones', url=url_caida, snapshot_path=snapshot, offline=True)) == 2
+
+    cerrar_engines()
+    _MEMORIA.clear()
+    print("✅ Maestros: snapshot, TTL, updated_at y modo offline verificados")
+
+
+if __name__ == '__main__':
+    verificar()
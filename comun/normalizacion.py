@@ -0,0 +1,53 @@
+"""
+NORMALIZACIÓN DE NOMBRES
+========================
+
+Normalización de nombres de sector (y otros textos de las fuentes SAP y de
+los maestros) compartida por la ingesta, la consolidación y los compilados.
+
+uniformar_strings está memoizada: los nombres de sector son unas pocas
+decenas, así que cada uno pasa por unicodedata y las expresiones regulares
+una sola vez por proceso. normalizar_serie normaliza los valores distintos de
+una columna y los vuelve a expandir por código, de modo que el costo depende
+de la cantidad de nombres distintos y no de la cantidad de filas.
+"""
+
+from functools import lru_cache
+import unicodedata
+import re
+
+import numpy as np
+import pandas as pd
+
+
+@lru_cache(maxsize=4096)
+def uniformar_strings(input_str, remove_accents=True):
+    nfkd_form = unicodedata.normalize('NFKD', input_str)
+    s = ''.join(c for c in nfkd_form if not unicodedata.combining(c))
+    s = re.sub(r'[^\w\s]', '', s)
+    s = re.sub(r'\s+', ' ', s).strip()
+    return s.lower()
+
+
+def normalizar_serie(serie):
+    """
+    Aplicar uniformar_strings a una columna trabajando sobre sus valores distintos
+
+    Acepta columnas object o categóricas (en ese caso usa directamente sus
+    categorías y códigos). Los nulos se conservan como NaN.
+
+    Args:
+        serie: pd.Series con nombres
+
+    Returns:
+        pd.Series (object) con los nombres normalizados, mismo índice y nombre
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        codigos = serie.cat.codes.to_numpy()
+        unicos = serie.cat.categories
+    else:
+        codigos, unicos = pd.factorize(serie)
+
+    normalizados = np.array([uniformar_strings(valor) for valor in unicos] + [np.nan], dtype=object)
+    # El código -1 (nulo) apunta al NaN agregado al final
+    return pd.Series(normalizados[codigos], index=serie.index, name=serie.name)
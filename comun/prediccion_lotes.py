@@ -0,0 +1,93 @@
+"""
+PREDICCIÓN DE LOTES POR BLOQUES
+===============================
+
+Puntuación de un CSV de cualquier tamaño con un PredictorGanancia
+(produccion01/03) leyéndolo y escribiéndolo por bloques, así la memoria no
+crece con el tamaño del archivo (re-puntuación de años de historia).
+
+Solo se leen las variables requeridas del predictor, con tipos explícitos
+(TIPOS_LECTURA). Las filas inválidas no detienen el proceso: quedan sin
+ganancia y con el motivo en error_validacion. La salida se escribe en un
+archivo temporal que se renombra al terminar.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+
+# Tipos de lectura de las variables base
+TIPOS_LECTURA = {
+    'mes_carga': 'float64',
+    'sexo': 'str',
+    'kilos_recibidos_percapita': 'float64',
+    'tipoConstruccion': 'str',
+    'densidad_pollos_m2': 'float64',
+}
+
+
+def predecir_csv_por_bloques(predictor, archivo_csv, archivo_salida, tamano_bloque=50_000):
+    """
+    Predecir un CSV por bloques y escribir el resultado en archivo_salida
+
+    Args:
+        predictor: PredictorGanancia (usa variables_requeridas y predecir)
+        archivo_csv: Ruta al archivo CSV
+        archivo_salida: Ruta del resultado
+        tamano_bloque: Filas por bloque
+
+    Returns:
+        dict con archivo_salida, filas, bloques, invalidas y resumen de la ganancia
+    """
+    variables = predictor.variables_requeridas
+    temporal = f'{archivo_salida}.parcial'
+    print(f"\n📂 Prediciendo por bloques de {tamano_bloque:,} filas: {archivo_csv}")
+
+    columnas = pd.read_csv(archivo_csv, nrows=0).columns
+    columnas_faltantes = set(variables) - set(columnas)
+    if columnas_faltantes:
+        raise ValueError(f"❌ Columnas faltantes en el CSV: {columnas_faltantes}")
+
+    filas = bloques = invalidas = 0
+    suma, minimo, maximo = 0.0, np.inf, -np.inf
+    try:
+        tipos = {c: TIPOS_LECTURA[c] for c in variables if c in TIPOS_LECTURA}
+        lector = pd.read_csv(archivo_csv, usecols=variables, dtype=tipos, chunksize=tamano_bloque)
+        for bloque in lector:
+            try:
+                resultado = predictor.predecir(bloque[variables], mostrar_detalles=False, omitir_invalidas=True)
+            except ValueError as e:
+                raise ValueError(f"Bloque {bloques + 1} (filas {filas + 1:,}-{filas + len(bloque):,}): {e}") from e
+            resultado.to_csv(temporal, mode='w' if bloques == 0 else 'a', header=bloques == 0, index=False)
+
+            ganancia = resultado['ganancia_predicha']
+            filas += len(resultado)
+            invalidas += int(ganancia.isna().sum())
+            bloques += 1
+            suma += ganancia.sum()
+            minimo, maximo = min(minimo, ganancia.min()), max(maximo, ganancia.max())
+            print(f"   • Bloque {bloques}: {filas:,} filas procesadas")
+        if bloques == 0:
+            pd.DataFrame(columns=variables + ['ganancia_predicha', 'error_validacion']).to_csv(temporal, index=False)
+        os.replace(temporal, archivo_salida)
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
+    resumen = {
+        'archivo_salida': archivo_salida,
+        'filas': filas,
+        'bloques': bloques,
+        'invalidas': invalidas,
+        'ganancia_promedio': float(suma / (filas - invalidas)) if filas > invalidas else None,
+        'ganancia_min': float(minimo) if filas > invalidas else None,
+        'ganancia_max': float(maximo) if filas > invalidas else None,
+    }
+    if invalidas:
+        print(f"\n⚠️  Filas inválidas sin predicción: {invalidas:,} (ver columna error_validacion)")
+    if filas > invalidas:
+        print(f"\n📈 Ganancia promedio: {resumen['ganancia_promedio']:.2f} gramos (rango {minimo:.2f} - {maximo:.2f})")
+    print(f"\n💾 Resultado guardado en: {archivo_salida}")
+    return resumen
@@ -0,0 +1,33 @@
+"""
+PREDICTORES DE PRODUCCIÓN
+=========================
+
+Carga de los PredictorGanancia de produccion/produccionXX por nombre de
+carpeta, compartida por el servicio HTTP (comun.servicio_prediccion) y la
+puntuación multimodelo (comun.puntuacion_multimodelo).
+"""
+
+from pathlib import Path
+import importlib.util
+
+
+RAIZ = Path(__file__).resolve().parents[1]
+
+
+def cargar_predictor(produccion, modelo_path=None, **kwargs):
+    """
+    Crear el PredictorGanancia de produccion/<produccion>/predictor.py
+
+    Args:
+        produccion: 'produccion01' o 'produccion03'
+        modelo_path: Ruta del modelo sin .pkl; por defecto el modelo registrado del
+            predictor (comun.registro_modelos)
+    """
+    directorio = RAIZ / 'produccion' / produccion
+    spec = importlib.util.spec_from_file_location(f'predictor_{produccion}', directorio / 'predictor.py')
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+
+    if modelo_path is not None:
+        modelo_path = str(Path(modelo_path).resolve())
+    return modulo.PredictorGanancia(modelo_path, **kwargs)
@@ -0,0 +1,207 @@
+"""
+PUNTUACIÓN MULTIMODELO
+======================
+
+Puntúa un mismo lote con varios predictores de producción (por defecto
+Producción 01 / Modelo 02 y Producción 03 / Modelo 03, ver
+produccion/COMPARACION_MODELOS.md) en una sola pasada:
+
+1. El lote se lee y valida una vez (una fila es válida si lo es para todos
+   los predictores)
+2. preparar_features se aplica una vez sobre las filas válidas
+3. Cada modelo puntúa en su propio hilo por el mismo camino que su predecir
+   (cache de predicciones, grilla precalculada y el modelo para las filas
+   fuera de la grilla), reutilizando las features del paso 2; los modelos se
+   cargan una vez por proceso (comun.registro_modelos)
+
+Así ganancia_<predictor> coincide con la ganancia_predicha del predictor.
+
+El resultado trae una columna ganancia_<predictor> por modelo y, si se dan
+pesos, ganancia_ensemble con el promedio ponderado.
+
+Las columnas de entrada son las mismas para todos los modelos: para comparar
+P01 (alimento hasta día 32) con P03 (hasta día 30) en una misma crianza,
+kilos_recibidos_percapita debe corresponder a lo que cada uno espera.
+
+Uso:
+    python -m comun.puntuacion_multimodelo <archivo.csv> [--pesos produccion01=0.5,produccion03=0.5] [--salida <csv>]
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from comun.predictores import cargar_predictor
+from comun.reportes import resumen_serie
+
+
+PRODUCCIONES = ['produccion01', 'produccion03']
+
+
+class PuntuadorMultimodelo:
+    """
+    Varios PredictorGanancia puntuando las mismas features
+
+    Args:
+        predictores: dict etiqueta -> PredictorGanancia, o lista de producciones
+            ('produccion01', ...) que se cargan con su modelo registrado
+        pesos: dict etiqueta -> peso para ganancia_ensemble (None = sin ensemble);
+            los pesos se normalizan a suma 1
+    """
+
+    def __init__(self, predictores=None, pesos=None):
+        if predictores is None or isinstance(predictores, (list, tuple)):
+            predictores = {produccion: cargar_predictor(produccion) for produccion in (predictores or PRODUCCIONES)}
+        if not predictores:
+            raise ValueError("Se requiere al menos un predictor")
+        self.predictores = dict(predictores)
+        self.pesos = self._normalizar_pesos(pesos) if pesos else None
+        self.variables_requeridas = list(dict.fromkeys(v for p in self.predictores.values() for v in p.variables_requeridas))
+
+    def _normalizar_pesos(self, pesos):
+        desconocidos = set(pesos) - set(self.predictores)
+        if desconocidos:
+            raise ValueError(f"Pesos para predictores inexistentes: {desconocidos}. Predictores: {list(self.predictores)}")
+        total = sum(pesos.values())
+        if total <= 0 or any(peso < 0 for peso in pesos.values()):
+            raise ValueError(f"Los pesos deben ser no negativos y sumar más de 0: {pesos}")
+        return {etiqueta: peso / total for etiqueta, peso in pesos.items()}
+
+    def columna(self, etiqueta):
+        """Nombre de la columna de predicción de un predictor"""
+        return f'ganancia_{etiqueta}'
+
+    def cargar_modelos(self):
+        """Cargar todos los modelos ahora (en paralelo) y no en la primera predicción"""
+        with ThreadPoolExecutor(max_workers=len(self.predictores)) as executor:
+            list(executor.map(lambda p: p.modelo, self.predictores.values()))
+
+    def predecir(self, datos, mostrar_detalles=True):
+        """
+        Predicciones de todos los modelos para el mismo lote
+
+        Args:
+            datos: dict o DataFrame con las variables base
+            mostrar_detalles: Si mostrar el resumen por modelo
+
+        Returns:
+            DataFrame con datos + ganancia_<predictor> por modelo (+ ganancia_ensemble
+            si hay pesos) + error_validacion; las filas inválidas quedan en NaN
+        """
+        if isinstance(datos, dict):
+            datos = pd.DataFrame([datos])
+
+        # Validación: una fila debe ser válida para todos los predictores
+        validaciones = [p.validar_filas(datos) for p in self.predictores.values()]
+        invalidas = np.logical_or.reduce([v.invalidas for v in validaciones])
+        motivos = np.full(len(datos), '', dtype=object)
+        for validacion in validaciones:
+            if validacion.invalidas.any():
+                motivos[validacion.invalidas] = validacion.motivos().to_numpy()
+        validas = ~invalidas
+
+        # Features una sola vez, sobre las columnas del modelo
+        predictor_base = next(iter(self.predictores.values()))
+        df_validas = datos.loc[validas, self.variables_requeridas].reset_index(drop=True)
+        features = predictor_base.preparar_features(df_validas)
+
+        def _puntuar(predictor):
+            predicciones = np.full(len(datos), np.nan)
+            if len(features):
+                predicciones[validas] = predictor.puntuar_validas(df_validas, features)
+            return predicciones
+
+        with ThreadPoolExecutor(max_workers=len(self.predictores)) as executor:
+            resultados = dict(zip(self.predictores, executor.map(_puntuar, self.predictores.values())))
+
+        df_resultado = datos.copy()
+        for etiqueta, predicciones in resultados.items():
+            df_resultado[self.columna(etiqueta)] = predicciones
+        if self.pesos:
+            df_resultado['ganancia_ensemble'] = sum(peso * resultados[etiqueta] for etiqueta, peso in self.pesos.items())
+        df_resultado['error_validacion'] = motivos
+
+        if mostrar_detalles:
+            self.mostrar_resumen(df_resultado)
+        return df_resultado
+
+    def resumen(self, df_resultado):
+        """
+        Estadísticas por modelo y diferencia media absoluta entre pares de modelos
+
+        Returns:
+            dict {'modelos': {columna: resumen_serie}, 'diferencias': {'a vs b': float}}
+        """
+        columnas = [self.columna(e) for e in self.predictores]
+        if 'ganancia_ensemble' in df_resultado.columns:
+            columnas.append('ganancia_ensemble')
+        etiquetas = list(self.predictores)
+        diferencias = {}
+        for i, a in enumerate(etiquetas):
+            for b in etiquetas[i + 1:]:
+                diferencia = (df_resultado[self.columna(a)] - df_resultado[self.columna(b)]).abs().mean()
+                diferencias[f'{a} vs {b}'] = None if pd.isna(diferencia) else float(diferencia)
+        return {'modelos': {c: resumen_serie(df_resultado[c]) for c in columnas}, 'diferencias': diferencias}
+
+    def mostrar_resumen(self, df_resultado):
+        resumen = self.resumen(df_resultado)
+        invalidas = int((df_resultado['error_validacion'] != '').sum())
+        print(f"\n📊 Predicción multimodelo: {len(df_resultado):,} registros, {len(self.predictores)} modelos")
+        if invalidas:
+            print(f"   ⚠️  Registros inválidos omitidos: {invalidas:,}")
+        for columna, estadisticas in resumen['modelos'].items():
+            if estadisticas['n']:
+                print(f"   • {columna}: {estadisticas['promedio']:.2f} ± {estadisticas['desviacion'] or 0:.2f} gramos")
+        for pareja, diferencia in resumen['diferencias'].items():
+            if diferencia is not None:
+                print(f"   • Diferencia media |{pareja}|: {diferencia:.3f} gramos")
+        return resumen
+
+    def predecir_archivo(self, archivo_csv, archivo_salida=None):
+        """
+        Leer un CSV una vez, puntuarlo con todos los modelos y guardar el resultado
+
+        Returns:
+            DataFrame con las predicciones
+        """
+        print(f"\n📂 Cargando datos desde: {archivo_csv}")
+        df = pd.read_csv(archivo_csv)
+        faltantes = set(self.variables_requeridas) - set(df.columns)
+        if faltantes:
+            raise ValueError(f"❌ Columnas faltantes en el CSV: {faltantes}")
+        print(f"   ✓ Datos cargados: {len(df):,} registros")
+
+        resultado = self.predecir(df)
+
+        archivo_salida = archivo_salida or str(archivo_csv).replace('.csv', '_multimodelo.csv')
+        resultado.to_csv(archivo_salida, index=False)
+        print(f"\n💾 Resultado guardado en: {archivo_salida}")
+        return resultado
+
+
+def _leer_pesos(texto):
+    """'produccion01=0.5,produccion03=0.5' -> dict"""
+    pesos = {}
+    for parte in texto.split(','):
+        etiqueta, peso = parte.split('=')
+        pesos[etiqueta.strip()] = float(peso)
+    return pesos
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from comun.puntuacion_multimodelo import PRODUCCIONES, PuntuadorMultimodelo, _leer_pesos
+
+    parser = argparse.ArgumentParser(description='Puntuar un CSV con varios modelos de producción en una pasada')
+    parser.add_argument('archivo_csv')
+    parser.add_argument('--producciones', default=','.join(PRODUCCIONES), help='Predictores a usar, separados por coma')
+    parser.add_argument('--pesos', default=None, help='Pesos del ensemble, p.ej. produccion01=0.5,produccion03=0.5')
+    parser.add_argument('--salida', default=None, help='CSV de salida (por defecto <archivo>_multimodelo.csv)')
+    args = parser.parse_args()
+
+    puntuador = PuntuadorMultimodelo(args.producciones.split(','), pesos=_leer_pesos(args.pesos) if args.pesos else None)
+    puntuador.cargar_modelos()
+    puntuador.predecir_archivo(Path(args.archivo_csv), args.salida)
@@ -0,0 +1,343 @@
+"""
+REGISTRO DE MODELOS
+===================
+
+Resuelve los modelos de ganancia por nombre y versión y los mantiene cargados
+en el proceso, de modo que PredictorGanancia (produccion01/03) y
+04_proyeccion_ganancias.py no repiten la ruta del .pkl ni vuelven a
+deserializar un modelo que ya está en memoria.
+
+- MODELOS: modelos conocidos (nombre -> versión -> ruta sin .pkl, relativa a la raíz)
+- registro_modelos.json (REGISTRO_PATH): versiones nuevas y sha256 esperado
+  del .pkl (sha256) y del scorer compilado (sha256_scorer), escrito con
+  `python -m comun.registro_modelos registrar`
+- cargar_modelo: scorer compilado si existe, si no el pipeline de PyCaret;
+  verifica el sha256 registrado del archivo que se deserializa (un scorer sin
+  sha256 registrado no se carga: se usa el .pkl) y guarda el resultado en un
+  cache del proceso
+  (clave: ruta, tamaño y mtime del .pkl y del scorer), así un modelo
+  reentrenado en el mismo lugar se vuelve a cargar
+
+mmap_mode (o F35_MODELOS_MMAP=r) se pasa a joblib.load: los arreglos NumPy del
+scorer quedan mapeados desde el archivo y los procesos que cargan el mismo
+modelo comparten esas páginas. Los árboles de scikit-learn copian sus nodos al
+deserializarse, así que en RandomForest/DecisionTree no reduce memoria.
+
+Uso:
+    python -m comun.registro_modelos
+    python -m comun.registro_modelos registrar modelo03 analisis/modelo03/modelo_limpio_final [--version 2]
+    python -m comun.registro_modelos verificar [modelo03]
+"""
+
+from pathlib import Path
+import json
+import os
+import threading
+
+from comun.cache_fuentes import hash_archivo
+from comun.scorer_compilado import cargar_scorer, huella_modelo, ruta_scorer
+
+
+RAIZ = Path(__file__).resolve().parent.parent
+REGISTRO_PATH = Path(os.environ.get('F35_REGISTRO_MODELOS', RAIZ / 'analisis' / 'registro_modelos.json'))
+MMAP_MODE = os.environ.get('F35_MODELOS_MMAP') or None
+
+# Modelos entrenados en analisis/ (versión 1 de cada uno)
+MODELOS = {
+    'modelo01': {'1': 'analisis/modelo01/modelo_final'},
+    'modelo02': {'1': 'analisis/modelo02/modelo_limpio_final'},
+    'modelo03': {'1': 'analisis/modelo03/modelo_limpio_final'},
+}
+
+_cargados = {}
+_lock = threading.Lock()
+_locks_modelo = {}
+
+
+def _orden_version(version):
+    return (0, int(version), '') if str(version).isdigit() else (1, 0, str(version))
+
+
+def cargar_registro(ruta=None):
+    """
+    Entradas del registro: MODELOS más las de registro_modelos.json
+
+    Returns:
+        dict nombre -> versión -> {'ruta': str relativa o absoluta, 'sha256': str o None,
+        'sha256_scorer': str o None}
+    """
+    ruta = Path(ruta) if ruta is not None else REGISTRO_PATH
+    registro = {nombre: {v: {'ruta': r, 'sha256': None} for v, r in versiones.items()} for nombre, versiones in MODELOS.items()}
+    if ruta.exists():
+        with open(ruta, 'r', encoding='utf-8') as f:
+            for nombre, versiones in json.load(f)['modelos'].items():
+                registro.setdefault(nombre, {}).update(versiones)
+    return registro
+
+
+def guardar_registro(registro, ruta=None):
+    """Persistir el registro de forma atómica"""
+    ruta = Path(ruta) if ruta is not None else REGISTRO_PATH
+    ruta_tmp = ruta.with_name(f'{ruta.name}.tmp')
+    with open(ruta_tmp, 'w', encoding='utf-8') as f:
+        json.dump({'version': 1, 'modelos': registro}, f, ensure_ascii=False, indent=1)
+    os.replace(ruta_tmp, ruta)
+
+
+def resolver(nombre, version=None, registro=None):
+    """
+    Ruta y sha256 esperado de un modelo registrado
+
+    Args:
+        nombre: 'modelo01', 'modelo02', 'modelo03', ...
+        version: Versión registrada; None = la más reciente
+
+    Returns:
+        dict con nombre, version, ruta (Path absoluto sin .pkl), sha256 (huella_modelo) y
+        sha256_scorer (None si no se registraron)
+
+    Raises:
+        KeyError: si el modelo o la versión no están registrados
+    """
+    registro = registro if registro is not None else cargar_registro()
+    if nombre not in registro:
+        raise KeyError(f"Modelo no registrado: {nombre}. Registrados: {', '.join(sorted(registro))}")
+    versiones = registro[nombre]
+    if version is None:
+        version = max(versiones, key=_orden_version)
+    version = str(version)
+    if version not in versiones:
+        raise KeyError(f"{nombre} no tiene versión {version}. Versiones: {', '.join(sorted(versiones, key=_orden_version))}")
+    entrada = versiones[version]
+    return {
+        'nombre': nombre, 'version': version, 'ruta': RAIZ / entrada['ruta'],
+        'sha256': entrada.get('sha256'), 'sha256_scorer': entrada.get('sha256_scorer'),
+    }
+
+
+def ruta_modelo(nombre, version=None):
+    """Ruta absoluta (sin .pkl) de un modelo registrado"""
+    return str(resolver(nombre, version)['ruta'])
+
+
+def _artefacto(ruta):
+    """Archivo que se carga para un modelo: el scorer compilado o el .pkl"""
+    scorer = ruta_scorer(ruta)
+    return scorer if scorer.exists() else Path(f'{ruta}.pkl')
+
+
+def _firma_archivos(ruta):
+    """Tamaño y mtime del .pkl y del scorer: cambia si se reentrena o se vuelve a exportar"""
+    firmas = []
+    for archivo in (Path(f'{ruta}.pkl'), ruta_scorer(ruta)):
+        stat = archivo.stat() if archivo.exists() else None
+        firmas.append((stat.st_size, stat.st_mtime_ns) if stat else None)
+    return tuple(firmas)
+
+
+def _cargar_artefacto(ruta, mmap_mode):
+    # cargar_scorer descarta un scorer exportado desde otra versión del .pkl
+    scorer = cargar_scorer(ruta, mmap_mode=mmap_mode)
+    if scorer is not None:
+        return scorer
+    from pycaret.regression import load_model
+    return load_model(str(ruta), verbose=False)
+
+
+def _comprobar_huella(ruta, huella, sha256):
+    if sha256 is not None and huella != sha256:
+        raise ValueError(f"La huella de {ruta} no coincide con la registrada ({huella[:12]} != {sha256[:12]})")
+
+
+def _cargar_verificado(ruta, mmap_mode, sha256, sha256_scorer):
+    """
+    Cargar comprobando, antes de deserializar, el sha256 registrado del archivo
+    que se carga: el scorer contra sha256_scorer y el .pkl contra sha256
+    """
+    pkl = Path(f'{ruta}.pkl')
+    scorer = ruta_scorer(ruta)
+    huella_pkl = None
+    if pkl.exists():
+        huella_pkl = hash_archivo(pkl)
+        _comprobar_huella(pkl, huella_pkl, sha256)
+    else:
+        # Sin .pkl, huella_modelo es la del scorer
+        sha256_scorer = sha256_scorer or sha256
+
+    if scorer.exists():
+        huella_scorer = hash_archivo(scorer)
+        if sha256_scorer is not None and huella_scorer == sha256_scorer:
+            modelo = cargar_scorer(ruta, mmap_mode=mmap_mode, huella_pkl=huella_pkl)
+            if modelo is not None:
+                return modelo
+        elif pkl.exists():
+            print(f"⚠️  {scorer.name} no coincide con el sha256 registrado; se usa el .pkl "
+                  f"(volver a registrar con python -m comun.registro_modelos registrar)")
+        else:
+            _comprobar_huella(scorer, huella_scorer, sha256_scorer)
+
+    if sha256 is None:
+        raise ValueError(f"{pkl} no tiene sha256 registrado")
+    from pycaret.regression import load_model
+    return load_model(str(ruta), verbose=False)
+
+
+def cargar_modelo(modelo, version=None, mmap_mode=MMAP_MODE, sha256=None, sha256_scorer=None):
+    """
+    Modelo listo para predecir, una sola carga por proceso
+
+    Args:
+        modelo: Nombre registrado ('modelo03') o ruta del modelo sin .pkl
+        version: Versión registrada (solo con nombre); None = la más reciente
+        mmap_mode: mmap_mode de joblib.load para el scorer compilado ('r' o None)
+        sha256: Huella esperada del .pkl (huella_modelo); por defecto la del registro
+        sha256_scorer: Huella esperada del scorer compilado; por defecto la del registro
+
+    Returns:
+        ScorerGanancia o pipeline de PyCaret
+
+    Raises:
+        FileNotFoundError: si no existe ni el scorer ni el .pkl
+        ValueError: si la huella del archivo a cargar no coincide con la registrada
+    """
+    registro = cargar_registro()
+    if str(modelo) in registro:
+        entrada = resolver(str(modelo), version, registro)
+        ruta = entrada['ruta']
+        sha256 = sha256 or entrada['sha256']
+        sha256_scorer = sha256_scorer or entrada['sha256_scorer']
+    else:
+        ruta = Path(modelo)
+    ruta = ruta.resolve()
+
+    if not _artefacto(ruta).exists():
+        raise FileNotFoundError(f"No existe el modelo {ruta}.pkl ni su scorer compilado")
+    firma = _firma_archivos(ruta)
+    verificar = sha256 is not None or sha256_scorer is not None
+    clave = (str(ruta), firma, mmap_mode, sha256, sha256_scorer)
+
+    with _lock:
+        cargado = _cargados.get(clave)
+        lock_modelo = _locks_modelo.setdefault(str(ruta), threading.Lock())
+    if cargado is None:
+        # Un lock por modelo: dos hilos que piden el mismo modelo lo cargan una vez
+        with lock_modelo:
+            with _lock:
+                cargado = _cargados.get(clave)
+            if cargado is None:
+                if verificar:
+                    cargado = _cargar_verificado(ruta, mmap_mode, sha256, sha256_scorer)
+                else:
+                    cargado = _cargar_artefacto(ruta, mmap_mode)
+                with _lock:
+                    for anterior in [c for c in _cargados if c[0] == str(ruta) and c[1] != firma]:
+                        del _cargados[anterior]
+                    _cargados[clave] = cargado
+    return cargado
+
+
+def limpiar_cache():
+    """Descargar todos los modelos del proceso"""
+    with _lock:
+        _cargados.clear()
+
+
+def registrar(nombre, modelo_path, version=None, ruta_registro=None):
+    """
+    Registrar un modelo entrenado con el sha256 del .pkl y del scorer compilado
+
+    Volver a registrar después de exportar el scorer (python -m comun.scorer_compilado),
+    si no cargar_modelo no lo usa.
+
+    Args:
+        nombre: Nombre del modelo (p.ej. 'modelo03')
+        modelo_path: Ruta del modelo sin .pkl
+        version: Versión a registrar; None = siguiente número libre
+
+    Returns:
+        dict de resolver() para la entrada registrada
+    """
+    ruta = Path(modelo_path).resolve()
+    if not _artefacto(ruta).exists():
+        raise FileNotFoundError(f"No existe el modelo {ruta}.pkl ni su scorer compilado")
+    try:
+        ruta_relativa = ruta.relative_to(RAIZ).as_posix()
+    except ValueError:
+        ruta_relativa = str(ruta)
+
+    registro = cargar_registro(ruta_registro)
+    versiones = registro.setdefault(nombre, {})
+    if version is None:
+        numeros = [int(v) for v in versiones if str(v).isdigit()]
+        version = max(numeros, default=0) + 1
+    scorer = ruta_scorer(ruta)
+    versiones[str(version)] = {
+        'ruta': ruta_relativa,
+        'sha256': huella_modelo(ruta),
+        'sha256_scorer': hash_archivo(scorer) if scorer.exists() else None,
+    }
+
+    # Solo se persiste lo que difiere de MODELOS
+    persistir = {
+        n: {v: e for v, e in vs.items() if e['sha256'] is not None or MODELOS.get(n, {}).get(v) != e['ruta']}
+        for n, vs in registro.items()
+    }
+    guardar_registro({n: vs for n, vs in persistir.items() if vs}, ruta_registro)
+    return resolver(nombre, version, registro)
+
+
+def _mostrar_registro():
+    for nombre, versiones in sorted(cargar_registro().items()):
+        for version in sorted(versiones, key=_orden_version):
+            entrada = resolver(nombre, version)
+            estado = '✓' if _artefacto(entrada['ruta']).exists() else '✗ no encontrado'
+            sha = entrada['sha256'][:12] if entrada['sha256'] else 'sin sha256'
+            print(f"   • {nombre} v{version}: {entrada['ruta']} ({sha}) {estado}")
+
+
+def _verificar(nombres):
+    errores = 0
+    for nombre in nombres:
+        entrada = resolver(nombre)
+        if not _artefacto(entrada['ruta']).exists():
+            print(f"   ✗ {nombre} v{entrada['version']}: no encontrado")
+            errores += 1
+            continue
+        pkl = Path(f"{entrada['ruta']}.pkl")
+        scorer = ruta_scorer(entrada['ruta'])
+        esperados = [(pkl, entrada['sha256']), (scorer, entrada['sha256_scorer'] or (None if pkl.exists() else entrada['sha256']))]
+        for archivo, esperado in esperados:
+            if not archivo.exists():
+                continue
+            huella = hash_archivo(archivo)
+            if esperado is not None and huella != esperado:
+                print(f"   ✗ {nombre} v{entrada['version']} {archivo.name}: sha256 {huella[:12]} != registrado {esperado[:12]}")
+                errores += 1
+            else:
+                print(f"   ✓ {nombre} v{entrada['version']} {archivo.name}: {huella[:12]}{'' if esperado else ' (sin sha256 registrado)'}")
+    return errores
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from comun.registro_modelos import _mostrar_registro, _verificar, cargar_registro, registrar
+
+    parser = argparse.ArgumentParser(description='Registro de modelos de ganancia')
+    subparsers = parser.add_subparsers(dest='comando')
+    p_registrar = subparsers.add_parser('registrar', help='Registrar un modelo con su sha256')
+    p_registrar.add_argument('nombre', help='Nombre del modelo (p.ej. modelo03)')
+    p_registrar.add_argument('modelo_path', help='Ruta del modelo sin .pkl')
+    p_registrar.add_argument('--version', default=None, help='Versión (por defecto la siguiente)')
+    p_verificar = subparsers.add_parser('verificar', help='Comprobar que los modelos existen y coinciden con su sha256')
+    p_verificar.add_argument('nombres', nargs='*', help='Modelos a verificar (por defecto todos)')
+    args = parser.parse_args()
+
+    if args.comando == 'registrar':
+        entrada = registrar(args.nombre, args.modelo_path, args.version)
+        print(f"✅ {entrada['nombre']} v{entrada['version']} registrado ({entrada['sha256'][:12]})")
+    elif args.comando == 'verificar':
+        raise SystemExit(1 if _verificar(args.nombres or sorted(cargar_registro())) else 0)
+    else:
+        print("📚 Modelos registrados:")
+        _mostrar_registro()
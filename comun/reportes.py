@@ -0,0 +1,98 @@
+"""
+REPORTES DE GANANCIA
+====================
+
+Estadísticas resumen de predicciones y proyecciones (PredictorGanancia y
+04_proyeccion_ganancias.py) calculadas una vez y devueltas como datos:
+
+- total: una sola llamada agg() sobre la serie
+- por dimensión (sexo, tipoConstruccion, ...): un groupby().agg() por
+  dimensión, en vez de filtrar el frame completo una vez por grupo
+
+Los resultados son dicts y listas con tipos de Python (NaN -> None), listos
+para json.dumps o para el log; el texto de consola se arma desde ellos con
+lineas_por_grupo.
+"""
+
+import math
+
+import numpy as np
+
+
+_ESTADISTICAS = ['count', 'mean', 'std', 'min', 'max', 'median']
+_NOMBRES = {'count': 'n', 'mean': 'promedio', 'std': 'desviacion', 'min': 'minimo', 'max': 'maximo', 'median': 'mediana'}
+
+
+def _a_python(valor):
+    """Escalar NumPy -> Python, NaN -> None"""
+    if hasattr(valor, 'item'):
+        valor = valor.item()
+    if isinstance(valor, float) and math.isnan(valor):
+        return None
+    return valor
+
+
+def resumen_serie(serie):
+    """
+    Estadísticas de una serie en una pasada
+
+    Returns:
+        dict con n, promedio, desviacion, minimo, maximo y mediana
+    """
+    estadisticas = serie.agg(_ESTADISTICAS)
+    return {_NOMBRES[k]: _a_python(v) for k, v in estadisticas.items()}
+
+
+def resumen_por_grupo(df, valor, dimension):
+    """
+    n, promedio y desviación de 'valor' por cada grupo de 'dimension'
+
+    Los grupos quedan en orden de aparición, igual que recorrer unique().
+
+    Returns:
+        list de dicts {'grupo', 'n', 'promedio', 'desviacion'}
+    """
+    tabla = df.groupby(dimension, sort=False, observed=True)[valor].agg(['count', 'mean', 'std'])
+    return [
+        {'grupo': _a_python(grupo), 'n': int(fila['count']), 'promedio': _a_python(fila['mean']), 'desviacion': _a_python(fila['std'])}
+        for grupo, fila in tabla.iterrows()
+    ]
+
+
+def resumen_grupos(df, valor, dimensiones):
+    """
+    Resumen total y por cada dimensión
+
+    Args:
+        df: DataFrame con la columna de valor y las dimensiones
+        valor: Columna numérica a resumir (p.ej. 'ganancia_predicha')
+        dimensiones: Columnas de agrupación; las que no estén en df se omiten
+
+    Returns:
+        dict {'total': resumen_serie, 'grupos': {dimension: resumen_por_grupo}}
+    """
+    return {
+        'total': resumen_serie(df[valor]),
+        'grupos': {dim: resumen_por_grupo(df, valor, dim) for dim in dimensiones if dim in df.columns},
+    }
+
+
+def distribucion(df, dimension):
+    """
+    Conteo y porcentaje por valor de una columna, de mayor a menor
+
+    Returns:
+        list de dicts {'grupo', 'n', 'pct'}
+    """
+    conteos = df[dimension].value_counts()
+    total = len(df)
+    return [{'grupo': _a_python(g), 'n': int(n), 'pct': n / total * 100 if total else 0.0} for g, n in conteos.items()]
+
+
+def _numero(valor):
+    return f"{np.nan if valor is None else valor:.2f}"
+
+
+def lineas_por_grupo(filas, sangria='   ', unidad='gramos'):
+    """Texto '• grupo: promedio ± desviación unidad' de cada fila de resumen_por_grupo"""
+    return [f"{sangria}• {f['grupo']}: {_numero(f['promedio'])} ± {_numero(f['desviacion'])} {unidad}" for f in filas]
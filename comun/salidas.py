@@ -0,0 +1,197 @@
+"""
+ESCRITURA DE SALIDAS
+====================
+
+Capa de escritura de los entregables y archivos intermedios del pipeline.
+
+Los .xlsx se escriben fila a fila con xlsxwriter en modo constant_memory, que
+va volcando cada fila al disco en vez de mantener el libro completo en memoria
+como hace to_excel. Si xlsxwriter no está instalado se usa to_excel.
+
+Cada salida se pide como ruta sin extensión más una lista de formatos
+('xlsx', 'csv', 'parquet'), configurable por variable de entorno:
+
+    F35_FORMATOS_INTERMEDIOS   archivos de work_data de 02 y 03 (por defecto csv,xlsx)
+    F35_FORMATOS_COMPILADO     entregables de los compilados (por defecto xlsx)
+
+Uso del benchmark: python -m comun.salidas [filas_largo] [pabellones_ancho]
+"""
+
+import importlib.util
+import os
+
+import pandas as pd
+
+
+XLSXWRITER_DISPONIBLE = importlib.util.find_spec('xlsxwriter') is not None
+FORMATOS_VALIDOS = ('xlsx', 'csv', 'parquet')
+
+# Mismo estilo de encabezado y de fechas que to_excel
+_FORMATO_ENCABEZADO = {'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'}
+_FORMATO_FECHA = 'yyyy-mm-dd hh:mm:ss'
+
+# Celdas convertidas a valores Python a la vez (filas por bloque = CELDAS_POR_BLOQUE / columnas)
+CELDAS_POR_BLOQUE = 100_000
+
+
+def formatos_salida(variable, por_defecto):
+    """
+    Formatos pedidos en una variable de entorno ('csv,xlsx', 'parquet', ...)
+
+    Returns:
+        list de formatos válidos, en el orden indicado
+    """
+    valor = os.environ.get(variable, por_defecto)
+    formatos = [f.strip().lower() for f in valor.split(',') if f.strip()]
+    invalidos = [f for f in formatos if f not in FORMATOS_VALIDOS]
+    if invalidos:
+        raise ValueError(f"{variable}: formatos no soportados {invalidos} (válidos: {', '.join(FORMATOS_VALIDOS)})")
+    return formatos
+
+
+def _valores_columna(serie):
+    """Valores Python de una columna con los nulos como None (celda vacía)"""
+    return serie.astype(object).where(serie.notna(), None).tolist()
+
+
+def escribir_excel(df, ruta, hoja='Sheet1'):
+    """
+    Escribir un DataFrame (sin índice) a .xlsx en modo streaming
+
+    Las filas se escriben en orden con xlsxwriter constant_memory y se convierten
+    a valores Python por bloques de filas (CELDAS_POR_BLOQUE celdas), así el uso
+    de memoria no crece con el tamaño de la hoja.
+    """
+    if not XLSXWRITER_DISPONIBLE:
+        df.to_excel(ruta, index=False, sheet_name=hoja)
+        return
+
+    import xlsxwriter
+
+    libro = xlsxwriter.Workbook(str(ruta), {'constant_memory': True, 'strings_to_urls': False, 'default_date_format': _FORMATO_FECHA})
+    try:
+        hoja_excel = libro.add_worksheet(hoja)
+        hoja_excel.write_row(0, 0, [str(c) for c in df.columns], libro.add_format(_FORMATO_ENCABEZADO))
+        filas_bloque = max(1, CELDAS_POR_BLOQUE // max(1, df.shape[1]))
+        for inicio in range(0, len(df), filas_bloque):
+            bloque = df.iloc[inicio:inicio + filas_bloque]
+            columnas = [_valores_columna(bloque.iloc[:, i]) for i in range(bloque.shape[1])]
+            for nro_fila, fila in enumerate(zip(*columnas), start=inicio + 1):
+                hoja_excel.write_row(nro_fila, 0, fila)
+    finally:
+        libro.close()
+
+
+def escribir_salidas(df, ruta_base, formatos):
+    """
+    Escribir un DataFrame en cada formato pedido
+
+    Args:
+        df: DataFrame a guardar (sin índice)
+        ruta_base: Ruta sin extensión
+        formatos: Iterable con 'xlsx', 'csv' y/o 'parquet'
+
+    Returns:
+        list con las rutas escritas
+    """
+    rutas = []
+    for formato in formatos:
+        ruta = f'{ruta_base}.{formato}'
+        if formato == 'xlsx':
+            escribir_excel(df, ruta)
+        elif formato == 'csv':
+            df.to_csv(ruta, index=False)
+        elif formato == 'parquet':
+            df.to_parquet(ruta, index=False)
+        else:
+            raise ValueError(f"Formato de salida no soportado: {formato}")
+        rutas.append(ruta)
+    return rutas
+
+
+def _datos_benchmark(filas_largo, pabellones_ancho):
+    """Frames sintéticos con la forma de proyeccion_pollos_expandido y del formato ancho"""
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    df_largo = pd.DataFrame({
+        'nombre_sector': rng.choice(['LA MINA', 'TROMPETA', 'DON GASTÓN'], filas_largo),
+        'nombre_sector_code': rng.choice(['la mina', 'trompeta', 'don gaston'], filas_largo),
+        'nro_crianza': rng.integers(100, 200, filas_largo),
+        'nro_pabellon': rng.integers(1, 20, filas_largo),
+        'sexo': rng.choice(['M', 'H', 'X'], filas_largo),
+        'fecha': pd.Timestamp('2025-11-05') + pd.to_timedelta(rng.integers(1, 20, filas_largo), unit='D'),
+        'edad': rng.integers(30, 51, filas_largo),
+        'cumplimiento_consumo': 0,
+        'consumo_estandar_edad': 0,
+        'proyeccion_consumo': rng.uniform(0, 2000, filas_largo),
+        'proyeccion_peso': rng.uniform(1500, 3500, filas_largo),
+    })
+    fechas = [str(d.date()) for d in pd.date_range('2025-11-06', periods=60)]
+    valores = rng.uniform(0, 3, (3 * pabellones_ancho, len(fechas))).astype(object)
+    valores[rng.random(valores.shape) < 0.2] = None
+    df_ancho = pd.DataFrame(valores, columns=fechas)
+    df_ancho.insert(0, 'ratio', np.tile(['Edad', 'Consumo Alimento', 'Proyeccion Peso'], pabellones_ancho))
+    df_ancho.insert(1, 'pabellon', np.repeat(np.arange(pabellones_ancho) % 20 + 1, 3))
+    df_ancho.insert(2, 'etapa', 'Broiler')
+    df_ancho.insert(3, 'subzona', '')
+    df_ancho.insert(4, 'grupo', 'la mina')
+    return {'expandido': df_largo, 'formateado': df_ancho}
+
+
+def _pico_memoria_mb():
+    """Pico de memoria residente del proceso actual en MB"""
+    try:
+        import resource
+        import sys
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux informa KB, macOS bytes
+        return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+    except ImportError:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+
+
+def _medir_escritura(metodo, nombre, filas_largo, pabellones_ancho, directorio):
+    """Ejecutado en un subproceso: escribe un frame y reporta tiempo y pico de RSS"""
+    import json
+    import time
+
+    df = _datos_benchmark(filas_largo, pabellones_ancho)[nombre]
+    base = _pico_memoria_mb()
+    ruta = os.path.join(directorio, f'{nombre}_{metodo}.xlsx')
+    inicio = time.perf_counter()
+    if metodo == 'to_excel':
+        df.to_excel(ruta, index=False)
+    else:
+        escribir_excel(df, ruta)
+    print(json.dumps({'segundos': time.perf_counter() - inicio, 'rss_base_mb': base, 'rss_pico_mb': _pico_memoria_mb()}))
+
+
+def benchmark(filas_largo=200_000, pabellones_ancho=5_000):
+    """
+    Comparar to_excel contra escribir_excel en tiempo y pico de RSS
+
+    Cada medición corre en un subproceso nuevo para que el pico de memoria de
+    una no contamine la siguiente.
+    """
+    import json
+    import subprocess
+    import sys
+    import tempfile
+
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with tempfile.TemporaryDirectory() as directorio:
+        print(f"{'salida':<12} {'método':<15} {'segundos':>9} {'RSS pico MB':>12} {'delta MB':>9}")
+        for nombre in ['expandido', 'formateado']:
+            for metodo in ['to_excel', 'escribir_excel']:
+                codigo = f"from comun.salidas import _medir_escritura; _medir_escritura({metodo!r}, {nombre!r}, {filas_largo}, {pabellones_ancho}, {directorio!r})"
+                salida = subprocess.run([sys.executable, '-c', codigo], cwd=raiz, capture_output=True, text=True, check=True)
+                r = json.loads(salida.stdout.strip().splitlines()[-1])
+                print(f"{nombre:<12} {metodo:<15} {r['segundos']:>9.2f} {r['rss_pico_mb']:>12.0f} {r['rss_pico_mb'] - r['rss_base_mb']:>9.0f}")
+
+
+if __name__ == '__main__':
+    import sys
+
+    benchmark(*[int(a) for a in sys.argv[1:3]])
@@ -0,0 +1,354 @@
+"""
+SCORER COMPILADO
+================
+
+Exporta el pipeline guardado por PyCaret (modelo_limpio_final.pkl) a un
+scorer autocontenido que no necesita PyCaret ni category_encoders:
+
+- Imputación (SimpleImputer) -> valores de reemplazo por columna
+- OrdinalEncoder / OneHotEncoder (category_encoders) -> diccionarios valor -> código / vector
+- PowerTransformer (Yeo-Johnson) -> lambdas por columna
+- StandardScaler -> media y escala por columna
+- RemoveOutliers -> se omite (solo actúa al entrenar)
+- Estimador final -> el objeto ajustado, tal cual
+
+Todo se aplica con NumPy sobre arreglos. Las columnas numéricas de entrada se
+pasan por float32 igual que hace predict_model (df_shrink_dtypes), así el
+estimador recibe exactamente los mismos valores. El scorer se guarda junto al
+modelo como <modelo>_scorer.joblib con el sha256 del .pkl del que salió;
+cargar_scorer lo ignora si el .pkl cambió después (modelo reentrenado sin
+volver a exportar) y el modelo se carga desde el .pkl.
+
+Uso:
+    python -m comun.scorer_compilado <ruta_modelo_sin_pkl> [--paridad <csv>]
+
+La exportación y la prueba de paridad requieren PyCaret (ambiente de
+entrenamiento); usar el scorer exportado solo requiere NumPy y el paquete del
+estimador (scikit-learn, lightgbm, ...).
+"""
+
+from pathlib import Path
+import warnings
+
+import numpy as np
+import pandas as pd
+
+
+# Pasos del pipeline que no modifican los datos al predecir
+_PASOS_SOLO_ENTRENAMIENTO = {'RemoveOutliers'}
+
+
+def ruta_scorer(modelo_path):
+    """Archivo del scorer exportado para un modelo (ruta sin .pkl)"""
+    return Path(f'{modelo_path}_scorer.joblib')
+
+
+def huella_modelo(modelo_path):
+    """
+    sha256 del .pkl del modelo (o del scorer si solo existe ese)
+
+    Identifica la versión del modelo para invalidar artefactos derivados
+    (grilla de predicción, caches).
+    """
+    from comun.cache_fuentes import hash_archivo
+
+    pkl = Path(f'{modelo_path}.pkl')
+    return hash_archivo(pkl if pkl.exists() else ruta_scorer(modelo_path))
+
+
+def _yeo_johnson(x, lmbda):
+    """Transformación Yeo-Johnson con la misma rama numérica que sklearn"""
+    resultado = np.empty_like(x)
+    positivos = x >= 0
+    if abs(lmbda) < np.spacing(1.0):
+        resultado[positivos] = np.log1p(x[positivos])
+    else:
+        resultado[positivos] = (np.power(x[positivos] + 1, lmbda) - 1) / lmbda
+    if abs(lmbda - 2) > np.spacing(1.0):
+        resultado[~positivos] = -(np.power(-x[~positivos] + 1, 2 - lmbda) - 1) / (2 - lmbda)
+    else:
+        resultado[~positivos] = -np.log1p(-x[~positivos])
+    return resultado
+
+
+def _mapear_categorias(valores, mapeo, desconocido):
+    """
+    Mapear un arreglo de categorías con un diccionario, resolviendo cada valor
+    distinto una sola vez
+
+    Returns:
+        np.ndarray con una fila de salida por valor de entrada
+    """
+    unicos, inversa = np.unique(valores.astype(str), return_inverse=True)
+    tabla = np.array([mapeo.get(u, desconocido) for u in unicos], dtype=float)
+    return tabla[inversa]
+
+
+class ScorerGanancia:
+    """
+    Pipeline de preprocesamiento + estimador exportado desde PyCaret
+
+    Los pasos son tuplas con arreglos NumPy, de modo que el archivo guardado no
+    referencia clases de PyCaret.
+    """
+
+    def __init__(self, columnas_entrada, columnas_categoricas, pasos, columnas_modelo, estimador, huella_pkl=None):
+        self.columnas_entrada = list(columnas_entrada)
+        self.columnas_categoricas = list(columnas_categoricas)
+        self.pasos = pasos
+        self.columnas_modelo = list(columnas_modelo)
+        self.estimador = estimador
+        # sha256 del .pkl exportado (None si se exportó desde un pipeline en memoria)
+        self.huella_pkl = huella_pkl
+
+    def transformar(self, datos):
+        """
+        Aplicar el preprocesamiento exportado
+
+        Args:
+            datos: DataFrame con columnas_entrada (features ya preparadas)
+
+        Returns:
+            np.ndarray (n, len(columnas_modelo)) con la entrada del estimador
+        """
+        faltantes = [c for c in self.columnas_entrada if c not in datos.columns]
+        if faltantes:
+            raise ValueError(f"Faltan columnas para el scorer: {faltantes}")
+
+        estado = {}
+        for columna in self.columnas_entrada:
+            if columna in self.columnas_categoricas:
+                serie = datos[columna].astype(object)
+                estado[columna] = np.where(serie.isna(), None, serie.astype(str)).astype(object)
+            else:
+                # predict_model reduce las columnas numéricas a float32 antes de transformar
+                estado[columna] = datos[columna].to_numpy(dtype=np.float32, na_value=np.nan).astype(float)
+
+        for paso in self.pasos:
+            tipo = paso[0]
+            if tipo == 'imputar':
+                _, columnas, valores = paso
+                for columna, valor in zip(columnas, valores):
+                    actual = estado[columna]
+                    nulos = pd.isna(actual)
+                    if nulos.any():
+                        actual = actual.copy()
+                        actual[nulos] = valor
+                        estado[columna] = actual
+            elif tipo == 'ordinal':
+                _, columna, mapeo, desconocido = paso
+                estado[columna] = _mapear_categorias(estado[columna], mapeo, desconocido)
+            elif tipo == 'onehot':
+                _, columna, mapeo, desconocido, columnas_nuevas = paso
+                matriz = _mapear_categorias(estado.pop(columna), mapeo, desconocido)
+                for i, columna_nueva in enumerate(columnas_nuevas):
+                    estado[columna_nueva] = matriz[:, i]
+            elif tipo == 'yeo_johnson':
+                _, columnas, lambdas, media, escala = paso
+                for i, columna in enumerate(columnas):
+                    valores = _yeo_johnson(estado[columna].astype(float), lambdas[i])
+                    if media is not None:
+                        valores = (valores - media[i]) / escala[i]
+                    estado[columna] = valores
+            elif tipo == 'escalar':
+                _, columnas, media, escala = paso
+                for i, columna in enumerate(columnas):
+                    valores = estado[columna].astype(float)
+                    if media is not None:
+                        valores = valores - media[i]
+                    if escala is not None:
+                        valores = valores / escala[i]
+                    estado[columna] = valores
+
+        return np.column_stack([np.asarray(estado[c], dtype=float) for c in self.columnas_modelo])
+
+    def predecir(self, datos):
+        """Predicciones equivalentes a prediction_label de predict_model"""
+        X = self.transformar(datos)
+        with warnings.catch_warnings():
+            # El estimador se ajustó con DataFrame; aquí recibe el arreglo en el mismo orden
+            warnings.filterwarnings('ignore', message='X does not have valid feature names')
+            predicciones = self.estimador.predict(X)
+        return np.asarray(predicciones, dtype=float)
+
+    def guardar(self, ruta):
+        import joblib
+        joblib.dump(self, ruta)
+
+    @staticmethod
+    def cargar(ruta, mmap_mode=None):
+        import joblib
+        scorer = joblib.load(ruta, mmap_mode=mmap_mode)
+        if not isinstance(scorer, ScorerGanancia):
+            raise TypeError(f"{ruta} no contiene un ScorerGanancia")
+        return scorer
+
+
+def cargar_scorer(modelo_path, mmap_mode=None, huella_pkl=None):
+    """
+    Scorer compilado del modelo, si existe y corresponde al .pkl actual
+
+    Args:
+        modelo_path: Ruta del modelo sin .pkl
+        mmap_mode: mmap_mode de joblib.load
+        huella_pkl: sha256 del .pkl si ya se calculó
+
+    Returns:
+        ScorerGanancia, o None si no hay scorer o fue exportado desde otro .pkl
+    """
+    ruta = ruta_scorer(modelo_path)
+    if not ruta.exists():
+        return None
+    scorer = ScorerGanancia.cargar(ruta, mmap_mode=mmap_mode)
+    pkl = Path(f'{modelo_path}.pkl')
+    if pkl.exists():
+        from comun.cache_fuentes import hash_archivo
+
+        huella_pkl = huella_pkl or hash_archivo(pkl)
+        if getattr(scorer, 'huella_pkl', None) != huella_pkl:
+            print(f"⚠️  {ruta.name} no corresponde a la versión actual de {pkl.name}; se usa el .pkl "
+                  f"(volver a exportar con python -m comun.scorer_compilado)")
+            return None
+    return scorer
+
+
+def _columnas_paso(paso, columnas_actuales):
+    """Columnas sobre las que actúa un TransformerWrapper de PyCaret"""
+    incluidas = getattr(paso, '_include', None)
+    if incluidas is None:
+        incluidas = getattr(paso, 'include', None)
+    return list(incluidas) if incluidas is not None else list(columnas_actuales)
+
+
+def exportar_scorer(pipeline):
+    """
+    Convertir un pipeline de PyCaret ya cargado en un ScorerGanancia
+
+    Args:
+        pipeline: Resultado de pycaret.regression.load_model
+
+    Returns:
+        ScorerGanancia
+    """
+    pasos = []
+    columnas_entrada = []
+    columnas_categoricas = []
+    columnas_actuales = []
+    columnas_modelo = None
+
+    *preprocesamiento, (_, estimador) = pipeline.steps
+    for nombre, paso in preprocesamiento:
+        transformador = getattr(paso, 'transformer', paso)
+        tipo = type(transformador).__name__
+        columnas = _columnas_paso(paso, columnas_actuales)
+
+        if tipo == 'SimpleImputer':
+            if nombre == 'categorical_imputer':
+                columnas_categoricas.extend(columnas)
+            columnas_entrada.extend(c for c in columnas if c not in columnas_entrada)
+            columnas_actuales.extend(c for c in columnas if c not in columnas_actuales)
+            pasos.append(('imputar', columnas, list(transformador.statistics_)))
+        elif tipo == 'OrdinalEncoder':
+            for mapeo in transformador.mapping:
+                serie = mapeo['mapping']
+                codigos = {str(k): float(v) for k, v in serie.items() if not pd.isna(k)}
+                pasos.append(('ordinal', mapeo['col'], codigos, -1.0))
+        elif tipo == 'OneHotEncoder':
+            ordinales = {m['col']: m['mapping'] for m in transformador.ordinal_encoder.mapping}
+            for mapeo in transformador.mapping:
+                columna = mapeo['col']
+                matriz = mapeo['mapping']
+                vectores = {str(k): matriz.loc[codigo].to_numpy(dtype=float) for k, codigo in ordinales[columna].items() if not pd.isna(k)}
+                desconocido = matriz.loc[-1].to_numpy(dtype=float)
+                columnas_nuevas = list(matriz.columns)
+                pasos.append(('onehot', columna, vectores, desconocido, columnas_nuevas))
+                posicion = columnas_actuales.index(columna)
+                columnas_actuales[posicion:posicion + 1] = columnas_nuevas
+        elif tipo == 'PowerTransformer':
+            if transformador.method != 'yeo-johnson':
+                raise ValueError(f"PowerTransformer '{transformador.method}' no soportado")
+            columnas = list(transformador.feature_names_in_)
+            media = escala = None
+            if transformador.standardize:
+                media, escala = transformador._scaler.mean_, transformador._scaler.scale_
+            pasos.append(('yeo_johnson', columnas, np.asarray(transformador.lambdas_, dtype=float), media, escala))
+        elif tipo == 'StandardScaler':
+            columnas = list(transformador.feature_names_in_)
+            pasos.append(('escalar', columnas, transformador.mean_, transformador.scale_))
+            columnas_modelo = columnas
+        elif tipo in _PASOS_SOLO_ENTRENAMIENTO:
+            continue
+        else:
+            raise ValueError(f"Paso '{nombre}' ({tipo}) no soportado por el scorer compilado")
+
+    if columnas_modelo is None:
+        columnas_modelo = columnas_actuales
+    # Si el estimador guardó los nombres se respeta su orden; algunos (LightGBM)
+    # los sanitizan ('Black Out' -> 'Black_Out') y ahí vale el orden posicional
+    nombres_estimador = list(getattr(estimador, 'feature_names_in_', []))
+    if sorted(nombres_estimador) == sorted(columnas_modelo):
+        columnas_modelo = nombres_estimador
+
+    return ScorerGanancia(columnas_entrada, columnas_categoricas, pasos, columnas_modelo, estimador)
+
+
+def exportar_desde_archivo(modelo_path):
+    """Cargar modelo_limpio_final con PyCaret, exportarlo y guardarlo junto al .pkl"""
+    from pycaret.regression import load_model
+    from comun.cache_fuentes import hash_archivo
+
+    scorer = exportar_scorer(load_model(str(modelo_path), verbose=False))
+    scorer.huella_pkl = hash_archivo(f'{modelo_path}.pkl')
+    destino = ruta_scorer(modelo_path)
+    scorer.guardar(destino)
+    print(f"✓ Scorer exportado: {destino}")
+    return scorer
+
+
+def verificar_paridad(modelo_path, archivo_csv, tolerancia=1e-4):
+    """
+    Comparar el scorer exportado contra predict_model sobre un CSV de entrenamiento
+
+    Args:
+        modelo_path: Ruta del modelo sin .pkl
+        archivo_csv: p.ej. work_data/resumen_crianzas_para_modelo3.csv
+        tolerancia: Diferencia absoluta máxima aceptada
+
+    Returns:
+        float: diferencia absoluta máxima
+    """
+    from pycaret.regression import load_model, predict_model
+    from comun.transformacion_features import preparar_features
+
+    pipeline = load_model(str(modelo_path), verbose=False)
+    scorer = cargar_scorer(modelo_path) or exportar_scorer(pipeline)
+
+    df = pd.read_csv(archivo_csv)
+    df = df.dropna(subset=['mes_carga', 'sexo', 'kilos_recibidos_percapita', 'tipoConstruccion', 'densidad_pollos_m2'])
+    df_features = preparar_features(df)[scorer.columnas_entrada]
+
+    esperado = predict_model(pipeline, data=df_features, verbose=False)['prediction_label'].to_numpy(dtype=float)
+    obtenido = scorer.predecir(df_features)
+    diferencia = float(np.max(np.abs(esperado - obtenido))) if len(df_features) else 0.0
+
+    estado = '✅' if diferencia <= tolerancia else '❌'
+    print(f"{estado} Paridad scorer vs predict_model: {len(df_features):,} filas, diferencia máxima {diferencia:.2e} (tolerancia {tolerancia:.0e})")
+    if diferencia > tolerancia:
+        raise AssertionError(f"El scorer difiere de predict_model en {diferencia}")
+    return diferencia
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Exportar el pipeline de PyCaret a un scorer autocontenido')
+    parser.add_argument('modelo_path', help='Ruta del modelo sin .pkl (p.ej. analisis/modelo03/modelo_limpio_final)')
+    parser.add_argument('--paridad', metavar='CSV', help='CSV para comparar contra predict_model después de exportar')
+    args = parser.parse_args()
+
+    # Importar desde el módulo para que el pickle referencie comun.scorer_compilado y no __main__
+    from comun.scorer_compilado import exportar_desde_archivo, verificar_paridad
+
+    exportar_desde_archivo(args.modelo_path)
+    if args.paridad:
+        verificar_paridad(args.modelo_path, args.paridad)
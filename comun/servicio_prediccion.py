@@ -0,0 +1,364 @@
+"""
+SERVICIO DE PREDICCIÓN
+======================
+
+Servicio HTTP local (solo biblioteca estándar) que envuelve PredictorGanancia
+de produccion/produccionXX. El modelo se carga una vez al iniciar y todas las
+predicciones pasan por un único hilo que agrupa las solicitudes concurrentes en
+micro-lotes: espera a lo más --espera-ms desde la primera solicitud o hasta
+juntar --max-lote filas, y puntúa todo el lote con una sola llamada a
+predecir.
+
+Endpoints:
+    POST /predecir   {"mes_carga": 6, "sexo": "MACHO", ...}       -> {"ganancia_predicha": 65.9}
+                     {"casos": [{...}, {...}]}  o  [{...}, {...}]  -> {"ganancia_predicha": [..., ...]}
+    GET  /salud      estado y modelo cargado
+    GET  /metricas   percentiles de latencia, tamaño de los lotes y cache
+
+Errores: 400 si la solicitud no es válida (incluye variables nulas), 500 si el modelo falla en esos
+casos y 503 si el micro-lote no responde en TIMEOUT_PREDICCION_S segundos.
+
+Uso:
+    python -m comun.servicio_prediccion produccion03 [--puerto 8035] [--espera-ms 5] [--max-lote 512]
+    python -m comun.servicio_prediccion produccion03 --verificar
+"""
+
+from collections import deque
+from concurrent.futures import Future, TimeoutError as TimeoutFuturo
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import queue
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from comun.predictores import cargar_predictor
+
+
+PUERTO_POR_DEFECTO = 8035
+HISTORIAL_METRICAS = 10_000
+# Conexiones pendientes de accept(): sobre el número de clientes concurrentes y max_lote
+COLA_CONEXIONES = 128
+# Espera máxima de una solicitud por su micro-lote antes de responder 503
+TIMEOUT_PREDICCION_S = 30
+
+
+def _percentiles_ms(valores):
+    if not valores:
+        return None
+    p50, p90, p99 = np.percentile(np.asarray(valores) * 1000, [50, 90, 99])
+    return {'p50': round(p50, 3), 'p90': round(p90, 3), 'p99': round(p99, 3), 'n': len(valores)}
+
+
+class LoteadorPredicciones:
+    """
+    Hilo único que junta solicitudes en micro-lotes y las puntúa juntas
+
+    Cada solicitud es un DataFrame ya validado; el resultado vuelve por un
+    Future con las predicciones de sus filas.
+    """
+
+    def __init__(self, predictor, espera_ms=5, max_lote=512):
+        self.predictor = predictor
+        self.espera = espera_ms / 1000
+        self.max_lote = max_lote
+        self.tamanos_lote = deque(maxlen=HISTORIAL_METRICAS)
+        self._cola = queue.Queue()
+        self._hilo = threading.Thread(target=self._procesar, name='loteador', daemon=True)
+        self._hilo.start()
+
+    def enviar(self, df):
+        """
+        Encolar un DataFrame; devuelve un Future con np.ndarray de predicciones
+
+        Raises:
+            RuntimeError: si el hilo del loteador ya no está activo
+        """
+        if not self._hilo.is_alive():
+            raise RuntimeError('el hilo de predicción no está activo')
+        futuro = Future()
+        self._cola.put((df, futuro))
+        return futuro
+
+    def cerrar(self):
+        self._cola.put(None)
+        self._hilo.join()
+
+    def _procesar(self):
+        activo = True
+        while activo:
+            primero = self._cola.get()
+            if primero is None:
+                break
+            pendientes = [primero]
+            filas = len(primero[0])
+            limite = time.perf_counter() + self.espera
+            while filas < self.max_lote:
+                restante = limite - time.perf_counter()
+                if restante <= 0:
+                    break
+                try:
+                    siguiente = self._cola.get(timeout=restante)
+                except queue.Empty:
+                    break
+                if siguiente is None:
+                    activo = False
+                    break
+                pendientes.append(siguiente)
+                filas += len(siguiente[0])
+            self._puntuar(pendientes)
+
+    def _puntuar(self, pendientes):
+        try:
+            datos = pd.concat([df for df, _ in pendientes], ignore_index=True)
+            predicciones = self.predictor.predecir(datos, mostrar_detalles=False)['ganancia_predicha'].to_numpy()
+        except Exception as e:
+            # Un lote con una solicitud problemática se reintenta de a una para aislarla
+            if len(pendientes) > 1:
+                for pendiente in pendientes:
+                    self._puntuar([pendiente])
+            else:
+                pendientes[0][1].set_exception(e)
+            return
+
+        self.tamanos_lote.append(len(datos))
+        inicio = 0
+        for df, futuro in pendientes:
+            futuro.set_result(predicciones[inicio:inicio + len(df)])
+            inicio += len(df)
+
+
+class _ManejadorPrediccion(BaseHTTPRequestHandler):
+    """Endpoints del servicio; el estado vive en self.server"""
+
+    def log_message(self, formato, *args):
+        pass
+
+    def _responder(self, estado, cuerpo):
+        datos = json.dumps(cuerpo, ensure_ascii=False).encode('utf-8')
+        self.send_response(estado)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def do_GET(self):
+        if self.path == '/salud':
+            self._responder(200, {'estado': 'ok', 'modelo': self.server.predictor.modelo_path})
+        elif self.path == '/metricas':
+            self._responder(200, self.server.metricas())
+        else:
+            self._responder(404, {'error': f'ruta desconocida: {self.path}'})
+
+    def do_POST(self):
+        if self.path != '/predecir':
+            self._responder(404, {'error': f'ruta desconocida: {self.path}'})
+            return
+
+        inicio = time.perf_counter()
+        try:
+            largo = int(self.headers.get('Content-Length', 0))
+            cuerpo = json.loads(self.rfile.read(largo) or b'null')
+            if isinstance(cuerpo, dict) and 'casos' in cuerpo:
+                cuerpo = cuerpo['casos']
+            individual = isinstance(cuerpo, dict)
+            if not individual and not isinstance(cuerpo, list):
+                raise ValueError('se espera un caso (objeto JSON) o una lista de casos')
+            df = pd.DataFrame([cuerpo] if individual else cuerpo)
+            if len(df) == 0:
+                raise ValueError('la solicitud no trae casos')
+        except ValueError as e:
+            self._responder(400, {'error': str(e)})
+            return
+
+        # Validar antes de encolar: una solicitud inválida no debe arrastrar al lote
+        es_valido, mensaje = self.server.predictor.validar_input(df)
+        if not es_valido:
+            self._responder(400, {'error': mensaje})
+            return
+
+        try:
+            futuro = self.server.loteador.enviar(df)
+        except RuntimeError as e:
+            self._responder(503, {'error': str(e)})
+            return
+        try:
+            predicciones = futuro.result(timeout=self.server.timeout_prediccion)
+        except TimeoutFuturo:
+            self._responder(503, {'error': f'sin respuesta del modelo en {self.server.timeout_prediccion}s'})
+            return
+        except Exception as e:
+            self._responder(500, {'error': str(e)})
+            return
+
+        valores = [float(v) for v in predicciones]
+        self._responder(200, {'ganancia_predicha': valores[0] if individual else valores})
+        self.server.registrar_latencia(time.perf_counter() - inicio)
+
+
+class ServicioPrediccion(ThreadingHTTPServer):
+    """Servidor HTTP con el predictor y el loteador compartidos por todas las solicitudes"""
+
+    daemon_threads = True
+    request_queue_size = COLA_CONEXIONES
+
+    def __init__(self, predictor, host='127.0.0.1', puerto=PUERTO_POR_DEFECTO, espera_ms=5, max_lote=512, cola_conexiones=None,
+                 timeout_prediccion=TIMEOUT_PREDICCION_S):
+        # La cola de listen() se fija al activar el socket, dentro de super().__init__
+        self.request_queue_size = max(cola_conexiones or self.request_queue_size, max_lote)
+        super().__init__((host, puerto), _ManejadorPrediccion)
+        self.predictor = predictor
+        self.timeout_prediccion = timeout_prediccion
+        self.loteador = LoteadorPredicciones(predictor, espera_ms=espera_ms, max_lote=max_lote)
+        self.latencias = deque(maxlen=HISTORIAL_METRICAS)
+        self._lock_metricas = threading.Lock()
+
+    def registrar_latencia(self, segundos):
+        with self._lock_metricas:
+            self.latencias.append(segundos)
+
+    def metricas(self):
+        with self._lock_metricas:
+            latencias = list(self.latencias)
+        lotes = list(self.loteador.tamanos_lote)
+        cache = getattr(self.predictor, 'cache', None)
+        return {
+            'latencia_ms': _percentiles_ms(latencias),
+            'lotes': {'n': len(lotes), 'filas_promedio': float(np.mean(lotes)) if lotes else None, 'filas_max': max(lotes, default=None)},
+            'cache': cache.estadisticas() if cache is not None else None,
+        }
+
+    def server_close(self):
+        super().server_close()
+        self.loteador.cerrar()
+
+
+def iniciar_servicio(produccion, modelo_path=None, host='127.0.0.1', puerto=PUERTO_POR_DEFECTO, espera_ms=5, max_lote=512,
+                     cola_conexiones=None):
+    """
+    Cargar el modelo y crear el servidor (sin empezar a atender)
+
+    Returns:
+        ServicioPrediccion; atender con serve_forever()
+    """
+    predictor = cargar_predictor(produccion, modelo_path)
+    # Cargar grilla y modelo ahora y no en la primera solicitud
+    if predictor.grilla is None:
+        predictor.modelo
+    return ServicioPrediccion(predictor, host=host, puerto=puerto, espera_ms=espera_ms, max_lote=max_lote, cola_conexiones=cola_conexiones)
+
+
+def _solicitar(url, cuerpo=None):
+    import urllib.request
+
+    datos = None if cuerpo is None else json.dumps(cuerpo).encode('utf-8')
+    solicitud = urllib.request.Request(url, data=datos, headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(solicitud) as respuesta:
+        return json.loads(respuesta.read())
+
+
+def verificar(produccion='produccion03', modelo_path=None, n=400, concurrencia=32):
+    """
+    Levantar el servicio en localhost, lanzar solicitudes concurrentes y
+    comparar contra el predictor llamado directamente
+
+    Raises:
+        AssertionError: si hubo solicitudes fallidas, diferencias o la
+            solicitud inválida no se rechazó con 400
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    servicio = iniciar_servicio(produccion, modelo_path, puerto=0)
+    hilo = threading.Thread(target=servicio.serve_forever, daemon=True)
+    hilo.start()
+    url = f'http://127.0.0.1:{servicio.server_address[1]}'
+
+    try:
+        rng = np.random.default_rng(0)
+        casos = [{
+            'mes_carga': int(rng.integers(1, 13)),
+            'sexo': str(rng.choice(['HEMBRA', 'MACHO'])),
+            'kilos_recibidos_percapita': round(float(rng.uniform(2.0, 5.0)), 3),
+            'tipoConstruccion': str(rng.choice(['Tradicional', 'Black Out', 'Transversal'])),
+            'densidad_pollos_m2': round(float(rng.uniform(9.0, 50.0)), 2),
+        } for _ in range(n)]
+
+        fallas = []
+
+        def _predecir(cuerpo):
+            try:
+                return _solicitar(f'{url}/predecir', cuerpo)['ganancia_predicha']
+            except Exception as e:
+                fallas.append(f'{type(e).__name__}: {e}')
+                return np.nan if isinstance(cuerpo, dict) else [np.nan] * len(casos)
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrencia) as executor:
+            individuales = list(executor.map(_predecir, casos))
+        segundos = time.perf_counter() - inicio
+        lote = _predecir({'casos': casos})
+
+        esperado = servicio.predictor.predecir(pd.DataFrame(casos), mostrar_detalles=False)['ganancia_predicha'].to_numpy()
+        diferencias = np.abs(np.concatenate([np.array(individuales) - esperado, np.array(lote) - esperado]))
+        diferencia = float(np.nanmax(diferencias)) if not np.isnan(diferencias).all() else np.inf
+
+        try:
+            _solicitar(f'{url}/predecir', dict(casos[0], sexo='OTRO'))
+            rechazo = False
+        except Exception as e:
+            rechazo = getattr(e, 'code', None) == 400
+
+        metricas = _solicitar(f'{url}/metricas')
+    finally:
+        servicio.shutdown()
+        servicio.server_close()
+
+    latencia = metricas['latencia_ms']
+    print(f"\n🌐 {n} solicitudes individuales con {concurrencia} clientes en {segundos:.2f}s ({n / segundos:,.0f} sol/s)")
+    if latencia:
+        print(f"   • Latencia p50 {latencia['p50']:.1f} ms, p90 {latencia['p90']:.1f} ms, p99 {latencia['p99']:.1f} ms")
+    if metricas['lotes']['n']:
+        print(f"   • {metricas['lotes']['n']} lotes, {metricas['lotes']['filas_promedio']:.1f} filas promedio (máx {metricas['lotes']['filas_max']})")
+    print(f"   {'✅' if not fallas else '❌'} Solicitudes fallidas: {len(fallas)} de {n + 1}")
+    for falla, veces in pd.Series(fallas, dtype=object).value_counts().head(5).items():
+        print(f"      - {falla} ({veces}x)")
+    print(f"   {'✅' if diferencia < 1e-9 else '❌'} Diferencia máxima contra predecir directo: {diferencia:.2e}")
+    print(f"   {'✅' if rechazo else '❌'} Solicitud inválida rechazada con 400")
+    if fallas or diferencia >= 1e-9 or not rechazo:
+        raise AssertionError("La verificación del servicio falló (ver detalle arriba)")
+    return metricas
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from comun.servicio_prediccion import COLA_CONEXIONES, iniciar_servicio, verificar
+
+    parser = argparse.ArgumentParser(description='Servicio HTTP local de predicción de ganancia')
+    parser.add_argument('produccion', nargs='?', default='produccion03', help='Carpeta dentro de produccion/')
+    parser.add_argument('--modelo', help='Ruta del modelo sin .pkl (por defecto la del predictor)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=PUERTO_POR_DEFECTO)
+    parser.add_argument('--espera-ms', type=float, default=5, help='Espera máxima para juntar un micro-lote')
+    parser.add_argument('--max-lote', type=int, default=512, help='Filas máximas por micro-lote')
+    parser.add_argument('--cola-conexiones', type=int, default=None,
+                        help=f'Conexiones pendientes aceptadas por el socket (por defecto {COLA_CONEXIONES}, al menos --max-lote)')
+    parser.add_argument('--verificar', action='store_true', help='Prueba en localhost contra el predictor directo')
+    args = parser.parse_args()
+
+    if args.verificar:
+        try:
+            verificar(args.produccion, args.modelo)
+        except AssertionError as e:
+            raise SystemExit(f"❌ {e}")
+    else:
+        servicio = iniciar_servicio(args.produccion, args.modelo, args.host, args.puerto, args.espera_ms, args.max_lote, args.cola_conexiones)
+        print(f"🌐 Servicio de predicción en http://{args.host}:{servicio.server_address[1]} (Ctrl+C para detener)")
+        try:
+            servicio.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            servicio.server_close()
@@ -0,0 +1,192 @@
+"""
+TRANSFORMACIÓN DE FEATURES
+==========================
+
+Feature engineering de los modelos de ganancia (sección 6 de
+analisis/modelo02|03/analisis_modelamiento_limpio.py), compartido por el
+entrenamiento, PredictorGanancia (produccion01/03), 04_proyeccion_ganancias.py,
+el scorer compilado y la grilla de predicción:
+
+- mes_sin, mes_cos: sin/cos(2π·mes/12), desde una tabla precalculada de 13
+  valores (meses enteros 0-12); otros valores usan la fórmula
+- alimento_por_densidad: kilos_recibidos_percapita / densidad_pollos_m2
+- densidad_categoria: Baja/Media/Alta/Muy_Alta con los intervalos de
+  pd.cut(bins=[0, 13, 15, 20, 50]), resuelto con np.searchsorted
+
+Cada feature se escribe una vez en su arreglo de salida (out=), sin copiar
+el frame de entrada ni crear temporales por operación. El resultado lleva las
+variables base del modelo como referencias a las columnas de entrada más las
+cuatro features.
+
+Uso (paridad contra la implementación original con pandas):
+    python -m comun.transformacion_features [--csv work_data/resumen_crianzas_para_modelo3.csv]
+"""
+
+import numpy as np
+import pandas as pd
+
+
+# Variables base que usan las features y el modelo
+COLUMNAS_BASE = ['mes_carga', 'sexo', 'kilos_recibidos_percapita', 'tipoConstruccion', 'densidad_pollos_m2']
+FEATURES_DERIVADAS = ['mes_sin', 'mes_cos', 'alimento_por_densidad', 'densidad_categoria']
+
+# Intervalos (a, b] de densidad_categoria
+LIMITES_DENSIDAD = (0.0, 13.0, 15.0, 20.0, 50.0)
+CORTES_DENSIDAD = LIMITES_DENSIDAD[1:-1]
+CATEGORIAS_DENSIDAD = ['Baja', 'Media', 'Alta', 'Muy_Alta']
+
+
+def _valores(serie):
+    """Arreglo float de una columna (sin copia si ya es float64)"""
+    return serie.to_numpy(dtype=float, na_value=np.nan)
+
+
+class TransformacionFeatures:
+    """
+    Transformación de features con tablas precalculadas
+
+    Sin estado por lote: una instancia se comparte entre hilos.
+    """
+
+    def __init__(self):
+        meses = np.arange(13)
+        # Misma expresión que la fórmula, así los meses enteros dan los mismos bits
+        self._tabla_sin = np.sin(2 * np.pi * meses / 12)
+        self._tabla_cos = np.cos(2 * np.pi * meses / 12)
+        self._cortes = np.asarray(CORTES_DENSIDAD)
+        self._tipo_categoria = pd.CategoricalDtype(CATEGORIAS_DENSIDAD, ordered=True)
+
+    def _mes(self, mes, mes_sin, mes_cos):
+        finitos = np.isfinite(mes)
+        indice = mes.astype(np.intp) if finitos.all() else np.where(finitos, mes, -1).astype(np.intp)
+        enteros = (indice == mes) & (indice >= 0) & (indice <= 12)
+        if enteros.all():
+            np.take(self._tabla_sin, indice, out=mes_sin)
+            np.take(self._tabla_cos, indice, out=mes_cos)
+            return
+        # Meses no enteros o nulos (p.ej. antes de validar): fórmula
+        angulo = 2 * np.pi * mes / 12
+        np.sin(angulo, out=mes_sin)
+        np.cos(angulo, out=mes_cos)
+        mes_sin[enteros] = self._tabla_sin[indice[enteros]]
+        mes_cos[enteros] = self._tabla_cos[indice[enteros]]
+
+    def _densidad_categoria(self, densidad):
+        codigos = np.searchsorted(self._cortes, densidad, side='left').astype(np.int8)
+        # pd.cut deja NaN fuera de (0, 50] y en densidades nulas
+        codigos[~((densidad > LIMITES_DENSIDAD[0]) & (densidad <= LIMITES_DENSIDAD[-1]))] = -1
+        return pd.Categorical.from_codes(codigos, dtype=self._tipo_categoria)
+
+    def transformar(self, datos, conservar=()):
+        """
+        Features del modelo para un lote
+
+        Args:
+            datos: DataFrame con las variables base (no se modifica ni se copia)
+            conservar: Columnas adicionales de datos a incluir (p.ej. el target al entrenar)
+
+        Returns:
+            DataFrame con las columnas de datos que están en COLUMNAS_BASE o en
+            conservar (en el orden de datos) más FEATURES_DERIVADAS
+        """
+        n = len(datos)
+        mes = _valores(datos['mes_carga'])
+        kilos = _valores(datos['kilos_recibidos_percapita'])
+        densidad = _valores(datos['densidad_pollos_m2'])
+
+        mes_sin = np.empty(n)
+        mes_cos = np.empty(n)
+        alimento_por_densidad = np.empty(n)
+        self._mes(mes, mes_sin, mes_cos)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            np.divide(kilos, densidad, out=alimento_por_densidad)
+
+        incluidas = set(COLUMNAS_BASE).union(conservar)
+        columnas = {c: datos[c] for c in datos.columns if c in incluidas}
+        columnas['mes_sin'] = mes_sin
+        columnas['mes_cos'] = mes_cos
+        columnas['alimento_por_densidad'] = alimento_por_densidad
+        columnas['densidad_categoria'] = self._densidad_categoria(densidad)
+        return pd.DataFrame(columnas, index=datos.index, copy=False)
+
+    __call__ = transformar
+
+
+# Instancia compartida
+TRANSFORMACION = TransformacionFeatures()
+
+
+def preparar_features(datos, conservar=()):
+    """Aplicar el mismo feature engineering que en entrenamiento (TRANSFORMACION)"""
+    return TRANSFORMACION.transformar(datos, conservar)
+
+
+def _features_referencia(df):
+    """Implementación original con pandas (df.copy() + pd.cut), solo para verificar paridad"""
+    df = df.copy()
+    df['mes_sin'] = np.sin(2 * np.pi * df['mes_carga'] / 12)
+    df['mes_cos'] = np.cos(2 * np.pi * df['mes_carga'] / 12)
+    df['alimento_por_densidad'] = df['kilos_recibidos_percapita'] / df['densidad_pollos_m2']
+    df['densidad_categoria'] = pd.cut(df['densidad_pollos_m2'], bins=list(LIMITES_DENSIDAD), labels=CATEGORIAS_DENSIDAD)
+    return df
+
+
+def _casos_borde(n=100_000, semilla=0):
+    """Casos al azar más bordes de los intervalos, meses no enteros y nulos"""
+    rng = np.random.default_rng(semilla)
+    casos = pd.DataFrame({
+        'mes_carga': rng.integers(1, 13, n),
+        'sexo': rng.choice(['MACHO', 'HEMBRA'], n),
+        'kilos_recibidos_percapita': rng.uniform(1, 6, n),
+        'tipoConstruccion': rng.choice(['Tradicional', 'Black Out', 'Transversal'], n),
+        'densidad_pollos_m2': rng.uniform(-5, 60, n),
+    })
+    bordes = np.array([0.0, 1e-9, 13.0, 13.000001, 15.0, 15.0000001, 20.0, 20.5, 50.0, 50.0000001, -1.0, 0.0, np.nan, np.inf])
+    meses = np.array([1, 12, 6.5, 0, 13, np.nan, 3, 7, 11, 2, 4, 5, 8, 9])
+    extra = pd.DataFrame({
+        'mes_carga': meses,
+        'sexo': 'MACHO',
+        'kilos_recibidos_percapita': np.r_[3.0, 0.0, np.nan, np.full(len(bordes) - 3, 3.5)],
+        'tipoConstruccion': 'Black Out',
+        'densidad_pollos_m2': bordes,
+    })
+    return casos, extra
+
+
+def verificar_paridad(datos=None):
+    """
+    Comparar TRANSFORMACION contra la implementación original con pandas
+
+    Args:
+        datos: DataFrame a comparar; por defecto casos al azar (meses enteros) y
+            un lote con bordes, meses no enteros y nulos
+
+    Returns:
+        True si todas las features coinciden bit a bit (mismo dtype y categorías)
+
+    Raises:
+        AssertionError: con la primera feature que difiere
+    """
+    lotes = [datos] if datos is not None else list(_casos_borde())
+    for lote in lotes:
+        esperado = _features_referencia(lote)
+        obtenido = preparar_features(lote, conservar=lote.columns)
+        pd.testing.assert_frame_equal(obtenido, esperado[list(obtenido.columns)], check_exact=True)
+        print(f"   ✓ {len(lote):,} filas: {', '.join(FEATURES_DERIVADAS)} idénticas")
+    return True
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from comun.transformacion_features import verificar_paridad
+
+    parser = argparse.ArgumentParser(description='Paridad de la transformación de features contra la implementación original')
+    parser.add_argument('--csv', default=None, help='CSV de entrenamiento a comparar además de los casos sintéticos')
+    args = parser.parse_args()
+
+    print("🔍 Verificando paridad de features...")
+    verificar_paridad()
+    if args.csv:
+        verificar_paridad(pd.read_csv(args.csv))
+    print("✅ Paridad OK")
@@ -0,0 +1,149 @@
+"""
+VALIDACIÓN DE ENTRADA
+=====================
+
+Validación por fila de las variables de los modelos de ganancia, compartida
+por PredictorGanancia y 04_proyeccion_ganancias.py.
+
+validar_filas recorre el frame una sola vez y sin copiarlo:
+
+- categóricas: un pd.factorize por columna; el código -1 marca los nulos y
+  la pertenencia se resuelve sobre los valores distintos y se reparte por código
+- numéricas: todas juntas en una matriz (n, k); los nulos son NaN y los rangos
+  se comparan contra los vectores de mínimos y máximos
+
+El resultado es una matriz booleana fila x control, de modo que el llamador
+decide si rechaza el lote completo o solo las filas con error.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class ValidacionFilas:
+    """
+    Resultado de validar_filas
+
+    Los controles se llaman '<variable>: nulo', '<variable>: valor inválido' y
+    '<variable>: fuera de rango'; errores los entrega como DataFrame booleano con
+    el mismo índice que los datos validados.
+    """
+
+    def __init__(self, datos, controles, valores_validos, rangos_validos):
+        self._datos = datos
+        self._controles = controles
+        self._valores_validos = valores_validos
+        self._rangos_validos = rangos_validos
+        self._invalidas = np.logical_or.reduce(list(controles.values())) if controles else np.zeros(len(datos), dtype=bool)
+
+    @property
+    def errores(self):
+        """DataFrame booleano fila x control (se arma solo si se pide)"""
+        return pd.DataFrame(self._controles, index=self._datos.index)
+
+    @property
+    def invalidas(self):
+        """np.ndarray booleano: filas con al menos un error"""
+        return self._invalidas
+
+    @property
+    def validas(self):
+        return ~self._invalidas
+
+    @property
+    def es_valido(self):
+        return not self._invalidas.any()
+
+    def motivos(self):
+        """
+        Series con los controles fallidos de cada fila inválida, separados por '; '
+        (índice = filas inválidas)
+        """
+        nombres = np.array(list(self._controles), dtype=object)
+        matriz = np.column_stack([mascara[self._invalidas] for mascara in self._controles.values()])
+        return pd.Series(['; '.join(nombres[fila]) for fila in matriz], index=self._datos.index[self._invalidas], dtype=object)
+
+    def mensajes(self):
+        """Un mensaje por control con errores, con los valores que lo provocan"""
+        mensajes = []
+        for control, mascara in self._controles.items():
+            n = int(mascara.sum())
+            if n == 0:
+                continue
+            var, tipo = control.split(': ')
+            columna = self._datos[var]
+            if tipo == 'valor inválido' and var in self._valores_validos:
+                invalidos = set(columna[mascara].unique())
+                mensajes.append(f"Valores inválidos en {var}: {invalidos}. Valores válidos: {self._valores_validos[var]} ({n:,} filas)")
+            elif tipo == 'fuera de rango':
+                min_val, max_val = self._rangos_validos[var]
+                numerica = pd.to_numeric(columna, errors='coerce')
+                mensajes.append(f"{var} fuera de rango [{min_val}, {max_val}]. Valores: {numerica.min()}-{numerica.max()} ({n:,} filas)")
+            else:
+                mensajes.append(f"{var}: {tipo} ({n:,} filas)")
+        return mensajes
+
+
+def _columna_numerica(serie):
+    """Valores float de una columna; los no numéricos quedan NaN"""
+    if not pd.api.types.is_numeric_dtype(serie):
+        serie = pd.to_numeric(serie, errors='coerce')
+    return serie.to_numpy(dtype=float, na_value=np.nan)
+
+
+def validar_filas(datos, variables_requeridas, valores_validos, rangos_validos):
+    """
+    Validar todas las filas y variables en una pasada
+
+    Args:
+        datos: DataFrame (no se modifica ni se copia)
+        variables_requeridas: Columnas que deben existir y no ser nulas
+        valores_validos: dict variable -> lista de categorías válidas
+        rangos_validos: dict variable -> (mínimo, máximo), inclusivo
+
+    Returns:
+        ValidacionFilas
+
+    Raises:
+        ValueError: si falta alguna variable requerida (error del lote, no de filas)
+    """
+    faltantes = [var for var in variables_requeridas if var not in datos.columns]
+    if faltantes:
+        raise ValueError(f"Falta la variable requerida: {', '.join(faltantes)}")
+
+    nulos = {}
+    invalidos = {}
+
+    for var, valores in valores_validos.items():
+        codigos, unicos = pd.factorize(datos[var])
+        nulos[var] = codigos == -1
+        # Una entrada por valor distinto; la última cubre el código -1 (nulo, no inválido)
+        permitido = np.append(pd.Index(unicos).isin(valores), True)
+        invalidos[var] = ~permitido[codigos]
+
+    fuera_rango = {}
+    numericas = [var for var in rangos_validos if var not in valores_validos]
+    if numericas:
+        matriz = np.column_stack([_columna_numerica(datos[var]) for var in numericas])
+        minimos = np.array([rangos_validos[var][0] for var in numericas], dtype=float)
+        maximos = np.array([rangos_validos[var][1] for var in numericas], dtype=float)
+        sin_valor = np.isnan(matriz)
+        fuera = (matriz < minimos) | (matriz > maximos)
+        for i, var in enumerate(numericas):
+            if pd.api.types.is_numeric_dtype(datos[var]):
+                nulos[var] = sin_valor[:, i]
+            else:
+                nulos[var] = datos[var].isna().to_numpy()
+                invalidos[var] = sin_valor[:, i] & ~nulos[var]
+            fuera_rango[var] = fuera[:, i]
+
+    controles = {}
+    for var in variables_requeridas:
+        controles[f'{var}: nulo'] = nulos[var] if var in nulos else datos[var].isna().to_numpy()
+    for var, mascara in invalidos.items():
+        if var in valores_validos or mascara.any():
+            controles[f'{var}: valor inválido'] = mascara
+    for var, mascara in fuera_rango.items():
+        controles[f'{var}: fuera de rango'] = mascara
+
+    return ValidacionFilas(datos, controles, valores_validos, rangos_validos)
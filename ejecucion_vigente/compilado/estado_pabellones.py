@@ -0,0 +1,98 @@
+"""
+ESTADO DE PABELLONES
+====================
+
+Carga de los workbooks de estado de pabellones de info_general
+(status_pabellones_{sector}_{crianza}.xlsx) compartida por compilado_01.py y
+compilado_02.py.
+
+Los workbooks se leen en paralelo y pasan por el cache de comun.cache_fuentes
+(clave = sha256 del archivo), así que un archivo que no cambió se vuelve a
+leer desde Parquet. Los encabezados se asignan por nombre normalizado y no por
+posición: 'Edad\\nProy.' y 'Edad Proy.' quedan ambos como 'edad proy', sin
+importar qué columnas de detalle traiga cada exportación.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import os
+
+import pandas as pd
+
+from comun.cache_fuentes import leer_excel_cacheado
+from comun.normalizacion import uniformar_strings
+
+
+COLUMNAS_REQUERIDAS = ['pab', 'fpartida', 'tanimal', 'sexo', 'edad proy']
+
+# Variantes de encabezado vistas en las exportaciones
+ALIAS_COLUMNAS = {
+    'mortalidad': 'mort',
+    'necropsia': 'necr',
+}
+
+
+def nombre_columna(encabezado):
+    """Nombre normalizado de un encabezado del workbook"""
+    nombre = uniformar_strings(str(encabezado))
+    return ALIAS_COLUMNAS.get(nombre, nombre)
+
+
+def _sin_repetidos(nombres):
+    """Sufijo .1, .2, ... para nombres que coinciden al normalizar (p.ej. 'AJU +' y 'AJU -')"""
+    vistos = {}
+    resultado = []
+    for nombre in nombres:
+        if nombre in vistos:
+            vistos[nombre] += 1
+            nombre = f'{nombre}.{vistos[nombre]}'
+        else:
+            vistos[nombre] = 0
+        resultado.append(nombre)
+    return resultado
+
+
+def leer_estado_archivo(ruta):
+    """
+    Leer un workbook de estado de pabellones
+
+    Returns:
+        DataFrame con encabezados normalizados, nombre_sector,
+        nombre_sector_code y nro_crianza
+    """
+    archivo = os.path.basename(ruta)
+    nombre_sector = archivo.split('_')[2]
+    nro_crianza = int(archivo.split('_')[3].split('.')[0])
+
+    # El encabezado está en la fila 2; la primera columna con nombre es un correlativo
+    df = leer_excel_cacheado(ruta, header=1)
+    columnas = [c for c in df.columns if 'Unnamed' not in str(c)][1:]
+    df = df[columnas]
+    df.columns = _sin_repetidos([nombre_columna(c) for c in columnas])
+
+    faltantes = [c for c in COLUMNAS_REQUERIDAS if c not in df.columns]
+    if faltantes:
+        raise ValueError(f"{archivo}: faltan las columnas {faltantes} (encabezados: {columnas})")
+
+    df = df[~df['tanimal'].isna()].copy()
+    df['fpartida'] = pd.to_datetime(df['fpartida'], format='%d/%m/%y')
+    df['nombre_sector'] = nombre_sector
+    df['nombre_sector_code'] = uniformar_strings(nombre_sector)
+    df['nro_crianza'] = nro_crianza
+    return df
+
+
+def cargar_estado_pabellones(directorio, workers=4):
+    """
+    Estado actual de todos los pabellones de info_general
+
+    Args:
+        directorio: Carpeta info_general
+        workers: Hilos de lectura
+
+    Returns:
+        DataFrame concatenado en el orden de listado de la carpeta
+    """
+    rutas = [os.path.join(directorio, f) for f in os.listdir(directorio) if 'pabellones' in f]
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        tablas = list(executor.map(leer_estado_archivo, rutas))
+    return pd.concat(tablas, ignore_index=True)
@@ -0,0 +1,216 @@
+"""
+MOTOR DEL COMPILADO
+===================
+
+Funciones compartidas por compilado_01.py y compilado_02.py para armar la
+proyección diaria de peso por pabellón a partir del estado actual de los
+pabellones y de la ganancia proyectada por el modelo.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import os
+
+import numpy as np
+import pandas as pd
+
+from comun.cache_fuentes import leer_excel_cacheado
+
+
+CLAVES_PABELLON = ['nombre_sector_code', 'nro_crianza', 'nro_pabellon']
+COLUMNAS_PABELLON = ['nombre_sector', 'nombre_sector_code', 'nro_crianza', 'nro_pabellon', 'sexo']
+EDAD_MAXIMA = 50
+COLUMNAS_PROYECCION = ['fecha', 'edad', 'cumplimiento_consumo', 'consumo_estandar_edad', 'proyeccion_consumo', 'proyeccion_peso']
+
+
+def asignar_ganancia(df_pabellones, df_proyecciones_ganancia):
+    """
+    Agregar la ganancia proyectada a cada pabellón con un único join
+
+    Si una clave aparece repetida en las proyecciones se usa la primera
+    ocurrencia, igual que el filtro original con .values[0].
+
+    Args:
+        df_pabellones: DataFrame con nombre_sector_code, nro_crianza, nro_pabellon
+        df_proyecciones_ganancia: DataFrame con nombre_sector_code, nro_crianza,
+            Pabellón y ganancia_proyectada
+
+    Returns:
+        tuple: (pabellones con ganancia_proyectada, pabellones sin proyección)
+    """
+    df_ganancia = df_proyecciones_ganancia[['nombre_sector_code', 'nro_crianza', 'Pabellón', 'ganancia_proyectada']].rename(columns={'Pabellón': 'nro_pabellon'})
+    df_ganancia = df_ganancia.dropna(subset=CLAVES_PABELLON).astype({'nro_crianza': 'int64', 'nro_pabellon': 'int64'})
+    df_ganancia = df_ganancia.drop_duplicates(subset=CLAVES_PABELLON, keep='first')
+
+    df = df_pabellones.astype({'nro_crianza': 'int64', 'nro_pabellon': 'int64'}).merge(df_ganancia, on=CLAVES_PABELLON, how='left', validate='many_to_one')
+    df.index = df_pabellones.index
+
+    sin_proyeccion = df['ganancia_proyectada'].isna()
+    return df[~sin_proyeccion], df.loc[sin_proyeccion, CLAVES_PABELLON]
+
+
+def reportar_sin_proyeccion(df_sin_proyeccion):
+    """Informar los pabellones que quedan fuera por no tener ganancia proyectada"""
+    if df_sin_proyeccion.empty:
+        return
+    print(f"Pabellones sin ganancia proyectada ({len(df_sin_proyeccion)}), se omiten:")
+    for nombre_sector_code, nro_crianza, nro_pabellon in df_sin_proyeccion.itertuples(index=False):
+        print('   ', nombre_sector_code, nro_crianza, nro_pabellon)
+
+
+def expandir_proyeccion(df_pabellones, fecha_actual, edad_maxima=EDAD_MAXIMA):
+    """
+    Expandir cada pabellón a una fila por día futuro hasta edad_maxima
+
+    Un pabellón con edad actual e genera las edades e+1 ... edad_maxima con
+    fechas fecha_actual + 1, + 2, ... días y peso proyectado ganancia * edad.
+    Las filas se arman con np.repeat sobre el total de días, sin recorrer los
+    pabellones en Python.
+
+    Args:
+        df_pabellones: DataFrame con COLUMNAS_PABELLON, edad_actual y ganancia_proyectada
+        fecha_actual: Fecha de la corrida (str o Timestamp)
+        edad_maxima: Última edad proyectada
+
+    Returns:
+        DataFrame largo (pabellón x día futuro) con fecha, edad, columnas de
+        consumo en 0 y proyeccion_peso
+    """
+    edades_actuales = df_pabellones['edad_actual'].to_numpy().astype(np.int64)
+    dias_por_pabellon = np.clip(edad_maxima - edades_actuales, 0, None)
+    posicion = np.repeat(np.arange(len(df_pabellones)), dias_por_pabellon)
+    # Día 1, 2, ... dentro de cada pabellón
+    inicio = np.repeat(np.cumsum(dias_por_pabellon) - dias_por_pabellon, dias_por_pabellon)
+    dia = np.arange(len(posicion), dtype=np.int64) - inicio + 1
+
+    edad = edades_actuales[posicion] + dia
+    df = df_pabellones[COLUMNAS_PABELLON].iloc[posicion].reset_index(drop=True)
+    df['fecha'] = pd.to_datetime(fecha_actual) + pd.to_timedelta(dia, unit='D')
+    df['edad'] = edad
+    df['cumplimiento_consumo'] = 0
+    df['consumo_estandar_edad'] = 0
+    df['proyeccion_consumo'] = 0
+    df['proyeccion_peso'] = df_pabellones['ganancia_proyectada'].to_numpy()[posicion] * edad
+    return df
+
+
+def formatear_proyeccion(df_final):
+    """
+    Formato ancho del compilado: tres filas por pabellón (Edad, Consumo
+    Alimento, Proyeccion Peso) y una columna por fecha
+
+    Los pabellones salen agrupados por sector y crianza en orden de aparición
+    y ordenados por número; las columnas de fecha en orden de aparición. Cada
+    valor se ubica con un único scatter (grupo, fecha) sobre una matriz, sin
+    refiltrar el pabellón por fecha.
+
+    Args:
+        df_final: DataFrame largo con CLAVES_PABELLON, fecha, edad,
+            proyeccion_consumo y proyeccion_peso (gramos)
+
+    Returns:
+        DataFrame con ratio, pabellon, etapa, subzona, grupo y una columna por fecha
+    """
+    df = df_final[CLAVES_PABELLON + ['fecha', 'edad', 'proyeccion_consumo', 'proyeccion_peso']].copy()
+    df['fecha'] = pd.to_datetime(df['fecha']).dt.strftime('%Y-%m-%d')
+    df['_orden_sector'] = pd.factorize(df['nombre_sector_code'])[0]
+    df['_orden_crianza'] = pd.factorize(pd.MultiIndex.from_frame(df[['nombre_sector_code', 'nro_crianza']]))[0]
+    df = df.sort_values(['_orden_sector', '_orden_crianza', 'nro_pabellon'], kind='stable')
+    # Si una fecha se repite en un pabellón vale la primera fila, como en el filtro original
+    df = df.drop_duplicates(CLAVES_PABELLON + ['fecha'], keep='first')
+
+    grupo, pabellones = pd.factorize(pd.MultiIndex.from_frame(df[CLAVES_PABELLON]))
+    columna, fechas = pd.factorize(df['fecha'])
+
+    valores = np.full((3 * len(pabellones), len(fechas)), None, dtype=object)
+    valores[3 * grupo, columna] = df['edad'].astype(np.int64).to_numpy().astype(object)
+    valores[3 * grupo + 1, columna] = df['proyeccion_consumo'].astype(float).to_numpy().astype(object)
+    valores[3 * grupo + 2, columna] = (df['proyeccion_peso'] / 1000).astype(float).to_numpy().astype(object)
+
+    df_formateado = pd.DataFrame(valores, columns=list(fechas))
+    df_formateado.insert(0, 'ratio', np.tile(['Edad', 'Consumo Alimento', 'Proyeccion Peso'], len(pabellones)))
+    df_formateado.insert(1, 'pabellon', np.repeat(pabellones.get_level_values(2).to_numpy(), 3))
+    df_formateado.insert(2, 'etapa', 'Broiler')
+    df_formateado.insert(3, 'subzona', '')
+    df_formateado.insert(4, 'grupo', np.repeat(pabellones.get_level_values(0).to_numpy(), 3))
+    return df_formateado
+
+
+class ProyeccionesSilos:
+    """
+    Proyecciones oficiales con silos (proyecciones_{sector}_{crianza}_sin_formatear.xlsx)
+
+    La carpeta se lista una sola vez y cada workbook de las unidades pedidas se
+    lee una sola vez, en paralelo y pasando por el cache de comun.cache_fuentes.
+    Las filas quedan en una tabla larga con nombre_sector y nro_crianza, y
+    pabellon() las entrega por (sector, crianza, pabellón) sin volver a filtrar.
+    """
+
+    def __init__(self, directorio, unidades, workers=4):
+        """
+        Args:
+            directorio: Carpeta de proyecciones oficiales
+            unidades: Iterable de (nombre_sector, nro_crianza) a buscar
+            workers: Hilos de lectura
+        """
+        archivos = set(os.listdir(directorio)) if os.path.isdir(directorio) else set()
+        unidades = [u for u in dict.fromkeys((s, int(c)) for s, c in unidades) if self.nombre_archivo(*u) in archivos]
+
+        def _leer(unidad):
+            df = leer_excel_cacheado(os.path.join(directorio, self.nombre_archivo(*unidad)))
+            df = df.dropna(subset=['nro_pabellon'])[['nro_pabellon'] + COLUMNAS_PROYECCION]
+            df.insert(0, 'nombre_sector', unidad[0])
+            df.insert(1, 'nro_crianza', unidad[1])
+            return df.astype({'nro_pabellon': 'int64'})
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            tablas = list(executor.map(_leer, unidades))
+
+        columnas = ['nombre_sector', 'nro_crianza', 'nro_pabellon'] + COLUMNAS_PROYECCION
+        self.tabla = pd.concat(tablas, ignore_index=True) if tablas else pd.DataFrame(columns=columnas)
+        self._indice = self.tabla.groupby(['nombre_sector', 'nro_crianza', 'nro_pabellon'], sort=False).indices
+
+    @staticmethod
+    def nombre_archivo(nombre_sector, nro_crianza):
+        return f'proyecciones_{nombre_sector}_{nro_crianza}_sin_formatear.xlsx'
+
+    def pabellon(self, nombre_sector, nro_crianza, nro_pabellon):
+        """Filas de silos de un pabellón (vacío si no tiene)"""
+        posiciones = self._indice.get((nombre_sector, int(nro_crianza), int(nro_pabellon)))
+        if posiciones is None:
+            return self.tabla.iloc[:0]
+        return self.tabla.iloc[posiciones]
+
+
+def incorporar_silos(df_proyecciones_general, df_status_pabellones, silos):
+    """
+    Reemplazar la proyección del modelo por la de silos donde exista
+
+    Los pabellones del estado actual se cruzan con la tabla de silos en un solo
+    join; los pabellones con filas de silos se eliminan de la proyección
+    general con un anti-join y sus filas de silos (peso en kg, se pasa a
+    gramos) se agregan al final en el orden del estado actual.
+
+    Args:
+        df_proyecciones_general: Proyección expandida del modelo
+        df_status_pabellones: DataFrame con COLUMNAS_PABELLON de todos los pabellones vigentes
+        silos: ProyeccionesSilos
+
+    Returns:
+        DataFrame largo con ambas proyecciones
+    """
+    df_status = df_status_pabellones[COLUMNAS_PABELLON].astype({'nro_crianza': 'int64', 'nro_pabellon': 'int64'})
+    df_status['_orden'] = np.arange(len(df_status))
+    df_silos = silos.tabla.assign(_orden_silo=np.arange(len(silos.tabla)))
+    df_silos = df_status.merge(df_silos, on=['nombre_sector', 'nro_crianza', 'nro_pabellon'], how='inner')
+    df_silos = df_silos.sort_values(['_orden', '_orden_silo'], kind='stable')
+
+    df_reemplazados = df_silos.drop_duplicates('_orden')[CLAVES_PABELLON]
+    for nombre_sector_code, nro_crianza, nro_pabellon in df_reemplazados.itertuples(index=False):
+        print('proyeccion de pabellón con silos existe: ', nombre_sector_code, nro_crianza, nro_pabellon)
+
+    df_general = df_proyecciones_general.merge(df_reemplazados.drop_duplicates(), on=CLAVES_PABELLON, how='left', indicator=True)
+    df_general = df_general[df_general['_merge'] == 'left_only'].drop(columns='_merge')
+
+    df_silos = df_silos[COLUMNAS_PABELLON + COLUMNAS_PROYECCION].reset_index(drop=True)
+    df_silos['proyeccion_peso'] = df_silos['proyeccion_peso'] * 1000
+    return pd.concat([df_general, df_silos], ignore_index=True)
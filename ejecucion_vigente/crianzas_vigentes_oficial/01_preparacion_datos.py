@@ -1,109 +1,54 @@
-from pkg_sap_agrosuper import resumen_documentos
-import pandas as pd
-import unicodedata
-import re
-import os
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
 
+from ingesta_crianzas import listar_unidades, ejecutar_ingesta, clave_unidad, split_filename
+from almacen_resumenes import existe_dataset, escribir_particiones, eliminar_particiones, reemplazar_dataset
+from manifiesto_fuentes import cargar_manifiesto, guardar_manifiesto, huella_unidad, detectar_cambios
+import argparse
 
-def uniformar_strings(input_str, remove_accents=True):
-    nfkd_form = unicodedata.normalize('NFKD', input_str)
-    s = ''.join(c for c in nfkd_form if not unicodedata.combining(c))
-    s = re.sub(r'[^\w\s]', '', s)
-    s = re.sub(r'\s+', ' ', s).strip()
-    return s.lower()
 
-
-def split_filename(categoria_param, filename_param):
-    if categoria_param == 'cargado_pabellones':
-        return {'nombre_sector': filename_param.split('_')[1], 'nro_crianza': int(filename_param.split('_')[2].split('.')[0])}
-    elif categoria_param == 'guias_alimento':
-        return {'nombre_sector': filename_param.split('_')[2], 'nro_crianza': int(filename_param.split('_')[3].split('.')[0])}
-    elif categoria_param == 'cierre_final':
-        return {'nombre_sector': filename_param.split('_')[2], 'nro_crianza': int(filename_param.split('_')[3].split('.')[0])}
-    elif categoria_param == 'salidas_faena':
-        return {'nombre_sector': filename_param.split('_')[1], 'nro_crianza': int(filename_param.split('_')[2].split('.')[0])}
-    elif categoria_param == 'mortalidad':
-        return {'nombre_sector': filename_param.split('_')[1], 'nro_crianza': int(filename_param.split('_')[2].split('.')[0])}
-    else:
-        raise ValueError(f"Categoria {categoria_param} no reconocida")
-
-
-REGENERAR_DATOS = True
 base_path = r'C:\repositorio_data\crianza_web_pollos_vigentes'
+DATA_DIR = r'..\data'
+MANIFIESTO_PATH = r'..\data\manifiesto_fuentes.json'
 
-if REGENERAR_DATOS:
-
-    lista_resumenes_crianza = []
-    lista_cargado_alimento = []
 
-    files_cargado_pabellones = os.listdir(fr"{base_path}\cargado_pabellones")
-    for archivo_cargado in files_cargado_pabellones:
-        nombre_sector = split_filename('cargado_pabellones', archivo_cargado)['nombre_sector']
-
-        nro_crianza = split_filename('cargado_pabellones', archivo_cargado)['nro_crianza']
-
-        try:
-            df_guias_alimento_check = pd.read_html(fr"{base_path}\guias_alimento\guias_alimento_{nombre_sector}_{nro_crianza}.xls", skiprows=2, header=0, thousands='.')[0]
-        except Exception as e:
-            print(f"Archivo de guias de alimento para {nombre_sector} crianza {nro_crianza} no encontrado, se omite.")
-            continue
+def main():
+    parser = argparse.ArgumentParser(description='Preparación de resúmenes de crianzas vigentes')
+    parser.add_argument('--workers', type=int, default=1, help='Procesos para leer las crianzas en paralelo (1 = serial)')
+    parser.add_argument('--regenerar', action='store_true', help='Ignorar el manifiesto y releer todas las crianzas')
+    args = parser.parse_args()
 
-        df_cargado_pabellones_sector_crianza = pd.read_excel(fr"{base_path}\cargado_pabellones\{archivo_cargado}", skiprows=6)
-        if df_cargado_pabellones_sector_crianza.empty:
-            print(f"Archivo de cargado para {nombre_sector} crianza {nro_crianza} está vacío, se omite.")
-            continue
-        df_file_encabezado = pd.read_excel(fr"{base_path}\cargado_pabellones\{archivo_cargado}", nrows=5, usecols="A:B")
-        if len(list(df_cargado_pabellones_sector_crianza.columns)) == 12:
-            df_cargado_pabellones_sector_crianza['nombre_sector'] = nombre_sector
-            df_cargado_pabellones_sector_crianza['nro_crianza'] = nro_crianza
-            df_cargado_pabellones_sector_crianza['Fecha Guía'] = pd.to_datetime(df_cargado_pabellones_sector_crianza['Fecha Guía'], format='%Y-%m-%d', errors='coerce')
-        else:
-            raise ValueError(f"...... Archivo {archivo_cargado} con problemas .........")
-        df_cargado_pabellones_sector_crianza_resumen = resumen_documentos.resumen_carga_pabellones_pollos(df_cargado_pabellones_sector_crianza)
-        df_cargado_pabellones_sector_crianza_resumen['nombre_sector_code'] = df_cargado_pabellones_sector_crianza_resumen['nombre_sector'].apply(uniformar_strings)
-        df_cargado_pabellones_sector_crianza_resumen = df_cargado_pabellones_sector_crianza_resumen[['nombre_sector', 'nombre_sector_code', 'nro_crianza', 'Pabellón', 'Cantidad Total', 'Fecha Guía Inicio', 'Fecha Guía Fin', 'Peso Promedio', 'Sexo']]
+    files_cargado_pabellones = listar_unidades(base_path)
 
-        lista_resumenes_crianza.append(df_cargado_pabellones_sector_crianza_resumen)
+    regenerar = args.regenerar or not (existe_dataset(DATA_DIR, 'resumen_crianzas') and existe_dataset(DATA_DIR, 'resumen_alimento'))
+    manifiesto_previo = {} if regenerar else cargar_manifiesto(MANIFIESTO_PATH)
 
-        cantidad_animales_inicial_sector_crianza = df_cargado_pabellones_sector_crianza_resumen['Cantidad Total'].sum()
-        try:
-            df_mortalidad_sector_crianza = pd.read_html(fr"{base_path}\mortalidad\mortalidad_{nombre_sector}_{nro_crianza}.xls", thousands='.', decimal=',')[0]
-        except Exception as e:
-            print(f"Archivo de mortalidad para {nombre_sector} crianza {nro_crianza} no encontrado, se omite.")
-            continue
-        if df_mortalidad_sector_crianza.empty:
-            print(f"Archivo de mortalidad para {nombre_sector} crianza {nro_crianza} está vacío, se omite.")
-            continue
-        df_mortalidad_sector_crianza = df_mortalidad_sector_crianza.iloc[:-1].iloc[:-1]
-        df_mortalidad_sector_crianza['Fecha Movimiento'] = pd.to_datetime(df_mortalidad_sector_crianza['Fecha Movimiento'], format='%d/%m/%y')
-        df_mortalidad_sector_crianza['nombre_sector'] = nombre_sector
-        df_mortalidad_sector_crianza['nombre_sector_code'] = df_mortalidad_sector_crianza['nombre_sector'].apply(uniformar_strings)
-        df_mortalidad_sector_crianza['nro_crianza'] = nro_crianza
-        df_mortalidad_sector_crianza['Fecha Movimiento'] = pd.to_datetime(df_mortalidad_sector_crianza['Fecha Movimiento'], format='%Y-%m-%d', errors='coerce')
-        df_mortalidad_sector_crianza_grouped = df_mortalidad_sector_crianza.groupby(['nombre_sector_code', 'nro_crianza', 'Fecha Movimiento'], as_index=False).agg({'Cantidad': 'sum', 'Edad': 'mean'}).rename(columns={'Cantidad': 'Mortalidad Total'})
-        df_mortalidad_sector_crianza_grouped['stock_animales'] = cantidad_animales_inicial_sector_crianza - df_mortalidad_sector_crianza_grouped['Mortalidad Total'].cumsum()
+    manifiesto_actual = {}
+    for archivo_cargado in files_cargado_pabellones:
+        datos_archivo = split_filename('cargado_pabellones', archivo_cargado)
+        manifiesto_actual[archivo_cargado] = huella_unidad(base_path, archivo_cargado, datos_archivo['nombre_sector'], datos_archivo['nro_crianza'], manifiesto_previo.get(archivo_cargado))
 
-        df_guias_alimento_sector_crianza = pd.read_html(fr"{base_path}\guias_alimento\guias_alimento_{nombre_sector}_{nro_crianza}.xls", skiprows=2, header=0, thousands='.')[0]
-        df_guias_alimento_sector_crianza['nombre_sector'] = nombre_sector
-        df_guias_alimento_sector_crianza['nombre_sector_code'] = df_guias_alimento_sector_crianza['nombre_sector'].apply(uniformar_strings)
-        df_guias_alimento_sector_crianza['nro_crianza'] = nro_crianza
-        df_guias_alimento_sector_crianza['F.Guía'] = pd.to_datetime(df_guias_alimento_sector_crianza['F.Guía'], format='%d/%m/%Y', errors='coerce')
-        df_guias_alimento_sector_crianza_grouped = df_guias_alimento_sector_crianza.groupby(['nombre_sector_code', 'nro_crianza', 'F.Guía'], as_index=False).agg({'Kilos': 'sum'})
+    archivos_cambiados, archivos_eliminados = detectar_cambios(manifiesto_previo, manifiesto_actual)
+    if not archivos_cambiados and not archivos_eliminados:
+        print("Sin cambios en las fuentes, los resúmenes persistidos están al día.")
+        return
+    print(f"Crianzas a procesar: {len(archivos_cambiados)} de {len(files_cargado_pabellones)} (eliminadas: {len(archivos_eliminados)})")
 
-        alimento_inicial_sector_crianza = df_guias_alimento_sector_crianza_grouped[df_guias_alimento_sector_crianza_grouped['F.Guía'] < df_mortalidad_sector_crianza_grouped['Fecha Movimiento'].min()]['Kilos'].sum()
+    df_resumen_crianzas, df_resumen_alimento = ejecutar_ingesta(base_path, archivos_cambiados, workers=args.workers)
 
-        df_cargas_alimento = pd.merge(df_mortalidad_sector_crianza_grouped, df_guias_alimento_sector_crianza_grouped[['nombre_sector_code', 'nro_crianza', 'F.Guía', 'Kilos']], left_on=['nombre_sector_code', 'nro_crianza', 'Fecha Movimiento'], right_on=['nombre_sector_code', 'nro_crianza', 'F.Guía'], how='left')
-        df_cargas_alimento['Kilos'] = df_cargas_alimento['Kilos'].fillna(0)
-        if not df_cargas_alimento.empty:
-            df_cargas_alimento.loc[df_cargas_alimento.index[0], 'Kilos'] = df_cargas_alimento.loc[df_cargas_alimento.index[0], 'Kilos'] + alimento_inicial_sector_crianza
-            df_cargas_alimento['Kilos'] = df_cargas_alimento['Kilos'].fillna(0)
-            df_cargas_alimento['kilos_recibidos'] = df_cargas_alimento['Kilos'].cumsum()
-        df_cargas_alimento['kilos_recibidos_percapita'] = df_cargas_alimento['kilos_recibidos'] / df_cargas_alimento['stock_animales']
-        df_cargas_alimento = df_cargas_alimento[['nombre_sector_code', 'nro_crianza', 'Edad', 'kilos_recibidos_percapita']]
+    if regenerar:
+        reemplazar_dataset(df_resumen_crianzas, DATA_DIR, 'resumen_crianzas')
+        reemplazar_dataset(df_resumen_alimento, DATA_DIR, 'resumen_alimento')
+    else:
+        # Las unidades reprocesadas que ya no generan resumen también deben desaparecer
+        claves_reemplazadas = {clave_unidad(a) for a in archivos_cambiados + archivos_eliminados}
+        for nombre, df_resumen in [('resumen_crianzas', df_resumen_crianzas), ('resumen_alimento', df_resumen_alimento)]:
+            eliminar_particiones(DATA_DIR, nombre, claves_reemplazadas)
+            if df_resumen is not None:
+                escribir_particiones(df_resumen, DATA_DIR, nombre)
+    guardar_manifiesto(MANIFIESTO_PATH, manifiesto_actual)
 
-        lista_cargado_alimento.append(df_cargas_alimento)
 
-    df_resumen_crianzas = pd.concat(lista_resumenes_crianza, ignore_index=True)
-    df_resumen_crianzas.to_pickle(r'..\data\resumen_crianzas.pkl')
-    df_resumen_alimento = pd.concat(lista_cargado_alimento, ignore_index=True)
-    df_resumen_alimento.to_pickle(r'..\data\resumen_alimento.pkl')
+if __name__ == '__main__':
+    main()
@@ -1,22 +1,18 @@
 import pandas as pd
 import numpy as np
-import unicodedata
-import re
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
 
-
-def uniformar_strings(input_str, remove_accents=True):
-    nfkd_form = unicodedata.normalize('NFKD', input_str)
-    s = ''.join(c for c in nfkd_form if not unicodedata.combining(c))
-    s = re.sub(r'[^\w\s]', '', s)
-    s = re.sub(r'[^\w\s]', '', s)
-    s = re.sub(r'\s+', ' ', s).strip()
-    return s.lower()
+from almacen_resumenes import leer_resumen
+from comun.salidas import escribir_salidas, formatos_salida
 
 
 EDAD_PROYECCION = 30
+DATA_DIR = r'..\data'
 
 # TODO: Aún no tengo una buena forma de calcular la edad actual por pabellón
-df_resumen_crianzas = pd.read_pickle(r'..\data\resumen_crianzas.pkl')
+df_resumen_crianzas = leer_resumen(DATA_DIR, 'resumen_crianzas')
 df_resumen_crianzas['mes_carga'] = pd.to_datetime(df_resumen_crianzas['Fecha Guía Inicio']).dt.month
 df_resumen_crianzas['anio_carga'] = pd.to_datetime(df_resumen_crianzas['Fecha Guía Inicio']).dt.year
 
@@ -30,9 +26,15 @@ df_resumen_crianzas_bk = df_resumen_crianzas.copy()
 df_resumen_crianzas = df_resumen_crianzas[df_resumen_crianzas['edad_criterio_proyeccion'] >= 32]
 
 """ merge con guías de alimento """
-df_resumen_alimento = pd.read_pickle(r'..\data\resumen_alimento.pkl')
+# Solo las crianzas que pasaron el filtro y las filas cuya edad redondea a EDAD_PROYECCION
+claves_crianzas = df_resumen_crianzas[['nombre_sector_code', 'nro_crianza']].drop_duplicates()
+df_resumen_alimento = leer_resumen(DATA_DIR, 'resumen_alimento', filtros=[
+    ('nombre_sector_code', 'in', claves_crianzas['nombre_sector_code'].tolist()),
+    ('nro_crianza', 'in', claves_crianzas['nro_crianza'].astype(int).tolist()),
+    ('Edad', '>', EDAD_PROYECCION - 1),
+    ('Edad', '<=', EDAD_PROYECCION),
+])
 df_resumen_alimento['Edad'] = np.ceil(df_resumen_alimento['Edad']).astype(int)
 df_resumen_crianzas = pd.merge(df_resumen_crianzas, df_resumen_alimento, left_on=['nombre_sector_code', 'nro_crianza', 'edad_proyeccion_dias'], right_on=['nombre_sector_code', 'nro_crianza', 'Edad'], how='left')
 
-df_resumen_crianzas.to_excel(r'..\work_data\resumen_crianzas_para_modelo.xlsx', index=False)
-df_resumen_crianzas.to_csv(r'..\work_data\resumen_crianzas_para_modelo.csv', index=False)
\ No newline at end of file
+escribir_salidas(df_resumen_crianzas, r'..\work_data\resumen_crianzas_para_modelo', formatos_salida('F35_FORMATOS_INTERMEDIOS', 'csv,xlsx'))
\ No newline at end of file
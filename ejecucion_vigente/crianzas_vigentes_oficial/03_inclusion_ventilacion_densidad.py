@@ -1,38 +1,17 @@
 import pandas as pd
 import numpy as np
-import sqlalchemy
-import unicodedata
-import re
-
-
-def uniformar_strings(input_str, remove_accents=True):
-    nfkd_form = unicodedata.normalize('NFKD', input_str)
-    s = ''.join(c for c in nfkd_form if not unicodedata.combining(c))
-    s = re.sub(r'[^\w\s]', '', s)
-    s = re.sub(r'\s+', ' ', s).strip()
-    return s.lower()
-
-
-def query_database(query, database):
-    # __server = 'replica-it-eastus2-mysql-spga-prd-001.mysql.database.azure.com'
-    __server = '10.195.6.14'
-    # __username = 'maestros'
-    __username = 'usuario_lectura'
-    # __password = '8btU0JenEyKqajtc'
-    __password = 'Agro.2025#Read'
-    __database = database
-    __mysql_driver = 'mysql+pymysql'
-    __connection_string = f'{__mysql_driver}://{__username}:{__password}@{__server}/{__database}'
-    __engine_sqlalchemy = sqlalchemy.create_engine(__connection_string, connect_args={'ssl': {'ssl': True}})
-    df_result = pd.read_sql(query, __engine_sqlalchemy)
-    __engine_sqlalchemy.dispose()
-    return df_result
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from comun.normalizacion import normalizar_serie
+from comun.maestros import leer_maestro
+from comun.salidas import escribir_salidas, formatos_salida
 
 
 df = pd.read_csv(r'..\work_data\resumen_crianzas_para_modelo.csv')
-df_maestros_pabellones = query_database('SELECT * FROM maestrospabellones', 'ta_ags_pollos')
-print(list(df_maestros_pabellones.columns))
-df_maestros_pabellones['nombre_sector_code'] = df_maestros_pabellones['nombreSector'].apply(uniformar_strings)
+df_maestros_pabellones = leer_maestro('maestrospabellones', ['nombreSector', 'numero', 'tipoConstruccion', 'areaUtil', 'sistemaVentilacion'])
+df_maestros_pabellones['nombre_sector_code'] = normalizar_serie(df_maestros_pabellones['nombreSector'])
 df_maestros_pabellones = df_maestros_pabellones[['nombre_sector_code', 'numero', 'tipoConstruccion', 'areaUtil', 'sistemaVentilacion']]
 df = pd.merge(df, df_maestros_pabellones, left_on=['nombre_sector_code', 'Pabellón'], right_on=['nombre_sector_code', 'numero'], how='left')
 df['densidad_pollos_m2'] = df['Cantidad Total'] / df['areaUtil']
@@ -42,8 +21,8 @@ df['densidad_pollos_m2'] = df['Cantidad Total'] / df['areaUtil']
 # df.drop(columns=['numero', 'areaUtil', 'sistemaVentilacion', 'Cantidad Total'], inplace=True)
 df.drop(columns=['numero', 'areaUtil', 'sistemaVentilacion'], inplace=True)
 
-df_maestros_sectores = query_database('SELECT nombre, zonaGeografica FROM maestrossectorescrianza', 'ta_ags_pollos')
-df_maestros_sectores['nombre'] = df_maestros_sectores['nombre'].apply(uniformar_strings)
+df_maestros_sectores = leer_maestro('maestrossectorescrianza', ['nombre', 'zonaGeografica'])
+df_maestros_sectores['nombre'] = normalizar_serie(df_maestros_sectores['nombre'])
 
 df = pd.merge(df, df_maestros_sectores, left_on='nombre_sector_code', right_on='nombre', how='left')
 df = df[(df['edad_actual'] >= 32) & (df['edad_actual'] <= 41)]
@@ -53,5 +32,4 @@ df['tipoConstruccion'] = np.where(df['tipoConstruccion'].isna(), 'Black Out', df
 df_null = df[df['tipoConstruccion'].isnull()]
 
 # df = df[['nombre_sector_code', 'nro_crianza', 'nro_pabellon', 'mes_carga', 'edad_madres_dias', 'peso_inicial_gramos', 'sexo', 'edad_promedio_faena_dias', 'edad_proyeccion_dias', 'kilos_recibidos_percapita', 'ganancia_promedio_gramos', 'tipoConstruccion', 'densidad_pollos_m2']]
-df.to_excel(r'..\work_data\resumen_crianzas_para_proyeccion.xlsx', index=False)
-df.to_csv(r'..\work_data\resumen_crianzas_para_proyeccion.csv', index=False)
+escribir_salidas(df, r'..\work_data\resumen_crianzas_para_proyeccion', formatos_salida('F35_FORMATOS_INTERMEDIOS', 'csv,xlsx'))
@@ -18,9 +18,16 @@ import pandas as pd
 import numpy as np
 import sys
 import os
+import json
 from pathlib import Path
-from pycaret.regression import load_model, predict_model
 import warnings
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from comun.registro_modelos import cargar_modelo as cargar_modelo_registrado
+from comun.reportes import distribucion, lineas_por_grupo, resumen_grupos, resumen_serie
+from comun.scorer_compilado import ScorerGanancia
+from comun.transformacion_features import preparar_features
+from comun.validacion_entrada import validar_filas
 warnings.filterwarnings('ignore')
 
 # =============================================================================
@@ -30,9 +37,12 @@ warnings.filterwarnings('ignore')
 SCRIPT_DIR = Path(__file__).parent.resolve()
 INPUT_FILE = SCRIPT_DIR.parent / 'work_data' / 'resumen_crianzas_para_proyeccion.csv'
 OUTPUT_FILE = SCRIPT_DIR.parent / 'work_data' / 'resumen_crianzas_con_proyeccion.csv'
+RECHAZADOS_FILE = SCRIPT_DIR.parent / 'work_data' / 'resumen_crianzas_rechazadas_proyeccion.csv'
+REPORTE_FILE = SCRIPT_DIR.parent / 'work_data' / 'resumen_crianzas_con_proyeccion_reporte.json'
 
-# Ruta al modelo (ruta absoluta desde la ubicación del script)
-MODELO_PATH = SCRIPT_DIR.parent.parent / 'analisis' / 'modelo03' / 'modelo_limpio_final'
+# Modelo en el registro (comun.registro_modelos); también acepta una ruta sin .pkl
+MODELO = 'modelo03'
+MODELO_VERSION = None  # None = versión más reciente
 
 # Variables requeridas por el Modelo 03
 VARIABLES_REQUERIDAS = [
@@ -109,32 +119,28 @@ def limpiar_datos_nulos(df, variables_requeridas):
     """Limpiar y reportar datos nulos en variables requeridas"""
     print("\n🧹 Limpiando datos nulos...")
     
-    df_limpio = df.copy()
-    registros_originales = len(df_limpio)
+    registros_originales = len(df)
     
-    # Identificar registros con nulos en variables requeridas
-    nulos_por_columna = {}
-    for var in variables_requeridas:
-        if var in df_limpio.columns:
-            nulos = df_limpio[var].isna().sum()
-            if nulos > 0:
-                nulos_por_columna[var] = nulos
+    # Nulos de todas las variables requeridas en una pasada
+    variables_presentes = [var for var in variables_requeridas if var in df.columns]
+    nulos = df[variables_presentes].isna()
+    nulos_por_columna = nulos.sum()
+    nulos_por_columna = nulos_por_columna[nulos_por_columna > 0]
     
-    if nulos_por_columna:
+    if len(nulos_por_columna):
         print(f"   ⚠️  Se encontraron valores nulos:")
         for var, count in nulos_por_columna.items():
             pct = count / registros_originales * 100
             print(f"      • {var}: {count:,} registros ({pct:.1f}%)")
         
         # Eliminar registros con nulos en variables requeridas
-        for var in variables_requeridas:
-            if var in df_limpio.columns:
-                df_limpio = df_limpio[df_limpio[var].notna()]
+        df_limpio = df[~nulos.any(axis=1).to_numpy()]
         
         registros_eliminados = registros_originales - len(df_limpio)
         print(f"\n   🗑️  Registros eliminados: {registros_eliminados:,} ({registros_eliminados/registros_originales*100:.1f}%)")
         print(f"   ✓ Registros válidos: {len(df_limpio):,} ({len(df_limpio)/registros_originales*100:.1f}%)")
     else:
+        df_limpio = df
         print(f"   ✓ No se encontraron valores nulos")
     
     return df_limpio
@@ -164,86 +170,94 @@ def validar_columnas_requeridas(df, variables_requeridas):
 
 
 def validar_valores(df, valores_validos, rangos_validos):
-    """Validar valores categóricos y rangos numéricos"""
+    """
+    Validar valores categóricos y rangos numéricos por fila
+    
+    Las filas con errores se separan en vez de detener la proyección: un
+    pabellón con datos malos no obliga a repetir la corrida completa.
+    
+    Returns:
+        tuple: (df con las filas válidas, df de filas rechazadas con motivo_rechazo)
+    """
     print("\n✅ Validando valores...")
     
-    errores = []
-    
-    # Validar categóricas
-    for var, valores in valores_validos.items():
-        if var in df.columns:
-            valores_unicos = df[var].unique()
-            invalidos = set(valores_unicos) - set(valores)
-            if invalidos:
-                errores.append(f"Valores inválidos en {var}: {invalidos}. Válidos: {valores}")
-                pass
-    
-    # Validar rangos
-    for var, (min_val, max_val) in rangos_validos.items():
-        if var in df.columns:
-            if df[var].min() < min_val or df[var].max() > max_val:
-                errores.append(
-                    f"{var} fuera de rango [{min_val}, {max_val}]. "
-                    f"Valores: {df[var].min():.2f}-{df[var].max():.2f}"
-                )
-                pass
-
+    validacion = validar_filas(df, list(rangos_validos) + list(valores_validos), valores_validos, rangos_validos)
+    
     # MELÓN, SANTA ANA, MELON, EL VALLE, ESTRELLA
-    if errores:
-        print(f"   ❌ Se encontraron errores de validación:")
-        for error in errores:
-            print(f"      • {error}")
-        raise ValueError("Errores de validación encontrados")
+    if validacion.es_valido:
+        print(f"   ✓ Todos los valores son válidos")
+        return df, df.iloc[:0].assign(motivo_rechazo=pd.Series(dtype=object))
     
-    print(f"   ✓ Todos los valores son válidos")
-    return True
+    print(f"   ❌ Se encontraron errores de validación:")
+    for error in validacion.mensajes():
+        print(f"      • {error}")
+    
+    validas = validacion.validas
+    df_rechazadas = df[~validas].assign(motivo_rechazo=validacion.motivos().to_numpy())
+    if not validas.any():
+        raise ValueError("Errores de validación encontrados en todos los registros")
+    
+    print(f"   ⚠️  Registros rechazados: {len(df_rechazadas):,}; se proyectan los {validas.sum():,} restantes")
+    return df[validas], df_rechazadas
+
+
+def guardar_rechazados(df_rechazadas, output_path):
+    """Guardar los registros que no pasaron la validación (vacío si no hubo)"""
+    df_rechazadas.to_csv(output_path, index=False)
+    if len(df_rechazadas):
+        print(f"\n💾 Registros rechazados guardados en: {output_path.name}")
 
 
 def mostrar_estadisticas_input(df):
-    """Mostrar estadísticas del dataset de entrada"""
+    """
+    Mostrar estadísticas del dataset de entrada
+    
+    Returns:
+        dict con conteos, distribuciones y rango de alimento (comun.reportes)
+    """
+    unicos = df[['nro_crianza', 'Pabellón', 'nombre_sector']].nunique()
+    resumen = {
+        'registros': len(df),
+        'crianzas': int(unicos['nro_crianza']),
+        'pabellones': int(unicos['Pabellón']),
+        'sectores': int(unicos['nombre_sector']),
+        'por_sexo': distribucion(df, 'sexo'),
+        'por_tipo_construccion': distribucion(df, 'tipoConstruccion'),
+        'kilos_recibidos_percapita': resumen_serie(df['kilos_recibidos_percapita']),
+    }
+    
     print("\n📊 Estadísticas del dataset:")
-    print(f"   • Total de registros: {len(df):,}")
-    print(f"   • Crianzas únicas: {df['nro_crianza'].nunique():,}")
-    print(f"   • Pabellones únicos: {df['Pabellón'].nunique():,}")
-    print(f"   • Sectores únicos: {df['nombre_sector'].nunique():,}")
+    print(f"   • Total de registros: {resumen['registros']:,}")
+    print(f"   • Crianzas únicas: {resumen['crianzas']:,}")
+    print(f"   • Pabellones únicos: {resumen['pabellones']:,}")
+    print(f"   • Sectores únicos: {resumen['sectores']:,}")
     
     print(f"\n   📍 Distribución por sexo:")
-    for sexo, count in df['sexo'].value_counts().items():
-        pct = count / len(df) * 100
-        print(f"      • {sexo}: {count:,} ({pct:.1f}%)")
+    for fila in resumen['por_sexo']:
+        print(f"      • {fila['grupo']}: {fila['n']:,} ({fila['pct']:.1f}%)")
     
     print(f"\n   🏗️  Distribución por tipo de construcción:")
-    for tipo, count in df['tipoConstruccion'].value_counts().items():
-        pct = count / len(df) * 100
-        print(f"      • {tipo}: {count:,} ({pct:.1f}%)")
+    for fila in resumen['por_tipo_construccion']:
+        print(f"      • {fila['grupo']}: {fila['n']:,} ({fila['pct']:.1f}%)")
     
+    kilos = resumen['kilos_recibidos_percapita']
     print(f"\n   📈 Rango de alimento (kg/pollo):")
-    print(f"      • Mínimo: {df['kilos_recibidos_percapita'].min():.2f} kg")
-    print(f"      • Máximo: {df['kilos_recibidos_percapita'].max():.2f} kg")
-    print(f"      • Promedio: {df['kilos_recibidos_percapita'].mean():.2f} kg")
+    print(f"      • Mínimo: {kilos['minimo']:.2f} kg")
+    print(f"      • Máximo: {kilos['maximo']:.2f} kg")
+    print(f"      • Promedio: {kilos['promedio']:.2f} kg")
+    
+    return resumen
 
 
-def preparar_features(df):
-    """Aplicar el mismo feature engineering que en entrenamiento"""
-    df_features = df.copy()
-    
-    # Variables cíclicas para mes
-    df_features['mes_sin'] = np.sin(2 * np.pi * df_features['mes_carga'] / 12)
-    df_features['mes_cos'] = np.cos(2 * np.pi * df_features['mes_carga'] / 12)
-    
-    # Ratio alimento por densidad
-    df_features['alimento_por_densidad'] = (
-        df_features['kilos_recibidos_percapita'] / df_features['densidad_pollos_m2']
-    )
-    
-    # Categoría de densidad
-    df_features['densidad_categoria'] = pd.cut(
-        df_features['densidad_pollos_m2'],
-        bins=[0, 13, 15, 20, 50],
-        labels=['Baja', 'Media', 'Alta', 'Muy_Alta']
-    )
-    
-    return df_features
+def cargar_modelo(modelo, version=None):
+    """
+    Cargar el modelo desde el registro: scorer compilado si fue exportado junto
+    al modelo; si no, el pipeline completo con PyCaret
+    """
+    modelo = cargar_modelo_registrado(modelo, version)
+    if isinstance(modelo, ScorerGanancia):
+        print(f"   ✓ Scorer compilado")
+    return modelo
 
 
 def realizar_proyeccion(df, modelo):
@@ -255,10 +269,12 @@ def realizar_proyeccion(df, modelo):
         df_preparado = preparar_features(df)
         
         # Realizar predicción
-        resultado = predict_model(modelo, data=df_preparado)
-        
-        # Extraer predicciones
-        predicciones = resultado['prediction_label'].values
+        if isinstance(modelo, ScorerGanancia):
+            predicciones = modelo.predecir(df_preparado)
+        else:
+            from pycaret.regression import predict_model
+            resultado = predict_model(modelo, data=df_preparado)
+            predicciones = resultado['prediction_label'].values
         
         print(f"   ✓ Proyección completada para {len(predicciones):,} registros")
         
@@ -283,26 +299,36 @@ def agregar_columna_proyeccion(df, predicciones):
 
 
 def mostrar_estadisticas_proyeccion(df):
-    """Mostrar estadísticas de las proyecciones"""
-    print("\n📊 Estadísticas de proyección:")
+    """
+    Mostrar estadísticas de las proyecciones
     
-    ganancia_proy = df['ganancia_proyectada']
+    Returns:
+        dict con el resumen total y por sexo / tipo de construcción (comun.reportes)
+    """
+    resumen = resumen_grupos(df, 'ganancia_proyectada', ['sexo', 'tipoConstruccion'])
+    total = resumen['total']
     
-    print(f"   • Ganancia promedio proyectada: {ganancia_proy.mean():.2f} gramos")
-    print(f"   • Desviación estándar: {ganancia_proy.std():.2f} gramos")
-    print(f"   • Mínimo: {ganancia_proy.min():.2f} gramos")
-    print(f"   • Máximo: {ganancia_proy.max():.2f} gramos")
-    print(f"   • Mediana: {ganancia_proy.median():.2f} gramos")
+    print("\n📊 Estadísticas de proyección:")
+    print(f"   • Ganancia promedio proyectada: {total['promedio']:.2f} gramos")
+    print(f"   • Desviación estándar: {total['desviacion']:.2f} gramos")
+    print(f"   • Mínimo: {total['minimo']:.2f} gramos")
+    print(f"   • Máximo: {total['maximo']:.2f} gramos")
+    print(f"   • Mediana: {total['mediana']:.2f} gramos")
     
     print(f"\n   🐔 Ganancia proyectada por sexo:")
-    for sexo in df['sexo'].unique():
-        proy_sexo = df[df['sexo'] == sexo]['ganancia_proyectada']
-        print(f"      • {sexo}: {proy_sexo.mean():.2f} ± {proy_sexo.std():.2f} gramos")
+    print("\n".join(lineas_por_grupo(resumen['grupos']['sexo'], sangria='      ')))
     
     print(f"\n   🏗️  Ganancia proyectada por tipo de construcción:")
-    for tipo in df['tipoConstruccion'].unique():
-        proy_tipo = df[df['tipoConstruccion'] == tipo]['ganancia_proyectada']
-        print(f"      • {tipo}: {proy_tipo.mean():.2f} ± {proy_tipo.std():.2f} gramos")
+    print("\n".join(lineas_por_grupo(resumen['grupos']['tipoConstruccion'], sangria='      ')))
+    
+    return resumen
+
+
+def guardar_reporte(reporte, output_path):
+    """Guardar el resumen de la corrida como JSON"""
+    with open(output_path, 'w', encoding='utf-8') as archivo:
+        json.dump(reporte, archivo, ensure_ascii=False, indent=2)
+    print(f"   ✓ Resumen guardado en: {output_path.name}")
 
 
 def guardar_resultado(df, output_path):
@@ -378,14 +404,15 @@ def main():
         df['tipoConstruccion'] = np.where(df['tipoConstruccion'] == 'Sin Información', 'Black Out', df['tipoConstruccion'])
         df['densidad_pollos_m2'] = np.where(df['densidad_pollos_m2'] < 0, 14.5, df['densidad_pollos_m2'])
 
-        validar_valores(df, VALORES_VALIDOS, RANGOS_VALIDOS)
+        df, df_rechazadas = validar_valores(df, VALORES_VALIDOS, RANGOS_VALIDOS)
+        guardar_rechazados(df_rechazadas, RECHAZADOS_FILE)
         
         # 7. Mostrar estadísticas del input
-        mostrar_estadisticas_input(df)
+        reporte_input = mostrar_estadisticas_input(df)
         
         # 8. Cargar modelo
         print(f"\n🤖 Cargando Modelo 03 (30 días de alimentación)...")
-        modelo = load_model(str(MODELO_PATH))
+        modelo = cargar_modelo(MODELO, MODELO_VERSION)
         print(f"   ✓ Modelo cargado exitosamente")
         
         # 9. Realizar proyección
@@ -395,13 +422,19 @@ def main():
         df_resultado = agregar_columna_proyeccion(df, predicciones)
         
         # 11. Mostrar estadísticas de proyección
-        mostrar_estadisticas_proyeccion(df_resultado)
+        reporte_proyeccion = mostrar_estadisticas_proyeccion(df_resultado)
         
         # 12. Mostrar ejemplos
         mostrar_ejemplos(df_resultado, n=10)
         
         # 13. Guardar resultado
         guardar_resultado(df_resultado, OUTPUT_FILE)
+        guardar_reporte({
+            'fecha': pd.Timestamp.now().isoformat(timespec='seconds'),
+            'rechazados': len(df_rechazadas),
+            'entrada': reporte_input,
+            'proyeccion': reporte_proyeccion,
+        }, REPORTE_FILE)
         
         print("\n" + "=" * 80)
         print("✅ PROYECCIÓN COMPLETADA EXITOSAMENTE")
@@ -0,0 +1,147 @@
+"""
+ALMACÉN DE RESÚMENES
+====================
+
+Hand-off entre 01_preparacion_datos.py y 02_consolidacion_datos.py como
+dataset Parquet particionado por nombre_sector_code / nro_crianza:
+
+    ..\\data\\resumen_crianzas\\nombre_sector_code=<code>\\nro_crianza=<n>\\datos.parquet
+    ..\\data\\resumen_alimento\\...
+
+La escritura reemplaza o elimina particiones individuales y la lectura aplica
+filtros y selección de columnas sobre el dataset, leyendo solo las particiones
+necesarias. Si el dataset no existe se lee el pickle monolítico anterior
+(resumen_crianzas.pkl / resumen_alimento.pkl) como compatibilidad.
+"""
+
+from urllib.parse import quote
+from pathlib import Path
+import operator
+import shutil
+import os
+
+import pandas as pd
+
+
+CLAVES_PARTICION = ['nombre_sector_code', 'nro_crianza']
+
+COLUMNAS_RESUMEN = {
+    'resumen_crianzas': ['nombre_sector', 'nombre_sector_code', 'nro_crianza', 'Pabellón', 'Cantidad Total', 'Fecha Guía Inicio', 'Fecha Guía Fin', 'Peso Promedio', 'Sexo'],
+    'resumen_alimento': ['nombre_sector_code', 'nro_crianza', 'Edad', 'kilos_recibidos_percapita'],
+}
+
+_OPERADORES = {
+    '=': operator.eq, '==': operator.eq, '!=': operator.ne,
+    '<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge,
+}
+
+
+def ruta_dataset(data_dir, nombre):
+    return Path(data_dir) / nombre
+
+
+def existe_dataset(data_dir, nombre):
+    """Verificar si el resumen ya está guardado como dataset particionado"""
+    return ruta_dataset(data_dir, nombre).is_dir()
+
+
+def ruta_particion(data_dir, nombre, nombre_sector_code, nro_crianza):
+    return ruta_dataset(data_dir, nombre) / f"nombre_sector_code={quote(str(nombre_sector_code), safe='')}" / f"nro_crianza={int(nro_crianza)}"
+
+
+def eliminar_particiones(data_dir, nombre, claves):
+    """Eliminar las particiones de las claves (nombre_sector_code, nro_crianza) indicadas"""
+    for nombre_sector_code, nro_crianza in claves:
+        ruta = ruta_particion(data_dir, nombre, nombre_sector_code, nro_crianza)
+        if ruta.is_dir():
+            shutil.rmtree(ruta)
+
+
+def escribir_particiones(df, data_dir, nombre):
+    """
+    Escribir un resumen reemplazando solo las particiones presentes en df
+
+    Cada partición se escribe en un archivo temporal y se mueve a su lugar, de
+    modo que un lector nunca ve una partición a medio escribir.
+    """
+    for (nombre_sector_code, nro_crianza), df_particion in df.groupby(CLAVES_PARTICION, sort=False):
+        ruta = ruta_particion(data_dir, nombre, nombre_sector_code, nro_crianza)
+        ruta.mkdir(parents=True, exist_ok=True)
+        ruta_tmp = ruta / f'datos.{os.getpid()}.tmp'
+        df_particion.drop(columns=CLAVES_PARTICION).to_parquet(ruta_tmp, index=False)
+        os.replace(ruta_tmp, ruta / 'datos.parquet')
+
+
+def reemplazar_dataset(df, data_dir, nombre):
+    """Reescribir el dataset completo (regeneración total); df puede ser None"""
+    raiz = ruta_dataset(data_dir, nombre)
+    if raiz.is_dir():
+        shutil.rmtree(raiz)
+    raiz.mkdir(parents=True)
+    if df is not None:
+        escribir_particiones(df, data_dir, nombre)
+
+
+def _tiene_particiones(data_dir, nombre):
+    """Verificar si el dataset tiene al menos un archivo (reemplazar_dataset con un frame vacío no escribe ninguno)"""
+    return any(ruta_dataset(data_dir, nombre).rglob('*.parquet'))
+
+
+def _filtro_vacio(filtros):
+    """Una condición 'in' con lista vacía no deja pasar ninguna fila"""
+    return any(op == 'in' and len(valor) == 0 for _, op, valor in filtros or [])
+
+
+def _filtrar_pandas(df, filtros):
+    """Aplicar filtros estilo pyarrow [(columna, op, valor), ...] sobre un DataFrame"""
+    mascara = pd.Series(True, index=df.index)
+    for columna, op, valor in filtros:
+        if op == 'in':
+            mascara &= df[columna].isin(valor)
+        elif op == 'not in':
+            mascara &= ~df[columna].isin(valor)
+        else:
+            mascara &= _OPERADORES[op](df[columna], valor)
+    return df[mascara]
+
+
+def leer_resumen(data_dir, nombre, filtros=None, columnas=None):
+    """
+    Leer un resumen desde el dataset particionado (o el pickle anterior)
+
+    Args:
+        data_dir: Carpeta data de ejecucion_vigente
+        nombre: 'resumen_crianzas' o 'resumen_alimento'
+        filtros: Lista de condiciones (columna, op, valor) unidas con AND; las
+            condiciones sobre nombre_sector_code / nro_crianza descartan
+            particiones completas sin leerlas
+        columnas: Columnas a leer (por defecto todas)
+
+    Returns:
+        DataFrame ordenado por nombre_sector_code, nro_crianza (vacío, con las
+        columnas pedidas, si ningún registro cumple los filtros)
+    """
+    columnas = columnas or COLUMNAS_RESUMEN[nombre]
+
+    if _filtro_vacio(filtros) or (existe_dataset(data_dir, nombre) and not _tiene_particiones(data_dir, nombre)):
+        # pyarrow falla con 'in' [] (tipo null) y con columns= sobre un dataset sin archivos
+        return pd.DataFrame(columns=columnas)
+
+    if existe_dataset(data_dir, nombre):
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+
+        particionado = ds.partitioning(pa.schema([('nombre_sector_code', pa.string()), ('nro_crianza', pa.int64())]), flavor='hive')
+        tabla = pq.read_table(ruta_dataset(data_dir, nombre), columns=columnas, filters=filtros or None, partitioning=particionado)
+        df = tabla.to_pandas()
+    else:
+        df = pd.read_pickle(Path(data_dir) / f'{nombre}.pkl')
+        if filtros:
+            df = _filtrar_pandas(df, filtros)
+        df = df[columnas]
+
+    claves_orden = [c for c in CLAVES_PARTICION if c in df.columns]
+    if claves_orden:
+        df = df.sort_values(claves_orden, kind='stable')
+    return df.reset_index(drop=True)
@@ -0,0 +1,194 @@
+"""
+INGESTA DE CRIANZAS
+===================
+
+Motor de lectura por unidad (nombre_sector, nro_crianza) usado por
+01_preparacion_datos.py. Cada unidad se procesa de forma independiente, lo que
+permite repartirlas en un pool de procesos y luego concatenar los resultados
+en el mismo orden que el recorrido serial. La serie de alimento por ave se
+arma después para todas las crianzas a la vez (construir_cargas_alimento).
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from pkg_sap_agrosuper import resumen_documentos
+from comun.normalizacion import uniformar_strings, normalizar_serie
+from lectura_fuentes import rutas_unidad, existe_fuente, LibroCargado, leer_guias_alimento, leer_mortalidad
+import pandas as pd
+import os
+
+
+def split_filename(categoria_param, filename_param):
+    if categoria_param == 'cargado_pabellones':
+        return {'nombre_sector': filename_param.split('_')[1], 'nro_crianza': int(filename_param.split('_')[2].split('.')[0])}
+    elif categoria_param == 'guias_alimento':
+        return {'nombre_sector': filename_param.split('_')[2], 'nro_crianza': int(filename_param.split('_')[3].split('.')[0])}
+    elif categoria_param == 'cierre_final':
+        return {'nombre_sector': filename_param.split('_')[2], 'nro_crianza': int(filename_param.split('_')[3].split('.')[0])}
+    elif categoria_param == 'salidas_faena':
+        return {'nombre_sector': filename_param.split('_')[1], 'nro_crianza': int(filename_param.split('_')[2].split('.')[0])}
+    elif categoria_param == 'mortalidad':
+        return {'nombre_sector': filename_param.split('_')[1], 'nro_crianza': int(filename_param.split('_')[2].split('.')[0])}
+    else:
+        raise ValueError(f"Categoria {categoria_param} no reconocida")
+
+
+def listar_unidades(base_path):
+    """Listar los archivos de cargado a procesar, en orden determinístico"""
+    return sorted(os.listdir(os.path.join(base_path, 'cargado_pabellones')))
+
+
+def clave_unidad(archivo_cargado):
+    """Clave (nombre_sector_code, nro_crianza) de una unidad a partir de su archivo de cargado"""
+    datos = split_filename('cargado_pabellones', archivo_cargado)
+    return uniformar_strings(datos['nombre_sector']), datos['nro_crianza']
+
+
+def procesar_crianza(base_path, archivo_cargado):
+    """
+    Procesar una unidad sector + crianza
+
+    Args:
+        base_path: Carpeta raíz con las descargas de crianzas vigentes
+        archivo_cargado: Nombre del archivo en cargado_pabellones
+
+    Returns:
+        tuple: (df_resumen, df_mortalidad, df_guias_alimento, lista de mensajes);
+        los frames son None cuando la unidad se omite
+    """
+    mensajes = []
+    nombre_sector = split_filename('cargado_pabellones', archivo_cargado)['nombre_sector']
+    nro_crianza = split_filename('cargado_pabellones', archivo_cargado)['nro_crianza']
+
+    rutas = rutas_unidad(base_path, nombre_sector, nro_crianza)
+    rutas['cargado_pabellones'] = os.path.join(base_path, 'cargado_pabellones', archivo_cargado)
+
+    try:
+        if not existe_fuente(rutas['guias_alimento']):
+            raise FileNotFoundError(rutas['guias_alimento'])
+        df_guias_alimento_sector_crianza = leer_guias_alimento(rutas['guias_alimento'])
+    except Exception as e:
+        mensajes.append(f"Archivo de guias de alimento para {nombre_sector} crianza {nro_crianza} no encontrado, se omite.")
+        return None, None, None, mensajes
+
+    with LibroCargado(rutas['cargado_pabellones']) as libro_cargado:
+        df_cargado_pabellones_sector_crianza = libro_cargado.cuerpo()
+    if df_cargado_pabellones_sector_crianza.empty:
+        mensajes.append(f"Archivo de cargado para {nombre_sector} crianza {nro_crianza} está vacío, se omite.")
+        return None, None, None, mensajes
+    if len(list(df_cargado_pabellones_sector_crianza.columns)) == 12:
+        df_cargado_pabellones_sector_crianza['nombre_sector'] = nombre_sector
+        df_cargado_pabellones_sector_crianza['nro_crianza'] = nro_crianza
+        df_cargado_pabellones_sector_crianza['Fecha Guía'] = pd.to_datetime(df_cargado_pabellones_sector_crianza['Fecha Guía'], format='%Y-%m-%d', errors='coerce')
+    else:
+        raise ValueError(f"...... Archivo {archivo_cargado} con problemas .........")
+    df_cargado_pabellones_sector_crianza_resumen = resumen_documentos.resumen_carga_pabellones_pollos(df_cargado_pabellones_sector_crianza)
+    df_cargado_pabellones_sector_crianza_resumen['nombre_sector_code'] = normalizar_serie(df_cargado_pabellones_sector_crianza_resumen['nombre_sector'])
+    df_cargado_pabellones_sector_crianza_resumen = df_cargado_pabellones_sector_crianza_resumen[['nombre_sector', 'nombre_sector_code', 'nro_crianza', 'Pabellón', 'Cantidad Total', 'Fecha Guía Inicio', 'Fecha Guía Fin', 'Peso Promedio', 'Sexo']]
+
+    try:
+        if not existe_fuente(rutas['mortalidad']):
+            raise FileNotFoundError(rutas['mortalidad'])
+        df_mortalidad_sector_crianza = leer_mortalidad(rutas['mortalidad'])
+    except Exception as e:
+        mensajes.append(f"Archivo de mortalidad para {nombre_sector} crianza {nro_crianza} no encontrado, se omite.")
+        return df_cargado_pabellones_sector_crianza_resumen, None, None, mensajes
+    if df_mortalidad_sector_crianza.empty:
+        mensajes.append(f"Archivo de mortalidad para {nombre_sector} crianza {nro_crianza} está vacío, se omite.")
+        return df_cargado_pabellones_sector_crianza_resumen, None, None, mensajes
+    df_mortalidad_sector_crianza = df_mortalidad_sector_crianza.iloc[:-1].iloc[:-1]
+    df_mortalidad_sector_crianza['Fecha Movimiento'] = pd.to_datetime(df_mortalidad_sector_crianza['Fecha Movimiento'], format='%d/%m/%y')
+    df_mortalidad_sector_crianza['nombre_sector'] = nombre_sector
+    df_mortalidad_sector_crianza['nombre_sector_code'] = uniformar_strings(nombre_sector)
+    df_mortalidad_sector_crianza['nro_crianza'] = nro_crianza
+    df_mortalidad_sector_crianza['Fecha Movimiento'] = pd.to_datetime(df_mortalidad_sector_crianza['Fecha Movimiento'], format='%Y-%m-%d', errors='coerce')
+    df_mortalidad_sector_crianza = df_mortalidad_sector_crianza[['nombre_sector_code', 'nro_crianza', 'Fecha Movimiento', 'Cantidad', 'Edad']]
+
+    df_guias_alimento_sector_crianza['nombre_sector'] = nombre_sector
+    df_guias_alimento_sector_crianza['nombre_sector_code'] = uniformar_strings(nombre_sector)
+    df_guias_alimento_sector_crianza['nro_crianza'] = nro_crianza
+    df_guias_alimento_sector_crianza['F.Guía'] = pd.to_datetime(df_guias_alimento_sector_crianza['F.Guía'], format='%d/%m/%Y', errors='coerce')
+    df_guias_alimento_sector_crianza = df_guias_alimento_sector_crianza[['nombre_sector_code', 'nro_crianza', 'F.Guía', 'Kilos']]
+
+    return df_cargado_pabellones_sector_crianza_resumen, df_mortalidad_sector_crianza, df_guias_alimento_sector_crianza, mensajes
+
+
+def construir_cargas_alimento(df_resumen_crianzas, df_mortalidad, df_guias_alimento):
+    """
+    Serie de alimento recibido por ave para todas las crianzas en un solo paso
+
+    Por cada crianza y día con registro de mortalidad calcula el stock de
+    animales (cantidad inicial menos mortalidad acumulada) y los kilos
+    recibidos acumulados hasta ese día inclusive. Las guías se asignan con
+    merge_asof hacia atrás, por lo que una entrega en un día sin registro de
+    mortalidad se cuenta desde el siguiente día con registro en vez de perderse.
+
+    Args:
+        df_resumen_crianzas: Resumen de cargado (aporta la cantidad inicial)
+        df_mortalidad: Filas de mortalidad de todas las crianzas
+        df_guias_alimento: Filas de guías de alimento de todas las crianzas
+
+    Returns:
+        DataFrame con nombre_sector_code, nro_crianza, Edad, kilos_recibidos_percapita
+        en el orden de las crianzas de df_mortalidad y por fecha dentro de cada una
+    """
+    claves = ['nombre_sector_code', 'nro_crianza']
+
+    cantidad_inicial = df_resumen_crianzas.groupby(claves)['Cantidad Total'].sum().rename('cantidad_inicial')
+    orden_crianzas = pd.MultiIndex.from_frame(df_mortalidad[claves]).unique()
+
+    df_mortalidad_grouped = df_mortalidad.groupby(claves + ['Fecha Movimiento'], as_index=False).agg({'Cantidad': 'sum', 'Edad': 'mean'}).rename(columns={'Cantidad': 'Mortalidad Total'})
+    df_mortalidad_grouped = df_mortalidad_grouped.join(cantidad_inicial, on=claves)
+    df_mortalidad_grouped['stock_animales'] = df_mortalidad_grouped['cantidad_inicial'] - df_mortalidad_grouped.groupby(claves)['Mortalidad Total'].cumsum()
+
+    df_guias_grouped = df_guias_alimento.groupby(claves + ['F.Guía'], as_index=False).agg({'Kilos': 'sum'})
+    df_guias_grouped['kilos_recibidos'] = df_guias_grouped.groupby(claves)['Kilos'].cumsum()
+
+    df_cargas_alimento = pd.merge_asof(
+        df_mortalidad_grouped.sort_values('Fecha Movimiento', kind='stable'),
+        df_guias_grouped[claves + ['F.Guía', 'kilos_recibidos']].sort_values('F.Guía', kind='stable'),
+        left_on='Fecha Movimiento', right_on='F.Guía', by=claves, direction='backward'
+    )
+    df_cargas_alimento['kilos_recibidos'] = df_cargas_alimento['kilos_recibidos'].fillna(0)
+    df_cargas_alimento['kilos_recibidos_percapita'] = df_cargas_alimento['kilos_recibidos'] / df_cargas_alimento['stock_animales']
+
+    df_cargas_alimento['orden_crianza'] = orden_crianzas.get_indexer(pd.MultiIndex.from_frame(df_cargas_alimento[claves]))
+    df_cargas_alimento = df_cargas_alimento.sort_values(['orden_crianza', 'Fecha Movimiento'], kind='stable')
+    return df_cargas_alimento[['nombre_sector_code', 'nro_crianza', 'Edad', 'kilos_recibidos_percapita']].reset_index(drop=True)
+
+
+def ejecutar_ingesta(base_path, archivos_cargado, workers=1):
+    """
+    Procesar todas las unidades, en serie (workers=1) o con un pool de procesos
+
+    Los resultados se consumen en el orden de archivos_cargado en ambos modos,
+    por lo que los resúmenes son idénticos al recorrido serial. La serie de
+    alimento por ave se calcula después, en un solo paso para todas las crianzas.
+
+    Returns:
+        tuple: (df_resumen_crianzas o None, df_resumen_alimento o None)
+    """
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            resultados = list(executor.map(procesar_crianza, [base_path] * len(archivos_cargado), archivos_cargado))
+    else:
+        resultados = (procesar_crianza(base_path, archivo_cargado) for archivo_cargado in archivos_cargado)
+
+    lista_resumenes_crianza = []
+    lista_mortalidad = []
+    lista_guias_alimento = []
+    for df_resumen, df_mortalidad, df_guias_alimento, mensajes in resultados:
+        for mensaje in mensajes:
+            print(mensaje)
+        if df_resumen is not None:
+            lista_resumenes_crianza.append(df_resumen)
+        if df_mortalidad is not None:
+            lista_mortalidad.append(df_mortalidad)
+            lista_guias_alimento.append(df_guias_alimento)
+
+    if not lista_resumenes_crianza:
+        return None, None
+    df_resumen_crianzas = pd.concat(lista_resumenes_crianza, ignore_index=True)
+    if not lista_mortalidad:
+        return df_resumen_crianzas, None
+    df_resumen_alimento = construir_cargas_alimento(df_resumen_crianzas, pd.concat(lista_mortalidad, ignore_index=True), pd.concat(lista_guias_alimento, ignore_index=True))
+    return df_resumen_crianzas, df_resumen_alimento
@@ -0,0 +1,64 @@
+"""
+LECTURA DE FUENTES
+==================
+
+Capa de lectura de las descargas SAP de una unidad sector + crianza. Cada
+archivo se abre una sola vez: del workbook de cargado se lee solo la tabla de
+cargas, y las guías y mortalidad (tablas HTML con extensión .xls) se parsean
+una vez y se reutilizan. Las tablas HTML pasan por
+el cache columnar de comun.cache_fuentes.
+"""
+
+from comun.cache_fuentes import leer_html_cacheado
+import pandas as pd
+import os
+
+
+def rutas_unidad(base_path, nombre_sector, nro_crianza):
+    """Rutas de los tres archivos fuente de una unidad sector + crianza"""
+    return {
+        'cargado_pabellones': os.path.join(base_path, 'cargado_pabellones', f'cargado_{nombre_sector}_{nro_crianza}.xlsx'),
+        'guias_alimento': os.path.join(base_path, 'guias_alimento', f'guias_alimento_{nombre_sector}_{nro_crianza}.xls'),
+        'mortalidad': os.path.join(base_path, 'mortalidad', f'mortalidad_{nombre_sector}_{nro_crianza}.xls'),
+    }
+
+
+def existe_fuente(ruta):
+    """Verificar que exista un archivo fuente sin parsearlo"""
+    return os.path.isfile(ruta)
+
+
+class LibroCargado:
+    """
+    Workbook de cargado de pabellones abierto una sola vez
+
+    La tabla de cargas empieza en la fila 7; el bloque de encabezado de las
+    primeras filas no se usa en el pipeline y no se lee.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._libro = pd.ExcelFile(ruta)
+
+    def cuerpo(self):
+        """Tabla de cargas por pabellón"""
+        return self._libro.parse(skiprows=6)
+
+    def close(self):
+        self._libro.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def leer_guias_alimento(ruta):
+    """Parsear la exportación HTML de guías de alimento"""
+    return leer_html_cacheado(ruta, skiprows=2, header=0, thousands='.')
+
+
+def leer_mortalidad(ruta):
+    """Parsear la exportación HTML de mortalidad"""
+    return leer_html_cacheado(ruta, thousands='.', decimal=',')
@@ -0,0 +1,75 @@
+"""
+MANIFIESTO DE FUENTES
+=====================
+
+Huella (ruta, tamaño, mtime, sha256) de cada archivo fuente por unidad
+sector + crianza. Permite que 01_preparacion_datos.py vuelva a leer solo las
+unidades cuyo cargado, guías o mortalidad cambió desde la última ejecución.
+"""
+
+from comun.cache_fuentes import hash_archivo
+from lectura_fuentes import rutas_unidad
+import json
+import os
+
+
+CATEGORIAS_FUENTE = ['cargado_pabellones', 'guias_alimento', 'mortalidad']
+
+
+def huella_archivo(ruta, huella_previa=None):
+    """
+    Huella de un archivo fuente
+
+    Si tamaño y mtime coinciden con la huella previa se reutiliza su hash, de
+    modo que en un día normal solo se leen los archivos que realmente cambiaron.
+
+    Returns:
+        dict con ruta, tamano, mtime y sha256, o None si el archivo no existe
+    """
+    if not os.path.exists(ruta):
+        return None
+    stat = os.stat(ruta)
+    if huella_previa is not None and huella_previa['tamano'] == stat.st_size and huella_previa['mtime'] == stat.st_mtime:
+        sha256 = huella_previa['sha256']
+    else:
+        sha256 = hash_archivo(ruta)
+    return {'ruta': ruta, 'tamano': stat.st_size, 'mtime': stat.st_mtime, 'sha256': sha256}
+
+
+def huella_unidad(base_path, archivo_cargado, nombre_sector, nro_crianza, huella_previa=None):
+    """Huellas de los archivos fuente de una unidad, por categoría"""
+    huella_previa = huella_previa or {}
+    rutas = rutas_unidad(base_path, nombre_sector, nro_crianza)
+    rutas['cargado_pabellones'] = os.path.join(base_path, 'cargado_pabellones', archivo_cargado)
+    return {categoria: huella_archivo(rutas[categoria], huella_previa.get(categoria)) for categoria in CATEGORIAS_FUENTE}
+
+
+def cargar_manifiesto(ruta):
+    """Leer el manifiesto persistido; vacío si no existe"""
+    if not os.path.exists(ruta):
+        return {}
+    with open(ruta, 'r', encoding='utf-8') as f:
+        return json.load(f)['unidades']
+
+
+def guardar_manifiesto(ruta, unidades):
+    """Persistir el manifiesto de forma atómica"""
+    ruta_tmp = f'{ruta}.tmp'
+    with open(ruta_tmp, 'w', encoding='utf-8') as f:
+        json.dump({'version': 1, 'unidades': unidades}, f, ensure_ascii=False, indent=1)
+    os.replace(ruta_tmp, ruta)
+
+
+def detectar_cambios(unidades_previas, unidades_actuales):
+    """
+    Comparar manifiestos
+
+    Returns:
+        tuple: (archivos de cargado nuevos o modificados, archivos eliminados)
+    """
+    def _firmas(huellas):
+        return {c: (h['sha256'] if h is not None else None) for c, h in huellas.items()}
+
+    cambiadas = [a for a, huellas in unidades_actuales.items() if a not in unidades_previas or _firmas(huellas) != _firmas(unidades_previas[a])]
+    eliminadas = [a for a in unidades_previas if a not in unidades_actuales]
+    return cambiadas, eliminadas
@@ -8,12 +8,28 @@ Variables requeridas:
 - kilos_recibidos_percapita (hasta 30 días)
 - tipoConstruccion
 - densidad_pollos_m2
+
+PyCaret solo se importa si no hay scorer compilado y el modelo se carga en la
+primera predicción, así importar el módulo o validar datos es inmediato
+(python -m comun.benchmark_arranque).
 """
 
+import sys
+from pathlib import Path
+
 import pandas as pd
 import numpy as np
-from pycaret.regression import load_model, predict_model
 import warnings
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from comun.cache_predicciones import CACHE_PREDICCIONES
+from comun.grilla_prediccion import cargar_grilla
+from comun.prediccion_lotes import predecir_csv_por_bloques
+from comun.registro_modelos import cargar_modelo, resolver
+from comun.reportes import lineas_por_grupo, resumen_grupos
+from comun.scorer_compilado import ScorerGanancia, huella_modelo
+from comun.transformacion_features import preparar_features
+from comun.validacion_entrada import validar_filas
 warnings.filterwarnings('ignore')
 
 class PredictorGanancia:
@@ -22,16 +38,31 @@ class PredictorGanancia:
     Modelo entrenado con datos de alimentación hasta 30 días
     """
     
-    def __init__(self, modelo_path='../../analisis/modelo03/modelo_limpio_final'):
+    def __init__(self, modelo_path=None, usar_grilla=True, cache=CACHE_PREDICCIONES, version=None):
         """
         Inicializar el predictor
         
         Args:
-            modelo_path: Ruta al modelo guardado (sin extensión .pkl)
+            modelo_path: Ruta al modelo guardado (sin extensión .pkl); None = 'modelo03' del
+                registro de modelos (comun.registro_modelos), con verificación de sha256
+            usar_grilla: Usar la grilla precalculada (<modelo>_grilla.npz) si existe
+            cache: CachePredicciones para memorizar casos ya puntuados (None lo desactiva)
+            version: Versión registrada del modelo (solo sin modelo_path); None = la más reciente
         """
-        print("🤖 Cargando Modelo 03 (30 días de alimentación)...")
-        self.modelo = load_model(modelo_path)
-        print("   ✓ Modelo cargado exitosamente")
+        # El modelo se carga en la primera predicción: validar_input no lo necesita
+        if modelo_path is None:
+            entrada = resolver('modelo03', version)
+            self.modelo_path = str(entrada['ruta'])
+            self._sha256, self._sha256_scorer = entrada['sha256'], entrada['sha256_scorer']
+        else:
+            self.modelo_path = str(Path(modelo_path).absolute())  # relativo al directorio de trabajo al crear el predictor
+            self._sha256 = self._sha256_scorer = None
+        self._modelo = None
+        self.usar_grilla = usar_grilla
+        self._grilla = None
+        self._grilla_revisada = False
+        self.cache = cache
+        self._huella = None
         
         # Variables requeridas
         self.variables_requeridas = [
@@ -55,6 +86,46 @@ class PredictorGanancia:
             'densidad_pollos_m2': (9.0, 50.0)
         }
     
+    @property
+    def modelo(self):
+        """Modelo cargado en el primer acceso"""
+        if self._modelo is None:
+            print("🤖 Cargando Modelo 03 (30 días de alimentación)...")
+            # Scorer compilado si existe junto al .pkl; una sola carga por proceso (comun.registro_modelos)
+            self._modelo = cargar_modelo(self.modelo_path, sha256=self._sha256, sha256_scorer=self._sha256_scorer)
+            print("   ✓ Modelo cargado exitosamente")
+        return self._modelo
+    
+    @property
+    def grilla(self):
+        """Grilla precalculada del modelo (python -m comun.grilla_prediccion), o None"""
+        if self.usar_grilla and not self._grilla_revisada:
+            self._grilla = cargar_grilla(self.modelo_path)
+            self._grilla_revisada = True
+        return self._grilla if self.usar_grilla else None
+    
+    @property
+    def huella(self):
+        """Identifica modelo y modo de predicción en las claves del cache"""
+        if self._huella is None:
+            modo = 'grilla' if self.grilla is not None else 'modelo'
+            self._huella = f'{self._sha256 or huella_modelo(self.modelo_path)}|{modo}'
+        return self._huella
+    
+    def validar_filas(self, datos):
+        """
+        Errores de validación por fila, sin copiar los datos
+        
+        Args:
+            datos: dict o DataFrame con los datos a validar
+            
+        Returns:
+            ValidacionFilas (comun.validacion_entrada) con la máscara de errores por fila y control
+        """
+        if isinstance(datos, dict):
+            datos = pd.DataFrame([datos])
+        return validar_filas(datos, self.variables_requeridas, self.valores_validos, self.rangos_validos)
+    
     def validar_input(self, datos):
         """
         Validar que los datos de entrada sean correctos
@@ -65,28 +136,13 @@ class PredictorGanancia:
         Returns:
             tuple: (es_valido, mensaje_error)
         """
-        # Convertir a DataFrame si es dict
-        if isinstance(datos, dict):
-            df = pd.DataFrame([datos])
-        else:
-            df = datos.copy()
-        
-        # Verificar variables requeridas
-        for var in self.variables_requeridas:
-            if var not in df.columns:
-                return False, f"Falta la variable requerida: {var}"
-        
-        # Validar categóricas
-        for var, valores in self.valores_validos.items():
-            valores_unicos = df[var].unique()
-            invalidos = set(valores_unicos) - set(valores)
-            if invalidos:
-                return False, f"Valores inválidos en {var}: {invalidos}. Valores válidos: {valores}"
+        try:
+            validacion = self.validar_filas(datos)
+        except ValueError as e:
+            return False, str(e)
         
-        # Validar rangos numéricos
-        for var, (min_val, max_val) in self.rangos_validos.items():
-            if df[var].min() < min_val or df[var].max() > max_val:
-                return False, f"{var} fuera de rango [{min_val}, {max_val}]. Valores: {df[var].min()}-{df[var].max()}"
+        if not validacion.es_valido:
+            return False, "; ".join(validacion.mensajes())
         
         return True, "Validación exitosa"
     
@@ -98,61 +154,105 @@ class PredictorGanancia:
             datos: DataFrame con las variables base
             
         Returns:
-            DataFrame con features adicionales
+            DataFrame con las variables base y las features adicionales (comun.transformacion_features)
         """
-        df = datos.copy()
-        
-        # Variables cíclicas para mes
-        df['mes_sin'] = np.sin(2 * np.pi * df['mes_carga'] / 12)
-        df['mes_cos'] = np.cos(2 * np.pi * df['mes_carga'] / 12)
-        
-        # Ratio alimento por densidad
-        df['alimento_por_densidad'] = df['kilos_recibidos_percapita'] / df['densidad_pollos_m2']
+        return preparar_features(datos)
+    
+    def puntuar_features(self, df_preparado):
+        """
+        Predicción del modelo sobre features ya preparadas (preparar_features),
+        sin validación, grilla ni cache
         
-        # Categoría de densidad
-        df['densidad_categoria'] = pd.cut(
-            df['densidad_pollos_m2'],
-            bins=[0, 13, 15, 20, 50],
-            labels=['Baja', 'Media', 'Alta', 'Muy_Alta']
-        )
+        Returns:
+            np.ndarray con una predicción por fila
+        """
+        if isinstance(self.modelo, ScorerGanancia):
+            return self.modelo.predecir(df_preparado)
+        from pycaret.regression import predict_model
+        return predict_model(self.modelo, data=df_preparado)['prediction_label'].values
+    
+    def _predecir_modelo(self, df, features=None):
+        """Predicción con el modelo completo (preparar_features + scorer o PyCaret)"""
+        if features is None or not features.index.is_unique:
+            return self.puntuar_features(self.preparar_features(df))
+        return self.puntuar_features(features.loc[df.index])
+    
+    def _predecir_filas(self, df, features=None):
+        """Predicción sin cache: grilla si existe, modelo para las filas fuera de ella"""
+        if self.grilla is None:
+            return self._predecir_modelo(df, features)
+        predicciones = self.grilla.predecir(df)
+        fuera = np.isnan(predicciones)
+        if fuera.any():
+            predicciones[fuera] = self._predecir_modelo(df[fuera], features)
+        return predicciones
+    
+    def puntuar_validas(self, df, features=None):
+        """
+        Predicción de filas ya validadas por el mismo camino que predecir:
+        cache, grilla y modelo para las filas fuera de la grilla
         
-        return df
+        Args:
+            df: DataFrame con las variables base, sin filas inválidas
+            features: preparar_features(df) ya calculadas (mismo índice que df), para
+                no repetirlas en las filas que van al modelo
+            
+        Returns:
+            np.ndarray con una predicción por fila
+        """
+        if self.cache is None:
+            return self._predecir_filas(df, features)
+        return self.cache.predecir(df, self.variables_requeridas, self.huella, lambda filas: self._predecir_filas(filas, features))
     
-    def predecir(self, datos, mostrar_detalles=True):
+    def predecir(self, datos, mostrar_detalles=True, omitir_invalidas=False):
         """
         Realizar predicciones
         
         Args:
             datos: dict o DataFrame con los datos
             mostrar_detalles: Si mostrar información detallada
+            omitir_invalidas: Si True, las filas que no pasan la validación quedan
+                con ganancia_predicha NaN y el motivo en error_validacion, en vez
+                de rechazar el lote completo
             
         Returns:
             DataFrame con predicciones
         """
-        # Convertir a DataFrame si es necesario
+        # Convertir a DataFrame si es necesario (datos no se modifica: el resultado es una copia)
         if isinstance(datos, dict):
             df = pd.DataFrame([datos])
         else:
-            df = datos.copy()
+            df = datos
         
         # Validar input
-        es_valido, mensaje = self.validar_input(df)
-        if not es_valido:
-            raise ValueError(f"❌ Error de validación: {mensaje}")
-        
-        # Preparar features
-        df_preparado = self.preparar_features(df)
+        try:
+            validacion = self.validar_filas(df)
+        except ValueError as e:
+            raise ValueError(f"❌ Error de validación: {e}") from e
+        if not validacion.es_valido and not omitir_invalidas:
+            raise ValueError(f"❌ Error de validación: {'; '.join(validacion.mensajes())}")
+        validas = validacion.validas
+        df_validas = df if validacion.es_valido else df[validas]
         
         # Predecir
         if mostrar_detalles:
             print("\n📊 Realizando predicción...")
-            print(f"   • Registros a predecir: {len(df)}")
+            print(f"   • Registros a predecir: {len(df_validas)}")
+            if len(df_validas) < len(df):
+                print(f"   ⚠️  Registros inválidos omitidos: {len(df) - len(df_validas)}")
         
-        predicciones = predict_model(self.modelo, data=df_preparado)
+        # Cada caso distinto se puntúa una vez; los ya vistos salen del cache
+        predicciones = np.full(len(df), np.nan)
+        if len(df_validas):
+            predicciones[validas] = self.puntuar_validas(df_validas)
         
         # Agregar columnas útiles
         df_resultado = df.copy()
-        df_resultado['ganancia_predicha'] = predicciones['prediction_label'].values
+        df_resultado['ganancia_predicha'] = predicciones
+        if omitir_invalidas:
+            motivos = np.full(len(df), '', dtype=object)
+            motivos[~validas] = validacion.motivos().to_numpy()
+            df_resultado['error_validacion'] = motivos
         
         if mostrar_detalles:
             print(f"   ✓ Predicción completada")
@@ -166,6 +266,9 @@ class PredictorGanancia:
         """
         Predecir para un archivo CSV completo
         
+        El CSV y el resultado quedan completos en memoria; para archivos grandes
+        usar predecir_lote_por_bloques.
+        
         Args:
             archivo_csv: Ruta al archivo CSV
             guardar_resultado: Si guardar el resultado
@@ -182,7 +285,7 @@ class PredictorGanancia:
             raise ValueError(f"❌ Columnas faltantes en el CSV: {columnas_faltantes}")
         
         # Seleccionar solo las variables necesarias
-        df_input = df[self.variables_requeridas].copy()
+        df_input = df[self.variables_requeridas]
         
         print(f"   ✓ Datos cargados: {len(df_input)} registros")
         
@@ -191,47 +294,68 @@ class PredictorGanancia:
         
         # Guardar si se solicita
         if guardar_resultado:
-            archivo_salida = archivo_csv.replace('.csv', '_predicciones_modelo03.csv')
+            archivo_salida = self._archivo_salida(archivo_csv)
             resultado.to_csv(archivo_salida, index=False)
             print(f"\n💾 Resultado guardado en: {archivo_salida}")
         
         return resultado
     
+    def _archivo_salida(self, archivo_csv):
+        return archivo_csv.replace('.csv', '_predicciones_modelo03.csv')
+    
+    def predecir_lote_por_bloques(self, archivo_csv, archivo_salida=None, tamano_bloque=50_000):
+        """
+        Predecir un CSV de cualquier tamaño leyéndolo y escribiéndolo por bloques
+        (comun.prediccion_lotes), con memoria constante; las filas inválidas quedan
+        sin ganancia y con el motivo en error_validacion
+        
+        Args:
+            archivo_csv: Ruta al archivo CSV
+            archivo_salida: Ruta del resultado (por defecto la de predecir_lote)
+            tamano_bloque: Filas por bloque
+            
+        Returns:
+            dict con archivo_salida, filas, bloques, invalidas y resumen de la ganancia
+        """
+        return predecir_csv_por_bloques(self, archivo_csv, archivo_salida or self._archivo_salida(archivo_csv), tamano_bloque)
+    
     def estadisticas_prediccion(self, predicciones):
         """
         Mostrar estadísticas de las predicciones
         
         Args:
             predicciones: DataFrame con predicciones
+            
+        Returns:
+            dict con el resumen total y por sexo / tipo de construcción (comun.reportes)
         """
+        resumen = resumen_grupos(predicciones, 'ganancia_predicha', ['sexo', 'tipoConstruccion'])
+        total = resumen['total']
+        
         print("\n" + "="*70)
         print("📊 ESTADÍSTICAS DE PREDICCIÓN")
         print("="*70)
         
-        ganancia = predicciones['ganancia_predicha']
-        
         print(f"\n📈 Ganancia Predicha:")
-        print(f"   • Promedio: {ganancia.mean():.2f} gramos")
-        print(f"   • Desviación: {ganancia.std():.2f} gramos")
-        print(f"   • Mínimo: {ganancia.min():.2f} gramos")
-        print(f"   • Máximo: {ganancia.max():.2f} gramos")
-        print(f"   • Mediana: {ganancia.median():.2f} gramos")
+        print(f"   • Promedio: {total['promedio']:.2f} gramos")
+        print(f"   • Desviación: {total['desviacion']:.2f} gramos")
+        print(f"   • Mínimo: {total['minimo']:.2f} gramos")
+        print(f"   • Máximo: {total['maximo']:.2f} gramos")
+        print(f"   • Mediana: {total['mediana']:.2f} gramos")
         
         # Estadísticas por sexo
-        if 'sexo' in predicciones.columns:
+        if 'sexo' in resumen['grupos']:
             print(f"\n🐔 Por Sexo:")
-            for sexo in predicciones['sexo'].unique():
-                ganancia_sexo = predicciones[predicciones['sexo'] == sexo]['ganancia_predicha']
-                print(f"   • {sexo}: {ganancia_sexo.mean():.2f} ± {ganancia_sexo.std():.2f} gramos")
+            print("\n".join(lineas_por_grupo(resumen['grupos']['sexo'])))
         
         # Estadísticas por tipo de construcción
-        if 'tipoConstruccion' in predicciones.columns:
+        if 'tipoConstruccion' in resumen['grupos']:
             print(f"\n🏗️  Por Tipo de Construcción:")
-            for tipo in predicciones['tipoConstruccion'].unique():
-                ganancia_tipo = predicciones[predicciones['tipoConstruccion'] == tipo]['ganancia_predicha']
-                print(f"   • {tipo}: {ganancia_tipo.mean():.2f} ± {ganancia_tipo.std():.2f} gramos")
+            print("\n".join(lineas_por_grupo(resumen['grupos']['tipoConstruccion'])))
         
         print("\n" + "="*70)
+        
+        return resumen
 
 
 def ejemplo_prediccion_simple():